@@ -31,6 +31,7 @@ from blankly.frameworks.model.model import Model as Model
 from blankly.frameworks.strategy import StrategyState as StrategyState
 from blankly.frameworks.screener.screener import Screener
 from blankly.frameworks.screener.screener_state import ScreenerState
+from blankly.exchanges.interfaces.paper_trade.backtest.vectorized import backtest_vectorized
 
 from blankly.exchanges.managers.ticker_manager import TickerManager
 from blankly.exchanges.managers.orderbook_manager import OrderbookManager
@@ -40,6 +41,7 @@ from blankly.frameworks.multiprocessing.blankly_bot import BlanklyBot
 from blankly.utils.utils import trunc
 import blankly.utils.utils as utils
 from blankly.utils.scheduler import Scheduler
+from blankly.utils.sessions import get_latency_metrics
 import blankly.indicators as indicators
 from blankly.utils import time_builder
 
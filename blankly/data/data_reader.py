@@ -17,10 +17,12 @@
 """
 
 import json
+import typing
+import numpy as np
 import pandas as pd
 from enum import Enum
 
-from blankly.utils import convert_epochs
+from blankly.utils import convert_epoch_array
 from blankly.exchanges.interfaces.futures_exchange_interface import FuturesExchangeInterface
 
 
@@ -43,6 +45,115 @@ class FileTypes(Enum):
     csv = 'csv'
     json = 'json'
     df = 'df'
+    parquet = 'parquet'
+
+
+# The most rows held from a file at once when it's streamed or read inside a time window
+DEFAULT_CHUNK_SIZE = 1000000
+
+
+def _epoch_scale(epoch) -> int:
+    """
+    The factor between an epoch in the unit of a file (such as milliseconds) and seconds. This matches
+    convert_epochs()
+    """
+    scale = 1
+    while epoch / scale > 5000000000:
+        scale *= 10
+    return scale
+
+
+def _in_window(frame: pd.DataFrame, start, stop, scale: int) -> pd.DataFrame:
+    """
+    Keep the rows of a frame that are between start and stop, which are given in epoch seconds
+    """
+    times = frame['time']
+    keep = None
+    if start is not None:
+        keep = times >= start * scale
+    if stop is not None:
+        keep = times <= stop * scale if keep is None else keep & (times <= stop * scale)
+    return frame if keep is None else frame[keep]
+
+
+def _most_common(values: np.ndarray):
+    """
+    The value that appears the most, breaking ties by whichever appears first
+    """
+    unique, first, counts = np.unique(values, return_index=True, return_counts=True)
+    most = counts == counts.max()
+    return unique[most][np.argmin(first[most])]
+
+
+def _file_columns(file_path: str) -> list:
+    if file_path[-8:] == '.parquet':
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Please \"pip install pyarrow\" to read parquet files with blankly.")
+        return pq.ParquetFile(file_path).schema_arrow.names
+    return list(pd.read_csv(file_path, nrows=0).columns)
+
+
+def _file_chunks(file_path: str, chunk_size: int, columns: list = None) -> typing.Iterator[pd.DataFrame]:
+    """
+    Read a csv or parquet file a chunk at a time
+    """
+    if file_path[-8:] == '.parquet':
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Please \"pip install pyarrow\" to read parquet files with blankly.")
+        for batch in pq.ParquetFile(file_path).iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(file_path, chunksize=chunk_size, usecols=columns)
+
+
+def _window_chunks(file_path: str, start=None, stop=None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   columns: list = None, presorted: bool = False) -> typing.Iterator[pd.DataFrame]:
+    """
+    Read only the rows of a file between start and stop (epoch seconds) without holding more than a chunk of the
+    rest of it
+
+    Args:
+        presorted: Check that the file is sorted by time instead of leaving that to the caller. The file stops being
+            read as soon as it passes stop
+    """
+    scale = None
+    last_time = None
+    for frame in _file_chunks(file_path, chunk_size, columns):
+        if frame.empty:
+            continue
+        times = frame['time']
+        if scale is None:
+            scale = _epoch_scale(times.iloc[0])
+
+        if presorted:
+            if not times.is_monotonic_increasing or (last_time is not None and times.iloc[0] < last_time):
+                raise ValueError(f"{file_path} must be sorted by time to be streamed.")
+            last_time = times.iloc[-1]
+
+        window = _in_window(frame, start, stop, scale)
+        if not window.empty:
+            yield window
+        if presorted and stop is not None and last_time > stop * scale:
+            return
+
+
+def _read_window(file_path: str, start=None, stop=None) -> pd.DataFrame:
+    """
+    Read a whole csv or parquet file or, if given a time window, only the rows inside it
+    """
+    if start is None and stop is None:
+        if file_path[-8:] == '.parquet':
+            return pd.read_parquet(file_path)
+        return pd.read_csv(file_path)
+
+    chunks = list(_window_chunks(file_path, start, stop))
+    if not chunks:
+        return pd.DataFrame({'time': []})
+    return pd.concat(chunks, ignore_index=True)
 
 
 class DataReader:
@@ -61,6 +172,26 @@ class DataReader:
     def data(self):
         return self._internal_dataset
 
+    @property
+    def keys(self) -> list:
+        """
+        The symbols or event types that this reader holds
+        """
+        return list(self._internal_dataset)
+
+    def chunks(self, key: str) -> typing.Iterable[pd.DataFrame]:
+        """
+        The rows for a symbol or event type as dataframes that follow each other in time
+        """
+        return [self._internal_dataset[key]]
+
+    def time_bounds(self, key: str) -> tuple:
+        """
+        The first and last time of a symbol or event type
+        """
+        times = self._internal_dataset[key]['time']
+        return times.min(), times.max()
+
     def _write_dataset(self, contents: dict, key: str, required_columns: tuple):
         try:
             # Check if all the keys exist for each part of the dictionary
@@ -98,7 +229,18 @@ class __FormatReader(DataReader):
 
         return file_paths, symbols
 
-    def _parse_df_prices(self, file_paths: list, symbols: list, columns: set) -> None:
+    @staticmethod
+    def _sorted_window(frame: pd.DataFrame, start, stop) -> pd.DataFrame:
+        """
+        Keep the rows between start and stop (epoch seconds) and sort them by time, unless they're already sorted
+        """
+        if (start is not None or stop is not None) and not frame.empty:
+            frame = _in_window(frame, start, stop, _epoch_scale(frame['time'].iloc[0]))
+        if frame['time'].is_monotonic_increasing:
+            return frame
+        return frame.sort_values('time', kind='stable')
+
+    def _parse_df_prices(self, file_paths: list, symbols: list, columns: set, start=None, stop=None) -> None:
 
         if symbols is None:
             raise LookupError("Must pass one or more symbols to identify the DataFrame")
@@ -107,16 +249,15 @@ class __FormatReader(DataReader):
                               f"file paths and symbol lengths.")
 
         for index in range(len(file_paths)):
-
-            self._check_length(file_paths[index], file_paths[index])
-
             # Check if its contained
             assert (columns.issubset(file_paths[index].columns)), f"{columns} not subset of {file_paths[index].columns}"
 
             # Now push it directly into the dataset and sort by time
-            self._internal_dataset[symbols[index]] = file_paths[index].sort_values('time')
+            contents = self._sorted_window(file_paths[index], start, stop)
+            self._check_length(contents, file_paths[index])
+            self._internal_dataset[symbols[index]] = contents
 
-    def _parse_csv_prices(self, file_paths: list, symbols: list, columns: set) -> None:
+    def _parse_file_prices(self, file_paths: list, symbols: list, columns: set, start=None, stop=None) -> None:
         if symbols is None:
             raise LookupError("Must pass one or more symbols to identify the csv files")
         if len(file_paths) != len(symbols):
@@ -124,8 +265,8 @@ class __FormatReader(DataReader):
                               f"file paths and symbol lengths.")
 
         for index in range(len(file_paths)):
-            # Load the file via pandas
-            contents = pd.read_csv(file_paths[index])
+            # Load the file via pandas. With a time window only the rows inside it are kept as the file is read
+            contents = _read_window(file_paths[index], start, stop)
 
             self._check_length(contents, file_paths[index])
 
@@ -133,9 +274,9 @@ class __FormatReader(DataReader):
             assert (columns.issubset(contents.columns)), f"{columns} not subset of {contents.columns}"
 
             # Now push it directly into the dataset and sort by time
-            self._internal_dataset[symbols[index]] = contents.sort_values('time')
+            self._internal_dataset[symbols[index]] = self._sorted_window(contents, None, None)
 
-    def _parse_json_prices(self, file_paths: list, keys: tuple) -> None:
+    def _parse_json_prices(self, file_paths: list, keys: tuple, start=None, stop=None) -> None:
         for file in file_paths:
             # Load the contents into json first because it has a ton of symbols
             contents = json.loads(open(file).read())
@@ -143,10 +284,10 @@ class __FormatReader(DataReader):
             for symbol in contents:
                 self._write_dataset(contents[symbol], symbol, keys)
 
-                self._check_length(self._internal_dataset[symbol], file)
-
                 # Ensure that the dataframe is sorted by time
-                self._internal_dataset[symbol] = self._internal_dataset[symbol].sort_values('time')
+                self._internal_dataset[symbol] = self._sorted_window(self._internal_dataset[symbol], start, stop)
+
+                self._check_length(self._internal_dataset[symbol], file)
 
 
 class PriceReader(__FormatReader):
@@ -166,6 +307,8 @@ class PriceReader(__FormatReader):
                 complain_if_different('df', FileTypes.df.value)
             elif file_path[-3:] == 'csv':
                 complain_if_different('csv', FileTypes.csv.value)
+            elif file_path[-8:] == '.parquet':
+                complain_if_different('parquet', FileTypes.parquet.value)
             elif file_path[-4:] == 'json':
                 # In this instance the symbols should be None
                 complain_if_different('json', FileTypes.json.value)
@@ -176,19 +319,14 @@ class PriceReader(__FormatReader):
 
     def _guess_resolutions(self):
         for symbol in self._internal_dataset:
-            # Get the time diff
-            time_series: pd.Series = self._internal_dataset[symbol]['time']
-
-            # Convert all epochs using the convert epoch function
-            time_series = time_series.apply(lambda x: convert_epochs(x))
-
-            time_dif = time_series.diff()
+            # Convert all epochs to seconds in one pass over the time column
+            times = convert_epoch_array(self._internal_dataset[symbol]['time'].to_numpy())
 
             # Now find the most common difference and use that
             if symbol not in self.prices_info:
                 self.prices_info[symbol] = {}
 
-            guessed_resolution = int(time_dif.value_counts().idxmax())
+            guessed_resolution = int(_most_common(np.diff(times)))
 
             # If the resolution is 0, then we have a problem
             if guessed_resolution == 0:
@@ -196,13 +334,13 @@ class PriceReader(__FormatReader):
                                   f" This commonly occurs when the data is in exponential format or too few datapoints")
 
             # Store the resolution start time and end time of each dataset
-            self.prices_info[symbol]['resolution'] = int(time_dif.value_counts().idxmax())
-            self.prices_info[symbol]['start_time'] = time_series.iloc[0]
-            self.prices_info[symbol]['stop_time'] = time_series.iloc[-1]
+            self.prices_info[symbol]['resolution'] = guessed_resolution
+            self.prices_info[symbol]['start_time'] = times[0]
+            self.prices_info[symbol]['stop_time'] = times[-1]
 
-    def __init__(self, file_path: [str, list], symbol: [str, list]):
+    def __init__(self, file_path: [str, list], symbol: [str, list], start: float = None, stop: float = None):
         """
-        Read in a new custom price dataset in either json or csv format
+        Read in a new custom price dataset in json, csv or parquet format
 
         Args:
             file_path (str or list): A single file path or list of filepaths pointing to a set of price data
@@ -212,6 +350,9 @@ class PriceReader(__FormatReader):
             symbol (str or list): Pass the symbol or symbols that the file paths correspond to. One file path and one
              symbol can be passed as a non list but multiple can be passed as lists in both arguments. Just make sure
              that the symbol indices match on both arguments
+            start (float): Only keep prices at or after this epoch time in seconds. CSV and parquet files are read
+             in chunks so that the rows outside the window are never all held in memory
+            stop (float): Only keep prices at or before this epoch time in seconds
         """
         file_paths, symbols = self._convert_to_list(file_path, symbol)
 
@@ -229,11 +370,12 @@ class PriceReader(__FormatReader):
         super().__init__(data_type)
 
         if data_type == FileTypes.df.value:
-            self._parse_df_prices(file_paths, symbols, {'open', 'high', 'low', 'close', 'volume', 'time'})
+            self._parse_df_prices(file_paths, symbols, {'open', 'high', 'low', 'close', 'volume', 'time'}, start, stop)
         elif data_type == FileTypes.json.value:
-            self._parse_json_prices(file_paths, ('open', 'high', 'low', 'close', 'volume', 'time'))
-        elif data_type == FileTypes.csv.value:
-            self._parse_csv_prices(file_paths, symbols, {'open', 'high', 'low', 'close', 'volume', 'time'})
+            self._parse_json_prices(file_paths, ('open', 'high', 'low', 'close', 'volume', 'time'), start, stop)
+        elif data_type == FileTypes.csv.value or data_type == FileTypes.parquet.value:
+            self._parse_file_prices(file_paths, symbols, {'open', 'high', 'low', 'close', 'volume', 'time'}, start,
+                                    stop)
         else:
             raise LookupError("No parsing written for input type.")
 
@@ -249,20 +391,32 @@ class EventReader(DataReader):
 
 
 class JsonEventReader(DataReader):
-    def __parse_json_events(self, file_path):
+    def __parse_json_events(self, file_path, start, stop):
         contents = json.loads(open(file_path).read())
 
         for event_type in contents:
             self._write_dataset(contents[event_type], event_type, ('time', 'data'))
+            events = self._internal_dataset[event_type]
+            if (start is not None or stop is not None) and not events.empty:
+                self._internal_dataset[event_type] = _in_window(events, start, stop,
+                                                                _epoch_scale(events['time'].iloc[0]))
+
+    def __init__(self, file_path, start: float = None, stop: float = None):
+        """
+        Read custom events from a json file of {event_type: {'time': [...], 'data': [...]}}
 
-    def __init__(self, file_path):
+        Args:
+            file_path: The path to the json file
+            start: Only keep events at or after this epoch time in seconds
+            stop: Only keep events at or before this epoch time in seconds
+        """
         super().__init__(DataTypes.event_json)
         try:
             assert file_path[-4:] == 'json'
         except AssertionError:
             raise AssertionError(f"The filepath did not have a \'json\' ending - got: {file_path[-4:]}")
 
-        self.__parse_json_events(file_path)
+        self.__parse_json_events(file_path, start, stop)
 
 
 class FundingRateEventReader(EventReader):
@@ -273,12 +427,70 @@ class FundingRateEventReader(EventReader):
 
 
 class TickReader(__FormatReader):
-    def __init__(self, file_path: [str, list], symbol: [str, list] = None):
+    def __init__(self, file_path: [str, list], symbol: [str, list] = None, start: float = None, stop: float = None,
+                 chunk_size: int = None):
+        """
+        Read trades from csv or parquet files with at least 'time' and 'price' columns
+
+        Args:
+            file_path (str or list): A single file path or a list of file paths
+            symbol (str or list): The symbol or symbols that the file paths correspond to, matching by index
+            start (float): Only read ticks at or after this epoch time in seconds
+            stop (float): Only read ticks at or before this epoch time in seconds
+            chunk_size (int): Stream the files instead of loading them. The backtest reads this many rows at a time
+             as its clock reaches them, so files larger than memory can be used. Streamed files must already be sorted
+             by time, which is checked as they are read
+        """
         super().__init__(DataTypes.tick_csv)
         file_paths, symbols = self._convert_to_list(file_path, symbol)
 
-        try:
-            assert file_path[-3:] == 'csv'
-        except AssertionError:
-            raise AssertionError(f"The filepath did not have a \'csv\' ending - got: {file_path[-3:]}")
-        self._parse_csv_prices(file_paths, symbols, {'time', 'price'})
+        for path in file_paths:
+            try:
+                assert path[-3:] == 'csv' or path[-8:] == '.parquet'
+            except AssertionError:
+                raise AssertionError(f"The filepath did not have a \'csv\' or \'parquet\' ending - got: {path}")
+
+        self.__start = start
+        self.__stop = stop
+        self.__chunk_size = chunk_size
+        self.__files = {}
+        if chunk_size is None:
+            self._parse_file_prices(file_paths, symbols, {'time', 'price'}, start, stop)
+            return
+
+        if symbols is None or len(file_paths) != len(symbols):
+            raise LookupError("Must pass a symbol for each file path to stream ticks.")
+        for path, symbol_ in zip(file_paths, symbols):
+            columns = _file_columns(path)
+            assert {'time', 'price'}.issubset(columns), f"{{'time', 'price'}} not subset of {columns}"
+            self.__files[symbol_] = path
+
+    @property
+    def streaming(self) -> bool:
+        return self.__chunk_size is not None
+
+    @property
+    def keys(self) -> list:
+        if self.streaming:
+            return list(self.__files)
+        return super().keys
+
+    def chunks(self, key: str) -> typing.Iterable[pd.DataFrame]:
+        if self.streaming:
+            return _window_chunks(self.__files[key], self.__start, self.__stop, self.__chunk_size, presorted=True)
+        return super().chunks(key)
+
+    def time_bounds(self, key: str) -> tuple:
+        if not self.streaming:
+            return super().time_bounds(key)
+
+        # Only the time column is read to find the bounds
+        first = last = None
+        for frame in _window_chunks(self.__files[key], self.__start, self.__stop, self.__chunk_size, ['time'],
+                                    presorted=True):
+            if first is None:
+                first = frame['time'].iloc[0]
+            last = frame['time'].iloc[-1]
+        if first is None:
+            raise LookupError(f"No ticks for {key} in {self.__files[key]} inside the time window.")
+        return first, last
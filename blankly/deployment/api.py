@@ -19,6 +19,8 @@
 import json
 
 import requests
+
+from blankly.utils.sessions import PooledSession
 from blankly.utils.utils import info_print
 
 blankly_deployment_url = 'https://deploy.blankly.finance'
@@ -34,6 +36,7 @@ class API:
         else:
             self.url = blankly_deployment_url
 
+        self.session = PooledSession()
         self.token = None
         self.auth_data = self.exchange_token(token)
 
@@ -74,11 +77,11 @@ class API:
 
         try:
             if type_ == "get":
-                out = requests.get(**kwargs)
+                out = self.session.get(**kwargs)
             elif type_ == "post":
-                out = requests.post(**kwargs)
+                out = self.session.post(**kwargs)
             elif type_ == "delete":
-                out = requests.delete(**kwargs)
+                out = self.session.delete(**kwargs)
             else:
                 raise LookupError("Request type is not implemented or does not exist.")
         except requests.exceptions.ConnectionError:
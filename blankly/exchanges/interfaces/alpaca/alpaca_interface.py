@@ -16,6 +16,7 @@
     along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
+import functools
 import time
 import warnings
 from datetime import datetime as dt, timezone
@@ -25,6 +26,7 @@ import pandas as pd
 from alpaca_trade_api.rest import APIError as AlpacaAPIError, TimeFrame
 
 from blankly.exchanges.interfaces.exchange_interface import ExchangeInterface
+from blankly.exchanges.interfaces.history_download import derive_history
 from blankly.exchanges.orders.limit_order import LimitOrder
 from blankly.exchanges.orders.market_order import MarketOrder
 from blankly.exchanges.orders.stop_loss import StopLossOrder
@@ -376,15 +378,17 @@ class AlpacaInterface(ExchangeInterface):
 
             supported_multiples = [60, 3600, 86400]
             if resolution not in supported_multiples:
+                derived = derive_history(functools.partial(self.get_product_history, symbol),
+                                         epoch_start, epoch_stop, resolution, supported_multiples)
+                if derived is not None:
+                    return derived
                 utils.info_print("Granularity is not an accepted granularity...rounding to nearest valid value.")
                 resolution = supported_multiples[min(range(len(supported_multiples)),
                                                      key=lambda i: abs(supported_multiples[i] - resolution))]
 
-            found_multiple, row_divisor = super().evaluate_multiples(supported_multiples, resolution)
-
-            if found_multiple == 60:
+            if resolution == 60:
                 time_interval = TimeFrame.Minute
-            elif found_multiple == 3600:
+            elif resolution == 3600:
                 time_interval = TimeFrame.Hour
             else:
                 time_interval = TimeFrame.Day
@@ -425,7 +429,8 @@ class AlpacaInterface(ExchangeInterface):
 
             if bars.empty:
                 return pd.DataFrame(columns=['time', 'open', 'high', 'low', 'close', 'volume'])
-            return utils.get_ohlcv(bars, row_divisor, from_zero=False)
+            # Each bar is already at the requested resolution, this just moves the times out of the index
+            return utils.get_ohlcv(bars, 1, from_zero=False)
         else:
             # This runs yfinance on the symbol
             return self.parse_yfinance(symbol, epoch_start, epoch_stop, resolution)
@@ -21,9 +21,10 @@ import time
 from collections import OrderedDict
 from urllib.parse import urlencode
 
-import requests
 from requests.auth import AuthBase
 
+from blankly.utils.sessions import PooledSession
+
 # Create custom authentication for Exchange
 
 
@@ -60,7 +61,7 @@ class API:
         self.session = self._init_session()
 
     def _init_session(self):
-        session = requests.session()
+        session = PooledSession()
         session.headers.update({'Accept': 'application/json',
                                 'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) '
                                               'Chrome/56.0.2924.87 Safari/537.36',
@@ -15,7 +15,8 @@
     You should have received a copy of the GNU Lesser General Public License
     along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
-import time
+
+import functools
 
 import pandas as pd
 
@@ -23,13 +24,15 @@ import blankly.utils.exceptions as exceptions
 import blankly.utils.utils
 import blankly.utils.utils as utils
 from blankly.exchanges.interfaces.exchange_interface import ExchangeInterface
+from blankly.exchanges.interfaces.history_download import derive_history, download_history, history_windows
+from blankly.exchanges.interfaces.price_request import AsyncPriceSource, PriceRequest
 from blankly.exchanges.orders.limit_order import LimitOrder
 from blankly.exchanges.orders.market_order import MarketOrder
 from blankly.exchanges.orders.stop_loss import StopLossOrder
 from blankly.exchanges.orders.take_profit import TakeProfitOrder
 
 
-class BinanceInterface(ExchangeInterface):
+class BinanceInterface(ExchangeInterface, AsyncPriceSource):
     _asset_precision: dict
 
     def __init__(self, exchange_name, authenticated_api):
@@ -716,6 +719,10 @@ class BinanceInterface(ExchangeInterface):
         accepted_grans = [60, 180, 300, 900, 1800, 3600, 7200, 14400,
                           21600, 28800, 43200, 86400, 259200, 604800, 2592000]
         if resolution not in accepted_grans:
+            derived = derive_history(functools.partial(BinanceInterface._binance_get_product_history, calls, symbol),
+                                     epoch_start, epoch_stop, resolution, accepted_grans)
+            if derived is not None:
+                return derived
             utils.info_print("Granularity is not an accepted granularity...rounding to nearest valid value.")
             resolution = accepted_grans[min(range(len(accepted_grans)),
                                             key=lambda i: abs(accepted_grans[i] - resolution))]
@@ -738,30 +745,16 @@ class BinanceInterface(ExchangeInterface):
         }
         gran_string = lookup_dict[resolution]
 
-        # Figure out how many points are needed
-        need = int((epoch_stop - epoch_start) / resolution)
-        initial_need = need
-        window_open = epoch_start
-        history = []
-
         # Convert coin id to binance coin
         symbol = utils.to_exchange_symbol(symbol, 'binance')
-        while need > 1000:
-            # Close is always 300 points ahead
-            window_close = int(window_open + 1000 * resolution)
-            history = history + calls.get_klines(symbol=symbol, startTime=window_open * 1000,
-                                                 endTime=window_close * 1000, interval=gran_string,
-                                                 limit=1000)
-
-            window_open = window_close
-            need -= 1000
-            time.sleep(.2)
-            utils.update_progress((initial_need - need) / initial_need)
-
-        # Fill the remainder
-        history_block = history + calls.get_klines(symbol=symbol, startTime=window_open * 1000,
-                                                   endTime=epoch_stop * 1000, interval=gran_string,
-                                                   limit=1000)
+
+        def fetch(window_open, window_close):
+            return calls.get_klines(symbol=symbol, startTime=window_open * 1000, endTime=window_close * 1000,
+                                    interval=gran_string, limit=1000)
+
+        # Each window holds at most 1000 points, which costs a weight of 2
+        history_block = download_history(fetch, history_windows(epoch_start, epoch_stop, resolution, 1000),
+                                         'binance', weight=2)
 
         data_frame = pd.DataFrame(history_block, columns=['time', 'open', 'high', 'low', 'close', 'volume',
                                                           'close time', 'quote asset volume', 'number of trades',
@@ -1104,3 +1097,14 @@ class BinanceInterface(ExchangeInterface):
         symbol = utils.to_exchange_symbol(symbol, "binance")
         response = self.calls.get_symbol_ticker(symbol=symbol)
         return float(response['price'])
+
+    def price_request(self, symbol) -> PriceRequest:
+        # This is the public endpoint behind get_symbol_ticker(), including on the testnet
+        return PriceRequest(self.calls._create_api_uri('ticker/price', signed=False),
+                            {'symbol': utils.to_exchange_symbol(symbol, "binance")}, self.__parse_price)
+
+    @staticmethod
+    def __parse_price(response) -> float:
+        if 'price' not in response:
+            raise exceptions.APIException("Error: " + str(response.get('msg', response)))
+        return float(response['price'])
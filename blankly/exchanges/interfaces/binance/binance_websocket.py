@@ -22,10 +22,43 @@ import traceback
 import blankly
 import blankly.exchanges.interfaces.binance.binance_websocket_utils as websocket_utils
 from blankly.exchanges.interfaces.websocket import Websocket
+from blankly.exchanges.interfaces.websocket_multiplexer import MultiplexProtocol, MultiplexedStream
 from blankly.utils.utils import info_print
 
 
-class Tickers(Websocket):
+class CombinedStreams(MultiplexProtocol):
+    def __init__(self, url: str, max_streams: int = 200):
+        """
+        Binance combined streams, where each message is wrapped as {'stream': 'btcusdt@depth', 'data': {...}}. A
+        connection can hold 1024 streams, but fewer are used so that each connection keeps up with its messages
+        """
+        super().__init__(url, max_streams)
+        self.__request_id = 0
+
+    def __request(self, method: str, keys: list) -> list:
+        self.__request_id += 1
+        return [json.dumps({
+            'method': method,
+            'params': [f'{symbol}@{stream}' for symbol, stream in keys],
+            'id': self.__request_id
+        })]
+
+    def subscribe_messages(self, keys: list) -> list:
+        return self.__request('SUBSCRIBE', keys)
+
+    def unsubscribe_messages(self, keys: list) -> list:
+        return self.__request('UNSUBSCRIBE', keys)
+
+    def route(self, message: dict):
+        try:
+            symbol, stream = message['stream'].split('@', 1)
+        except KeyError:
+            # Replies to subscribing
+            return None
+        return (symbol, stream), message['data']
+
+
+class Tickers(Websocket, MultiplexedStream):
     def __init__(self, symbol, stream, log=None, initially_stopped=False,
                  websocket_url="wss://stream.binance.{}:9443/ws", **kwargs):
         """
@@ -63,8 +96,10 @@ class Tickers(Websocket):
         """
         Exchange specific actions to perform when receiving a message
         """
+        self.process_message(json.loads(message))
+
+    def process_message(self, message: dict):
         self.message_count += 1
-        message = json.loads(message)
         try:
             self.most_recent_time = message['E']
             self.time_feed.append(self.most_recent_time)
@@ -104,6 +139,11 @@ class Tickers(Websocket):
         })
         ws.send(request)
 
+    def multiplex_protocol(self) -> MultiplexProtocol:
+        # The combined stream endpoint sits next to the raw one
+        url = self.url[:-len('/ws')] + '/stream' if self.url.endswith('/ws') else self.url
+        return CombinedStreams(url)
+
     def restart_ticker(self):
         self.start_websocket(
             self.on_open,
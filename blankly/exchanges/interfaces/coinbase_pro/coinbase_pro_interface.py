@@ -16,13 +16,16 @@
     along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
-import time
+
+import functools
 
 import pandas as pd
 
 import blankly.utils.time_builder
 import blankly.utils.utils as utils
 from blankly.exchanges.interfaces.exchange_interface import ExchangeInterface
+from blankly.exchanges.interfaces.history_download import derive_history, download_history, history_windows
+from blankly.exchanges.interfaces.price_request import AsyncPriceSource, PriceRequest
 from blankly.exchanges.orders.limit_order import LimitOrder
 from blankly.exchanges.orders.market_order import MarketOrder
 from blankly.exchanges.orders.stop_limit import StopLimit
@@ -31,7 +34,7 @@ from blankly.exchanges.orders.take_profit import TakeProfitOrder
 from blankly.utils.exceptions import APIException, InvalidOrder
 
 
-class CoinbaseProInterface(ExchangeInterface):
+class CoinbaseProInterface(ExchangeInterface, AsyncPriceSource):
     def __init__(self, exchange_name, authenticated_api):
         super().__init__(exchange_name, authenticated_api, valid_resolutions=[60, 300, 900, 3600, 21600, 86400])
 
@@ -511,40 +514,26 @@ class CoinbaseProInterface(ExchangeInterface):
 
         accepted_grans = [60, 300, 900, 3600, 21600, 86400]
         if resolution not in accepted_grans:
+            derived = derive_history(functools.partial(self.get_product_history, symbol),
+                                     epoch_start, epoch_stop, resolution, accepted_grans)
+            if derived is not None:
+                return derived
             utils.info_print("Granularity is not an accepted granularity...rounding to nearest valid value.")
             resolution = accepted_grans[min(range(len(accepted_grans)),
                                             key=lambda i: abs(accepted_grans[i] - resolution))]
 
         resolution = int(resolution)
 
-        # Figure out how many points are needed
-        need = int((epoch_stop - epoch_start) / resolution)
-        initial_need = need
-        window_open = epoch_start
-        history = []
-        # Iterate while its more than max
-        while need > 300:
-            # Close is always 300 points ahead
-            window_close = window_open + 300 * resolution
-            open_iso = utils.iso8601_from_epoch(window_open)
-            close_iso = utils.iso8601_from_epoch(window_close)
-            response = self.calls.get_product_historic_rates(symbol, open_iso, close_iso, resolution)
+        def fetch(window_open, window_close):
+            response = self.calls.get_product_historic_rates(symbol, utils.iso8601_from_epoch(window_open),
+                                                             utils.iso8601_from_epoch(window_close), resolution)
             if isinstance(response, dict):
                 raise APIException(response['message'])
-            history = history + response
-
-            window_open = window_close
-            need -= 300
-            time.sleep(.2)
-            utils.update_progress((initial_need - need) / initial_need)
-
-        # Fill the remainder
-        open_iso = utils.iso8601_from_epoch(window_open)
-        close_iso = utils.iso8601_from_epoch(epoch_stop)
-        response = self.calls.get_product_historic_rates(symbol, open_iso, close_iso, resolution)
-        if isinstance(response, dict):
-            raise APIException(response['message'])
-        history_block = history + response
+            return response
+
+        # Each window holds at most 300 points
+        history_block = download_history(fetch, history_windows(epoch_start, epoch_stop, resolution, 300),
+                                         'coinbase_pro')
         history_block.sort(key=lambda x: x[0])
 
         df = pd.DataFrame(history_block, columns=['time', 'low', 'high', 'open', 'close', 'volume'])
@@ -655,7 +644,13 @@ class CoinbaseProInterface(ExchangeInterface):
             'volume': '31137.51184419'
         }
         """
-        response = self.calls.get_product_ticker(symbol)
+        return self.__parse_price(self.calls.get_product_ticker(symbol))
+
+    def price_request(self, symbol) -> PriceRequest:
+        return PriceRequest(self.calls.product_ticker_url(symbol), None, self.__parse_price)
+
+    @staticmethod
+    def __parse_price(response) -> float:
         if 'message' in response:
             raise APIException("Error: " + response['message'])
         return float(response['price'])
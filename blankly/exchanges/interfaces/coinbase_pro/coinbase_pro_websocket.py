@@ -23,6 +23,7 @@ import traceback
 import blankly
 import blankly.exchanges.interfaces.coinbase_pro.coinbase_pro_websocket_utils as websocket_utils
 from blankly.exchanges.interfaces.websocket import Websocket
+from blankly.exchanges.interfaces.websocket_multiplexer import MultiplexProtocol, MultiplexedStream
 from blankly.utils.utils import info_print
 
 
@@ -50,7 +51,52 @@ def create_ticker_connection(id, url, channel):
 # ]
 
 
-class Tickers(Websocket):
+class ProductChannels(MultiplexProtocol):
+    # The channel that each message type comes from
+    CHANNELS = {
+        'ticker': 'ticker',
+        'snapshot': 'level2',
+        'l2update': 'level2',
+        'match': 'matches',
+        'last_match': 'matches',
+        'heartbeat': 'heartbeat',
+        'status': 'status'
+    }
+
+    def __init__(self, url: str, max_streams: int = 100):
+        """
+        Coinbase Pro subscriptions, where one message can subscribe many product ids to a channel
+        """
+        super().__init__(url, max_streams)
+
+    @staticmethod
+    def __requests(type_: str, keys: list) -> list:
+        channels = {}
+        for symbol, stream in keys:
+            channels.setdefault(stream, []).append(symbol)
+        return [json.dumps({
+            'type': type_,
+            'product_ids': product_ids,
+            'channels': [channel]
+        }) for channel, product_ids in channels.items()]
+
+    def subscribe_messages(self, keys: list) -> list:
+        return self.__requests('subscribe', keys)
+
+    def unsubscribe_messages(self, keys: list) -> list:
+        return self.__requests('unsubscribe', keys)
+
+    def route(self, message: dict):
+        try:
+            return (message['product_id'], self.CHANNELS[message['type']]), message
+        except KeyError:
+            # Subscription lists and errors aren't for a single product
+            if message.get('type') == 'error':
+                info_print(message)
+            return None
+
+
+class Tickers(Websocket, MultiplexedStream):
     def __init__(self, symbol, stream, log=None,
                  pre_event_callback=None, initially_stopped=False, websocket_url="wss://ws-feed.pro.coinbase.com",
                  **kwargs):
@@ -145,9 +191,9 @@ class Tickers(Websocket):
                     self.response = self.ws.recv()
 
     def on_message(self, ws, message):
-        received_string = message
-        received = json.loads(received_string)
+        self.process_message(json.loads(message))
 
+    def process_message(self, received: dict):
         if received['type'] == 'subscriptions':
             info_print(f"Subscribed to {received['channels']}")
             return
@@ -199,6 +245,9 @@ class Tickers(Websocket):
         })
         ws.send(request)
 
+    def multiplex_protocol(self) -> MultiplexProtocol:
+        return ProductChannels(self.url)
+
     def restart_ticker(self):
         """
         This is the only abstract function that should be placed individually
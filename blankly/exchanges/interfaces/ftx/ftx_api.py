@@ -20,6 +20,7 @@
 import requests
 from typing import Optional, Dict, Any, List
 import urllib.parse
+from blankly.utils.sessions import PooledSession
 from blankly.utils.utils import epoch_from_iso8601
 import time
 import hmac
@@ -31,7 +32,7 @@ class FTXAPI:
     # no option to instantiate with sandbox mode, unlike every other exchange
     def __init__(self, api_key, api_secret, tld: str = 'us', _subaccount_name=None):
 
-        self._ftx_session = requests.Session()
+        self._ftx_session = PooledSession()
         self._api_url = self.API_URL.format(tld)
         self._api_key = api_key
         self._api_secret = api_secret
@@ -16,12 +16,14 @@
     along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
+import functools
+
 import pandas as pd
-import time
 from blankly.exchanges.interfaces.exchange_interface import ExchangeInterface
 from blankly.exchanges.orders.market_order import MarketOrder
 from blankly.exchanges.orders.limit_order import LimitOrder
 from blankly.exchanges.interfaces.ftx.ftx_api import FTXAPI
+from blankly.exchanges.interfaces.history_download import derive_history, download_history, history_windows
 import blankly.utils.utils as utils
 import copy
 from typing import List
@@ -496,33 +498,19 @@ class FTXInterface(ExchangeInterface):
             accepted_grans.append(i * 86400)
 
         if resolution not in accepted_grans:
+            derived = derive_history(functools.partial(FTXInterface.ftx_product_history, api, symbol),
+                                     epoch_start, epoch_stop, resolution, accepted_grans)
+            if derived is not None:
+                return derived
             utils.info_print("Granularity is not an accepted granularity...rounding to nearest valid value.")
             resolution = accepted_grans[min(range(len(accepted_grans)),
                                             key=lambda j: abs(accepted_grans[j] - resolution))]
 
-        # Figure out how many points are needed
-        need = int((epoch_stop - epoch_start) / resolution)
-        initial_need = need
-        window_open = epoch_start
-        history = []
-        # Iterate while it's more than max
-        while need > 1500:
-            # Close is always 1500 points ahead
-            window_close = window_open + 1500 * resolution
-
-            response = api.get_product_history(symbol, window_open, window_close, resolution)
-
-            history = history + response
-
-            window_open = window_close
-            need -= 1500
-            time.sleep(.2)
-            utils.update_progress((initial_need - need) / initial_need)
-
-        # Fill the remainder
-        window_close = epoch_stop
-        response = api.get_product_history(symbol, window_open, window_close, resolution)
-        history_block = history + response
+        def fetch(window_open, window_close):
+            return api.get_product_history(symbol, window_open, window_close, resolution)
+
+        # Each window holds at most 1500 points
+        history_block = download_history(fetch, history_windows(epoch_start, epoch_stop, resolution, 1500), 'ftx')
         # print(history_block)
         history_block.sort(key=lambda x: x["time"])
 
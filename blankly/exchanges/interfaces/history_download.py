@@ -0,0 +1,189 @@
+"""
+    Shared engine for paginated historical candle downloads
+    Copyright (C) 2021  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import math
+import threading
+import time
+import typing
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from blankly.utils import utils
+
+# Pages fetched at the same time for a single history download
+DEFAULT_WORKERS = 4
+
+
+class RateLimiter:
+    def __init__(self, rate: float, capacity: float):
+        """
+        Thread safe token bucket
+
+        Args:
+            rate: Tokens (request weight) refilled per second
+            capacity: Maximum tokens that can be spent in a burst
+        """
+        self.rate = rate
+        self.capacity = capacity
+
+        self.__tokens = capacity
+        self.__last = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def acquire(self, weight: float = 1) -> None:
+        """
+        Block until the bucket holds enough tokens for a request of this weight, then spend them
+        """
+        while True:
+            with self.__lock:
+                now = time.monotonic()
+                self.__tokens = min(self.capacity, self.__tokens + (now - self.__last) * self.rate)
+                self.__last = now
+
+                if self.__tokens >= weight:
+                    self.__tokens -= weight
+                    return
+                wait = (weight - self.__tokens) / self.rate
+            time.sleep(wait)
+
+
+# Public market data limits of each venue as (weight per second, burst weight)
+rate_limits = {
+    'coinbase_pro': (10, 15),  # 10 requests per second, bursts of 15
+    'binance': (20, 60),  # 1200 weight per minute
+    'ftx': (30, 30),  # 30 requests per second
+    'kucoin': (66, 198),  # 2000 weight per 30 seconds
+    'okx': (10, 20),  # 20 requests per 2 seconds
+    'oanda': (100, 200)  # 100 requests per second
+}
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(exchange: str) -> RateLimiter:
+    """
+    Find the rate limiter shared by every download from an exchange. Exchanges without a known limit get a
+    conservative default
+    """
+    with _rate_limiters_lock:
+        if exchange not in _rate_limiters:
+            _rate_limiters[exchange] = RateLimiter(*rate_limits.get(exchange, (5, 5)))
+        return _rate_limiters[exchange]
+
+
+def history_windows(epoch_start, epoch_stop, resolution, page_size: int) -> list:
+    """
+    Split a time range into windows that each hold at most page_size candles
+
+    Args:
+        epoch_start: Time to begin download
+        epoch_stop: Time to stop download
+        resolution: Resolution in seconds between each candle
+        page_size: The most candles the exchange returns for one request
+    Returns:
+        A list of (window_open, window_close) tuples
+    """
+    windows = []
+    need = int((epoch_stop - epoch_start) / resolution)
+    window_open = epoch_start
+    while need > page_size:
+        window_close = window_open + page_size * resolution
+        windows.append((window_open, window_close))
+        window_open = window_close
+        need -= page_size
+
+    # Fill the remainder
+    windows.append((window_open, epoch_stop))
+    return windows
+
+
+def download_history(fetch: typing.Callable[[typing.Any, typing.Any], list], windows: list, exchange: str,
+                     weight: float = 1, workers: int = DEFAULT_WORKERS) -> list:
+    """
+    Fetch every window of a history download concurrently while respecting the exchange rate limit
+
+    Args:
+        fetch: Function taking (window_open, window_close) and returning the list of rows for that window
+        windows: The windows to download, such as the output of history_windows()
+        exchange: The exchange type, used to find the rate limiter
+        weight: The weight of a single request against the exchange limit
+        workers: The number of windows to download at the same time
+    Returns:
+        The rows of every window, concatenated in window order
+    """
+    limiter = get_rate_limiter(exchange)
+
+    def fetch_window(window):
+        limiter.acquire(weight)
+        return fetch(*window)
+
+    if len(windows) == 1:
+        return list(fetch_window(windows[0]))
+
+    pages = [None] * len(windows)
+    executor = ThreadPoolExecutor(max_workers=min(workers, len(windows)))
+    try:
+        futures = {executor.submit(fetch_window, window): index for index, window in enumerate(windows)}
+        for completed, future in enumerate(as_completed(futures), 1):
+            pages[futures[future]] = future.result()
+            utils.update_progress(completed / len(windows))
+    finally:
+        # Don't keep downloading after a page has failed
+        executor.shutdown(cancel_futures=True)
+
+    history = []
+    for page in pages:
+        history.extend(page)
+    return history
+
+
+def derive_history(fetch: typing.Callable[[float, float, int], typing.Any], epoch_start, epoch_stop, resolution,
+                   accepted_grans: list):
+    """
+    Build candles at a resolution the exchange doesn't serve by aggregating the coarsest accepted resolution that
+    divides it evenly
+
+    Args:
+        fetch: Function taking (epoch_start, epoch_stop, resolution) at an accepted resolution and returning the
+            candles as a dataframe, usually the interface's own get_product_history()
+        epoch_start: Time to begin download
+        epoch_stop: Time to stop download
+        resolution: The requested resolution in seconds
+        accepted_grans: The resolutions the exchange serves
+    Returns:
+        The aggregated dataframe, or None if no accepted resolution divides the requested one
+    """
+    dividing = [gran for gran in accepted_grans if gran < resolution and resolution % gran == 0]
+    if not dividing:
+        return None
+    native = max(dividing)
+
+    # Only download the candles inside whole bins
+    bin_start = math.ceil(epoch_start / resolution) * resolution
+    bin_stop = math.floor(epoch_stop / resolution) * resolution + resolution - native
+    if bin_stop < bin_start:
+        return pd.DataFrame(columns=utils.OHLCV_COLUMNS)
+    candles = fetch(bin_start, bin_stop, native)
+    if len(candles) == 0:
+        return pd.DataFrame(columns=utils.OHLCV_COLUMNS)
+
+    # Candles such as daily stock bars may open at an offset from the epoch grid
+    origin = int(candles['time'].iloc[0]) % native
+    return utils.aggregate_ohlcv(candles, resolution, origin)
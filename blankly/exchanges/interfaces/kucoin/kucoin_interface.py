@@ -16,13 +16,15 @@
     along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
-import time
+
+import functools
 
 import pandas as pd
 
 import blankly.utils.time_builder
 import blankly.utils.utils as utils
 from blankly.exchanges.interfaces.exchange_interface import ExchangeInterface
+from blankly.exchanges.interfaces.history_download import derive_history, download_history, history_windows
 from blankly.exchanges.orders.limit_order import LimitOrder
 from blankly.exchanges.orders.market_order import MarketOrder
 from blankly.exchanges.orders.stop_loss import StopLossOrder
@@ -450,6 +452,10 @@ class KucoinInterface(ExchangeInterface):
         accepted_grans = [60, 180, 300, 900, 1800, 3600, 7200, 14400, 21600, 28800, 43200, 86400, 604800]
 
         if resolution not in accepted_grans:
+            derived = derive_history(functools.partial(self.get_product_history, symbol),
+                                     epoch_start, epoch_stop, resolution, accepted_grans)
+            if derived is not None:
+                return derived
             utils.info_print("Granularity is not an accepted granularity...rounding to nearest valid value.")
             resolution = accepted_grans[min(range(len(accepted_grans)),
                                             key=lambda i: abs(accepted_grans[i] - resolution))]
@@ -475,35 +481,16 @@ class KucoinInterface(ExchangeInterface):
         }
         gran_string = lookup_dict[resolution]
 
-        # Figure out how many points are needed
-        need = int((epoch_stop - epoch_start) / resolution)
-        initial_need = need
-        window_open = epoch_start
-        history = []
-
-        while need > 1500:
-            # Close is always 300 points ahead
-            window_close = int(window_open + 1500 * resolution)
-            response = self._market.get_kline(symbol, gran_string,
-                                              startAt=window_open, endAt=window_close)
-            response = self.__correct_api_call(response)
+        def fetch(window_open, window_close):
+            response = self.__correct_api_call(self._market.get_kline(symbol, gran_string,
+                                                                      startAt=window_open, endAt=window_close))
             if isinstance(response, dict):
                 raise APIException(response['msg'])
-            history = history + response
-
-            window_open = window_close
-            need -= 1500
-            time.sleep(1)
-            utils.update_progress((initial_need - need) / initial_need)
-
-        # Fill the remainder
-        response = self._market.get_kline(symbol, gran_string,
-                                          startAt=window_open, endAt=epoch_stop)
-        response = self.__correct_api_call(response)
-        if isinstance(response, dict):
-            raise APIException(response['msg'])
+            return response
 
-        history = history + response
+        # Each window holds at most 1500 points, which costs a weight of 3
+        history = download_history(fetch, history_windows(epoch_start, epoch_stop, resolution, 1500), 'kucoin',
+                                   weight=3)
         history.sort(key=lambda x: x[0])
 
         df = pd.DataFrame(history, columns=['time', 'open', 'close', 'high', 'low', 'volume', 'turnover'])
@@ -19,10 +19,10 @@
 
 import json
 
-import requests
 from collections import OrderedDict
 
 from blankly.utils.exceptions import APIException
+from blankly.utils.sessions import PooledSession
 
 
 def api_error_handler(func):
@@ -51,7 +51,7 @@ class OandaAPI:
         self.session = self._init_session()
 
     def _init_session(self):
-        session = requests.session()
+        session = PooledSession()
         session.headers.update({"Content-Type": "application/json",
                                 "Accept-Datetime-Format": "UNIX",
                                 'Authorization': 'Bearer {}'.format(self.__api_key)})
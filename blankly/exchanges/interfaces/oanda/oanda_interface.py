@@ -16,6 +16,7 @@
     along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
+import functools
 import time
 from datetime import datetime as dt
 from typing import Union
@@ -23,6 +24,7 @@ from typing import Union
 import pandas as pd
 
 from blankly.exchanges.interfaces.exchange_interface import ExchangeInterface
+from blankly.exchanges.interfaces.history_download import derive_history, download_history
 from blankly.exchanges.interfaces.oanda.oanda_api import OandaAPI
 from blankly.exchanges.orders.limit_order import LimitOrder
 from blankly.exchanges.orders.market_order import MarketOrder
@@ -335,10 +337,10 @@ class OandaInterface(ExchangeInterface):
         }
 
     def overridden_history(self, symbol, epoch_start, epoch_stop, resolution, **kwargs) -> pd.DataFrame:
-        resolution = self.multiples_keys[min(range(len(self.multiples_keys)),
-                                             key=lambda i: abs(self.multiples_keys[i] - resolution))]
         symbol = self.__convert_blankly_to_oanda(symbol)
         if kwargs['to'] is not None:
+            resolution = self.multiples_keys[min(range(len(self.multiples_keys)),
+                                                 key=lambda i: abs(self.multiples_keys[i] - resolution))]
             to = kwargs['to']
 
             frames = []
@@ -364,25 +366,29 @@ class OandaInterface(ExchangeInterface):
         resolution = int(time_builder.time_interval_to_seconds(resolution))
 
         if resolution not in self.multiples_keys:
+            derived = derive_history(functools.partial(self.get_product_history, symbol),
+                                     epoch_start, epoch_stop, resolution, self.multiples_keys)
+            if derived is not None:
+                return derived
             utils.info_print("Granularity is not an accepted granularity...rounding to nearest valid value.")
             resolution = self.multiples_keys[min(range(len(self.multiples_keys)),
                                                  key=lambda i: abs(self.multiples_keys[i] - resolution))]
 
-        # Grab an entire window
-        candles = []
+        # Grab entire windows, walking back from the end
+        windows = []
         window_start = epoch_stop - (resolution * self.max_candles)
         window_end = epoch_stop
-        ran_once = False
-        while window_start > epoch_start or not ran_once:
-            candles.append(self.calls.get_candles_by_startend(symbol,
-                                                              self.supported_multiples[resolution],
-                                                              window_start,
-                                                              window_end))
+        while window_start > epoch_start or not windows:
+            windows.append((window_start, window_end))
 
             window_start = window_start - (resolution * self.max_candles)
             window_end = window_end - (resolution * self.max_candles)
 
-            ran_once = True
+        def fetch(window_start_, window_end_):
+            return [self.calls.get_candles_by_startend(symbol, self.supported_multiples[resolution],
+                                                       window_start_, window_end_)]
+
+        candles = download_history(fetch, windows, 'oanda')
 
         df = self.format_oanda_df(candles, sort=True)
         return df[df['time'] >= epoch_start].reset_index(drop=True)
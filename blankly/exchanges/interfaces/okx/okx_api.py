@@ -1,10 +1,11 @@
-import requests
 import hmac
 import base64
 import datetime
 # import time
 import json
 
+from blankly.utils.sessions import shared_session
+
 CONTENT_TYPE = 'Content-Type'
 OK_ACCESS_KEY = 'OK-ACCESS-KEY'
 OK_ACCESS_SIGN = 'OK-ACCESS-SIGN'
@@ -268,6 +269,8 @@ class Client(object):
         self._sandbox = sandbox
 
         self.api_url = 'https://www.okx.com'
+        # Every client shares the same connections because the headers are set on each request
+        self.session = shared_session()
 
     def _request(self, method, request_path, params):
 
@@ -293,9 +296,9 @@ class Client(object):
         response = None
 
         if method == GET:
-            response = requests.get(url, headers=header)
+            response = self.session.get(url, headers=header)
         elif method == POST:
-            response = requests.post(url, data=body, headers=header)
+            response = self.session.post(url, data=body, headers=header)
 
         if not str(response.status_code).startswith('2'):
             raise OkxAPIException(response)
@@ -310,7 +313,7 @@ class Client(object):
 
     def _get_timestamp(self):
         url = self.api_url + SERVER_TIMESTAMP_URL
-        response = requests.get(url)
+        response = self.session.get(url)
         if response.status_code == 200:
             return response.json()['ts']
         else:
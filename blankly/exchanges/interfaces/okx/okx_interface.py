@@ -1,8 +1,10 @@
+import functools
 import time
 import pandas as pd
 import blankly.utils.time_builder
 import blankly.utils.utils as utils
 from blankly.exchanges.interfaces.exchange_interface import ExchangeInterface
+from blankly.exchanges.interfaces.history_download import derive_history, download_history
 from blankly.exchanges.interfaces.okx.okx_api import MarketAPI, AccountAPI, TradeAPI, ConvertAPI, FundingAPI, PublicAPI
 from blankly.exchanges.orders.limit_order import LimitOrder
 from blankly.exchanges.orders.market_order import MarketOrder
@@ -321,6 +323,10 @@ class OkxInterface(ExchangeInterface):
                           15778476, 31556952]
 
         if resolution not in accepted_grans:
+            derived = derive_history(functools.partial(self.get_product_history, symbol),
+                                     epoch_start, epoch_stop, resolution, accepted_grans)
+            if derived is not None:
+                return derived
             utils.info_print("Granularity is not an accepted granularity...rounding to nearest valid value.")
             resolution = accepted_grans[min(range(len(accepted_grans)),
                                             key=lambda i: abs(accepted_grans[i] - resolution))]
@@ -348,14 +354,17 @@ class OkxInterface(ExchangeInterface):
 
         gran_string = lookup_dict[resolution]
 
-        history = []
+        # Each request returns the 100 points before the "after" timestamp
+        windows = []
         while init_epoch_start < init_epoch_stop + resolution * 100 * 1100:
-            response = self._market.get_history_candlesticks(symbol, after=init_epoch_start, bar=gran_string, limit=100)
-
-            if len(response['data']) != 0:
-                history = history + response['data']
+            windows.append((init_epoch_start, None))
             init_epoch_start = init_epoch_start + (100 * 1000 * resolution)
 
+        def fetch(after, _):
+            return self._market.get_history_candlesticks(symbol, after=after, bar=gran_string, limit=100)['data']
+
+        history = download_history(fetch, windows, 'okx')
+
         history.sort(key=lambda x: x[0])
         new_history = list(set(tuple(sub) for sub in history))
         new_history.sort(key=lambda x: x[0])
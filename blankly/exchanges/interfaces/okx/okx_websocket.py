@@ -21,10 +21,47 @@ import traceback
 
 import blankly.exchanges.interfaces.okx.okx_websocket_utils as websocket_utils
 from blankly.exchanges.interfaces.websocket import Websocket
+from blankly.exchanges.interfaces.websocket_multiplexer import MultiplexProtocol, MultiplexedStream
 from blankly.utils.utils import info_print
 
 
-class Tickers(Websocket):
+class ChannelArgs(MultiplexProtocol):
+    def __init__(self, url: str, max_streams: int = 100):
+        """
+        OKX subscriptions, where one message can hold many channel and instrument arguments
+        """
+        super().__init__(url, max_streams)
+
+    @staticmethod
+    def __request(op: str, keys: list) -> list:
+        return [json.dumps({
+            'op': op,
+            'args': [{
+                'channel': stream,
+                'instId': symbol
+            } for symbol, stream in keys]
+        })]
+
+    def subscribe_messages(self, keys: list) -> list:
+        return self.__request('subscribe', keys)
+
+    def unsubscribe_messages(self, keys: list) -> list:
+        return self.__request('unsubscribe', keys)
+
+    def route(self, message: dict):
+        if message.get('event') == 'error':
+            info_print(message)
+            return None
+        if message.get('event') == 'unsubscribe':
+            return None
+        try:
+            # Subscription replies are passed along too because each stream reads its own
+            return (message['arg']['instId'], message['arg']['channel']), message
+        except KeyError:
+            return None
+
+
+class Tickers(Websocket, MultiplexedStream):
     def __init__(self, symbol, stream, log=None,
                  pre_event_callback=None, initially_stopped=False, websocket_url="wss://ws.okx.com:8443/ws/v5/public",
                  **kwargs):
@@ -57,7 +94,9 @@ class Tickers(Websocket):
         self.ws.run_forever()
 
     def on_message(self, ws, message):
-        received_dict = json.loads(message)
+        self.process_message(json.loads(message))
+
+    def process_message(self, received_dict: dict):
         if len(received_dict) == 2 and self.checked is not True:
             info_print(f"Subscribed to {received_dict['arg']['channel']}")
             self.checked = True
@@ -112,6 +151,9 @@ class Tickers(Websocket):
         })
         ws.send(request)
 
+    def multiplex_protocol(self) -> MultiplexProtocol:
+        return ChannelArgs(self.url)
+
     def restart_ticker(self):
         self.start_websocket(
             self.on_open,
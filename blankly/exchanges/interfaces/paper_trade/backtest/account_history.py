@@ -0,0 +1,65 @@
+"""
+    Columnar storage for the account values recorded during a backtest
+    Copyright (C) 2021  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class AccountHistory:
+    def __init__(self, capacity: int = 1024):
+        """
+        Rows of account values written straight into preallocated arrays, which double in size when they fill
+
+        Args:
+            capacity: The number of rows to allocate up front
+        """
+        self.__capacity = capacity
+        self.__length = 0
+        self.__columns = {}
+        # The columns filled by each appended row, in order
+        self.__row_names = []
+        self.__row = []
+
+    def __len__(self):
+        return self.__length
+
+    def set_columns(self, columns: list):
+        """
+        Choose the columns that the following rows fill. Columns that are new are NaN in every earlier row
+        """
+        for name in columns:
+            if name not in self.__columns:
+                self.__columns[name] = np.full(self.__capacity, np.nan)
+        self.__row_names = list(columns)
+        self.__row = [self.__columns[name] for name in columns]
+
+    def append(self, row: list):
+        if self.__length == self.__capacity:
+            self.__capacity *= 2
+            for name, values in self.__columns.items():
+                grown = np.full(self.__capacity, np.nan)
+                grown[:self.__length] = values
+                self.__columns[name] = grown
+            self.__row = [self.__columns[name] for name in self.__row_names]
+
+        for values, value in zip(self.__row, row):
+            values[self.__length] = value
+        self.__length += 1
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({name: values[:self.__length] for name, values in self.__columns.items()})
@@ -0,0 +1,107 @@
+"""
+    Time ordered streams of the custom and tick events in a backtest
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import heapq
+import typing
+
+import numpy as np
+import pandas as pd
+
+# Times are converted to python numbers a block at a time rather than all at once
+_TIME_BLOCK = 4096
+
+
+def _native(value):
+    # Give back the same python types that a record of the dataframe would have
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class EventChunk:
+    def __init__(self, type_: str, frame: pd.DataFrame, row_data: bool):
+        """
+        A block of events from one source stored as columns sorted by time
+
+        Args:
+            type_: The type given to every event in the chunk
+            frame: A dataframe with a 'time' column. The rows are sorted (stably) if they aren't already
+            row_data: Use the entire row as the data of each event. Otherwise the 'data' column is used
+        """
+        if not frame['time'].is_monotonic_increasing:
+            frame = frame.sort_values('time', kind='stable')
+
+        self.type = type_
+        self.times = frame['time'].to_numpy()
+        if row_data:
+            self.__columns = [(name, frame[name].to_numpy()) for name in frame.columns]
+            self.__data = None
+        else:
+            self.__columns = None
+            self.__data = frame['data'].to_numpy()
+
+    def __len__(self):
+        return len(self.times)
+
+    def data(self, row: int):
+        """
+        Build the data for a single event. This is only done when the event is dispatched
+        """
+        if self.__data is not None:
+            return _native(self.__data[row])
+        return {name: _native(values[row]) for name, values in self.__columns}
+
+
+class EventSource:
+    def __init__(self, type_: str, chunks: typing.Iterable[pd.DataFrame], row_data: bool = False):
+        """
+        All the events of one type, such as one custom event type or the ticks of one symbol
+
+        Args:
+            type_: The type given to every event
+            chunks: The events as dataframes with a 'time' column. Each one is read when the merge reaches it, and
+                the chunks must follow each other in time
+            row_data: Use the entire row as the data of each event. Otherwise the 'data' column is used
+        """
+        self.type = type_
+        self.__chunks = chunks
+        self.__row_data = row_data
+
+    def keys(self, rank: int) -> typing.Iterator[tuple]:
+        """
+        Yield (time, rank, row, chunk, index) for every event in time order. The rank orders sources that share a
+        time and the row orders the events inside the source, so the chunks themselves are never compared
+        """
+        offset = 0
+        for frame in self.__chunks:
+            chunk = EventChunk(self.type, frame, self.__row_data)
+            times = chunk.times
+            for start in range(0, len(times), _TIME_BLOCK):
+                for index, time in enumerate(times[start:start + _TIME_BLOCK].tolist(), start):
+                    yield time, rank, offset + index, chunk, index
+            offset += len(times)
+
+
+def merge_events(sources: typing.List[EventSource]) -> typing.Iterator[tuple]:
+    """
+    Lazily merge the sources into a single stream ordered by time. Events at the same time keep the order of their
+    sources, matching a stable sort of every event
+
+    Yields:
+        (time, type, chunk, index) where chunk.data(index) builds the data of the event
+    """
+    for time, _, _, chunk, index in heapq.merge(*[source.keys(rank) for rank, source in enumerate(sources)]):
+        yield time, chunk.type, chunk, index
@@ -16,58 +16,32 @@
     along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
+import typing
 import uuid
 
+import numpy as np
+import pandas as pd
 
-def __dict_from_df_dict(dict_of_df: dict) -> dict:
-    """
-    This creates a serializable dictionary from a dictionary with pandas df:
-    {
-        'AAPL': df.DataFrame
-        'MSFT': df.DataFrame
-    }
-    ->
-    {
-        'AAPL': df.DataFrame.to_dict()
-        'MSFT': df.DataFrame.to_dict()
-    }
-    The function does not check for nested dataframes
 
-    :arg dict_of_df: A dictionary with dataframes as values of the internal keys
-    :return: dict
+def __compress_dict_series(values_column: pd.Series, time_column: pd.Series) -> typing.Tuple[list, list]:
     """
-    output_dict = {}
-    for i in list(dict_of_df.keys()):
-        output_dict[i] = dict_of_df[i].to_dict()
-
-    return output_dict
+    Remove duplicate times from the account value or anything that is associated with a time series. A repeated time
+    keeps the position of its first row and the value of its last row
 
-
-def __compress_dict_series(values_column: dict, time_dictionary: dict):
+    :param values_column: A series of any sort of value
+    :param time_column: A series of the times that correspond to the same rows in the values column
+    :return: The compressed times and values as lists
     """
-    Remove duplicate keys from the account value or anything that is associated with a time series
+    times = time_column.infer_objects().to_numpy()
+    values = values_column.infer_objects().to_numpy()
 
-    :param values_column: A dictionary with index as key and any sort of value
-    :param time_dictionary: A dictionary with index also as key but a time that corresponds to the same index in the
-        values column
-    :return: None
-    """
-    values_keys = list(values_column.keys())
-    time_keys = list(time_dictionary.keys())
+    unique_times, first_rows = np.unique(times, return_index=True)
+    # The first row of each time in the reversed column is its last row
+    _, last_rows = np.unique(times[::-1], return_index=True)
+    last_rows = len(times) - 1 - last_rows
 
-    # Check to see if the dictionaries are longer than 0
-    if len(values_keys) == 0:
-        return {}
-
-    last_value = values_column[values_keys[0]]
-    output_dict = {
-        time_dictionary[time_keys[0]]: last_value
-    }
-    for i in range(len(values_column)):
-        # This used to compress by saving the last value, but now it does not
-        output_dict[time_dictionary[time_keys[i]]] = values_column[values_keys[i]]
-
-    return output_dict
+    order = np.argsort(first_rows, kind='stable')
+    return unique_times[order].tolist(), values[last_rows[order]].tolist()
 
 
 def __parse_backtest_trades(trades: list, limit_executed: list, limit_canceled: list, market_executed: list):
@@ -80,31 +54,27 @@ def __parse_backtest_trades(trades: list, limit_executed: list, limit_canceled:
     :param market_executed: The list of executed market orders
     :return: None
     """
+    # Index everything by order id. These are reversed so that the first record of an id is the one kept
+    executed_times = {j['id']: j['executed_time'] for j in reversed(limit_executed)}
+    canceled_times = {j['id']: j['canceled_time'] for j in reversed(limit_canceled)}
+    executed_prices = {j['id']: j['executed_price'] for j in reversed(market_executed)}
 
     # Now just parse if there should be an executed time or a canceled time
-    for i in range(len(trades)):
+    for trade in trades:
         try:
-            trades[i]['time'] = trades[i].pop('created_at')
+            trade['time'] = trade.pop('created_at')
         except KeyError:
             pass
-        if trades[i]['type'] == 'limit':
-            # TODO this wastes a few CPU cycles at the moment so it could be cleaned up
-            for j in limit_executed:
-                if trades[i]['id'] == j['id']:
-                    trades[i]['executed_time'] = j['executed_time']
-                    break
-
-            for j in limit_canceled:
-                if trades[i]['id'] == j['id']:
-                    trades[i]['canceled_time'] = j['canceled_time']
-                    break
-        elif trades[i]['type'] == 'market':
+        if trade['type'] == 'limit':
+            if trade['id'] in executed_times:
+                trade['executed_time'] = executed_times[trade['id']]
+            if trade['id'] in canceled_times:
+                trade['canceled_time'] = canceled_times[trade['id']]
+        elif trade['type'] == 'market':
             # This adds in the execution price for the market orders
-            trades[i]['type'] = 'spot-market'
-            for j in market_executed:
-                if trades[i]['id'] == j['id']:
-                    trades[i]['price'] = j['executed_price']
-                    break
+            trade['type'] = 'spot-market'
+            if trade['id'] in executed_prices:
+                trade['price'] = executed_prices[trade['id']]
 
     return trades
 
@@ -117,6 +87,32 @@ def format_metric(metrics: dict, display_name, type_: str):
     }
 
 
+def format_metrics(metrics: dict) -> dict:
+    """
+    Change the metrics keys to be nicer
+
+    Args:
+        metrics: The metrics dictionary calculated at the end of the backtest
+    """
+    return {
+        'calmar': format_metric(metrics, 'Calmar Ratio', 'number'),
+        'cagr': format_metric(metrics, 'Compound Annual Growth Rate (%)', 'number'),
+        'cavr': format_metric(metrics, 'Conditional Value-at-Risk', 'number'),
+
+        'cum_returns': format_metric(metrics, 'Cumulative Returns (%)', 'number'),
+        'max_drawdown': format_metric(metrics, 'Max Drawdown (%)', 'number'),
+        'resampled_time': format_metric(metrics, 'Resampled Time', 'number'),
+
+        'risk_free_rate': format_metric(metrics, 'Risk Free Return Rate', 'number'),
+        'sharpe': format_metric(metrics, 'Sharpe Ratio', 'number'),
+        'sortino': format_metric(metrics, 'Sortino Ratio', 'number'),
+
+        'value_at_risk': format_metric(metrics, 'Value-at-Risk', 'number'),
+        'variance': format_metric(metrics, 'Variance (%)', 'number'),
+        'volatility': format_metric(metrics, 'Volatility', 'number')
+    }
+
+
 def format_platform_result(backtest_result):
     """
     Export the finished backtest result
@@ -124,41 +120,26 @@ def format_platform_result(backtest_result):
     Args:
         backtest_result: A BacktestResult object to export
     """
-    # We're given a dictionary of dataframes and that has to be transformed to a dictionary of dictionaries
-    history_and_returns = __dict_from_df_dict(backtest_result.history_and_returns)
-
     # Grab a list of the traded assets
     # The paper trade interface format may change in the future to be more optimized
-    traded_symbols = []
-    for i in backtest_result.trades['created']:
-        if i['symbol'] not in traded_symbols:
-            traded_symbols.append(i['symbol'])
+    traded_symbols = list(dict.fromkeys(i['symbol'] for i in backtest_result.trades['created']))
 
-    # Set the account values to None
-    # Now grab the account value dictionary itself
+    # Now grab the account value columns themselves
     # Now just replicate the format of the resampled version
     # This was the annoying backtest glitch that almost cost us an investor meeting so its important
-    history = history_and_returns['history']
+    history = backtest_result.history_and_returns['history']
     account_value_name = 'Account Value (' + backtest_result.quote_currency + ')'
-    raw_or_resampled_account_values = {
-        'value': history[account_value_name],
-        'time': history['time']
-    }
 
     # Now grab the raw account values
-    compressed_asset_column = __compress_dict_series(raw_or_resampled_account_values['value'],
-                                                     raw_or_resampled_account_values['time'])
+    compressed_times, compressed_values = __compress_dict_series(history[account_value_name], history['time'])
 
-    compressed_array_conversion = []
-    for i in compressed_asset_column:
-        compressed_array_conversion.append({
-            'time': i,
-            'value': compressed_asset_column[i]
-        })
+    compressed_array_conversion = [{
+        'time': time,
+        'value': value
+    } for time, value in zip(compressed_times, compressed_values)]
 
-    compressed_asset_keys = list(compressed_asset_column.keys())
-    first_account_value = compressed_asset_column[compressed_asset_keys[0]]
-    last_account_value = compressed_asset_column[compressed_asset_keys[-1]]
+    first_account_value = compressed_values[0]
+    last_account_value = compressed_values[-1]
 
     trades = __parse_backtest_trades(backtest_result.trades['created'],
                                      backtest_result.trades['limits_executed'],
@@ -166,24 +147,7 @@ def format_platform_result(backtest_result):
                                      backtest_result.trades['executed_market_orders'])
 
     # Now change the metrics keys to be nicer
-    metrics = backtest_result.metrics
-    refined_metrics = {
-        'calmar': format_metric(metrics, 'Calmar Ratio', 'number'),
-        'cagr': format_metric(metrics, 'Compound Annual Growth Rate (%)', 'number'),
-        'cavr': format_metric(metrics, 'Conditional Value-at-Risk', 'number'),
-
-        'cum_returns': format_metric(metrics, 'Cumulative Returns (%)', 'number'),
-        'max_drawdown': format_metric(metrics, 'Max Drawdown (%)', 'number'),
-        'resampled_time': format_metric(metrics, 'Resampled Time', 'number'),
-
-        'risk_free_rate': format_metric(metrics, 'Risk Free Return Rate', 'number'),
-        'sharpe': format_metric(metrics, 'Sharpe Ratio', 'number'),
-        'sortino': format_metric(metrics, 'Sortino Ratio', 'number'),
-
-        'value_at_risk': format_metric(metrics, 'Value-at-Risk', 'number'),
-        'variance': format_metric(metrics, 'Variance (%)', 'number'),
-        'volatility': format_metric(metrics, 'Volatility', 'number')
-    }
+    refined_metrics = format_metrics(backtest_result.metrics)
 
     backtest_result.metrics = refined_metrics
     return {
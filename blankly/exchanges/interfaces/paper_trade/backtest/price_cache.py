@@ -0,0 +1,223 @@
+"""
+    File formats for the backtest price cache
+    Copyright (C) 2021  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import abc
+import json
+import os
+import typing
+
+import numpy as np
+import pandas as pd
+
+
+class PriceCache(abc.ABC):
+    """
+    A file format for a single segment of cached prices. The file name (without the extension) is the segment key
+    """
+    extension: str
+
+    @abc.abstractmethod
+    def read(self, path: str) -> pd.DataFrame:
+        pass
+
+    @abc.abstractmethod
+    def write(self, path: str, prices: pd.DataFrame) -> None:
+        pass
+
+
+class CsvPriceCache(PriceCache):
+    extension = '.csv'
+
+    def read(self, path: str) -> pd.DataFrame:
+        return pd.read_csv(path)
+
+    def write(self, path: str, prices: pd.DataFrame) -> None:
+        prices.to_csv(path, index=False)
+
+
+class NumpyPriceCache(PriceCache):
+    """
+    Stores each segment as a .npy file holding a structured array with one field per column. Reads load the binary
+    file in one pass so there is no text parsing when a backtest starts. The file isn't memory mapped because the
+    columns are copied into the price store anyway, and a mapped file can't be removed on Windows when segments are
+    merged
+    """
+    extension = '.npy'
+
+    def read(self, path: str) -> pd.DataFrame:
+        data = np.load(path, allow_pickle=False)
+        return pd.DataFrame({name: data[name] for name in data.dtype.names})
+
+    def write(self, path: str, prices: pd.DataFrame) -> None:
+        # Match what a csv round trip would do to numeric strings
+        prices = prices.apply(pd.to_numeric)
+        np.save(path, prices.to_records(index=False), allow_pickle=False)
+
+
+price_caches = {
+    'csv': CsvPriceCache(),
+    'npy': NumpyPriceCache()
+}
+
+
+def get_price_cache(cache_format: str) -> PriceCache:
+    try:
+        return price_caches[cache_format]
+    except KeyError:
+        raise LookupError(f"Unknown cache_format \"{cache_format}\". Use one of: {list(price_caches.keys())}")
+
+
+def migrate_price_cache(cache_folder: str, file: str, cache: PriceCache) -> str:
+    """
+    Rewrite a segment written in another known format into the format of the given cache
+
+    Args:
+        cache_folder: The folder containing the segment
+        file: The file name of the segment
+        cache: The format to convert the segment to
+    Returns:
+        The new file name if the segment was converted, otherwise the unchanged file name
+    """
+    key, extension = os.path.splitext(file)
+    if extension == cache.extension:
+        return file
+
+    for source in price_caches.values():
+        if source.extension == extension:
+            migrated = key + cache.extension
+            cache.write(os.path.join(cache_folder, migrated), source.read(os.path.join(cache_folder, file)))
+            os.remove(os.path.join(cache_folder, file))
+            return migrated
+
+    return file
+
+
+# Written into the cache folder to avoid listing & parsing every segment name on each backtest
+INDEX_FILE = '.index.json'
+
+
+def read_price_cache_index(cache_folder: str) -> typing.Optional[list]:
+    """
+    Read the list of segment files from the cache index
+
+    Returns:
+        The list of file names, or None if there is no index or the folder has changed since it was written
+    """
+    try:
+        with open(os.path.join(cache_folder, INDEX_FILE)) as f:
+            index = json.load(f)
+        if index['folder_modified'] != os.stat(cache_folder).st_mtime_ns:
+            return None
+        return index['segments']
+    except (FileNotFoundError, ValueError, KeyError):
+        return None
+
+
+def write_price_cache_index(cache_folder: str, segments: list) -> None:
+    """
+    Write the list of segment files to the cache index. The index stores the folder modification time so that any
+    segment added or removed by something else invalidates it
+    """
+    path = os.path.join(cache_folder, INDEX_FILE)
+    # Creating the index changes the folder modification time, so make sure it exists before reading that time.
+    #  Rewriting an existing file in place does not change it
+    if not os.path.exists(path):
+        open(path, 'w').close()
+
+    with open(path, 'w') as f:
+        json.dump({
+            'folder_modified': os.stat(cache_folder).st_mtime_ns,
+            'segments': segments
+        }, f)
+
+
+def list_price_cache(cache_folder: str, cache: PriceCache) -> list:
+    """
+    Find every segment in the cache folder. The index is used when it is up to date, otherwise the folder is scanned,
+    segments in other formats are converted and the index is rebuilt
+
+    Args:
+        cache_folder: The price cache folder, created if it doesn't exist
+        cache: The format that segments should be in
+    """
+    segments = read_price_cache_index(cache_folder)
+    if segments is not None and all(os.path.splitext(i)[1] == cache.extension for i in segments):
+        return segments
+
+    try:
+        files = os.listdir(cache_folder)
+    except FileNotFoundError:
+        files = []
+        os.mkdir(cache_folder)
+
+    segments = [migrate_price_cache(cache_folder, i, cache) for i in files if i != INDEX_FILE]
+    write_price_cache_index(cache_folder, segments)
+    return segments
+
+
+def compact_price_cache(cache_folder: str, segments: list, cache: PriceCache) -> list:
+    """
+    Merge every set of overlapping or touching segments of the same exchange, symbol & resolution into a single
+    segment with one row per time
+
+    Args:
+        cache_folder: The price cache folder
+        segments: The segment file names in the folder
+        cache: The format of the segments
+    Returns:
+        The segment file names after compaction
+    """
+    output = []
+    groups = {}
+    for segment in segments:
+        identifier = os.path.splitext(segment)[0].split(',')
+        try:
+            exchange, sandbox, symbol, start, stop, resolution = identifier
+            groups.setdefault((exchange, sandbox, symbol, resolution), []).append(
+                (int(float(start)), int(float(stop)), segment))
+        except ValueError:
+            # Leave anything that isn't a segment for the caller to deal with
+            output.append(segment)
+
+    for (exchange, sandbox, symbol, resolution), group in groups.items():
+        group.sort()
+
+        runs = [[group[0]]]
+        for segment in group[1:]:
+            if segment[0] <= max(i[1] for i in runs[-1]):
+                runs[-1].append(segment)
+            else:
+                runs.append([segment])
+
+        for run in runs:
+            if len(run) == 1:
+                output.append(run[0][2])
+                continue
+
+            merged = f'{exchange},{sandbox},{symbol},{run[0][0]},{max(i[1] for i in run)},{resolution}' \
+                     f'{cache.extension}'
+            prices = pd.concat([cache.read(os.path.join(cache_folder, i[2])) for i in run])
+            prices = prices.drop_duplicates(subset=['time'], keep='last').sort_values(by=['time'], ignore_index=True)
+            cache.write(os.path.join(cache_folder, merged), prices)
+
+            for segment in run:
+                if segment[2] != merged:
+                    os.remove(os.path.join(cache_folder, segment[2]))
+            output.append(merged)
+
+    return output
@@ -0,0 +1,210 @@
+"""
+    Signal based backtests computed with array operations instead of the event loop
+    Copyright (C) 2021  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import typing
+
+import numpy as np
+import pandas as pd
+
+import blankly.exchanges.interfaces.paper_trade.metrics as metrics
+import blankly.exchanges.interfaces.paper_trade.utils as paper_trade
+from blankly.data.data_reader import PriceReader
+from blankly.exchanges.interfaces.paper_trade.backtest.format_platform_result import format_metrics
+from blankly.exchanges.interfaces.paper_trade.backtest_result import BacktestResult
+from blankly.utils.exceptions import InvalidOrder
+from blankly.utils.time_builder import time_interval_to_seconds
+from blankly.utils.utils import get_base_asset, get_quote_asset
+
+
+def __taker_fee(fees, symbol: str) -> float:
+    # Market orders always pay the taker fee, the same as in the paper trade interface
+    if fees is None:
+        return 0.0
+    if isinstance(fees, (int, float)):
+        return float(fees)
+    if hasattr(fees, 'get_interface'):
+        fees = fees.get_interface()
+    if hasattr(fees, 'get_fees'):
+        fees = fees.get_fees(symbol)
+    return float(fees['taker_fee_rate'])
+
+
+def __signal_array(signals, symbol: str, length: int) -> np.ndarray:
+    try:
+        signal = signals[symbol]
+    except KeyError:
+        raise KeyError(f"No signals given for {symbol}.")
+    signal = np.asarray(signal, dtype=np.float64)
+    if signal.shape != (length,):
+        raise ValueError(f"The signals for {symbol} must have one value for each of its {length} prices. "
+                         f"Found {signal.shape[0] if signal.ndim else 0}.")
+    return signal
+
+
+def backtest_vectorized(prices: typing.Union[dict, PriceReader],
+                        signals: typing.Union[dict, pd.DataFrame],
+                        fees=0.0,
+                        initial_values: dict = None,
+                        signal_type: str = 'positions',
+                        use_price: str = 'close',
+                        resample_account_value_for_metrics: typing.Union[str, float] = '1d',
+                        risk_free_return_rate: float = 0.0,
+                        quote_account_value_in: str = None,
+                        benchmark_symbol: str = None) -> BacktestResult:
+    """
+    Backtest precomputed signals without running a callback at each price. Every signal is filled as a market order
+    at the price it lines up with, using the paper trade fee model: buys lose the fee from the base they gain and
+    sells lose the fee from the quote they gain. The result has the same account history, trades and metrics as
+    strategy.backtest()
+
+    Args:
+        prices (dict or PriceReader): Dictionary of symbols to price dataframes with a time column and the use_price
+            column, for example {'BTC-USD': dataframe}
+        signals (dict or DataFrame): Symbols mapped to one value for each of their prices. Use a DataFrame when every
+            symbol has the same number of prices
+        fees (float, dict or exchange): The taker fee rate, a fee dictionary with a 'taker_fee_rate' key or anything
+            with get_fees() such as an exchange or interface
+        initial_values (dict): Dictionary of initial value sizes (i.e { 'BTC': 3, 'USD': 5650})
+        signal_type (str): 'positions' when each signal is the base size that should be held after that price or
+            'orders' when each signal is the size to buy (positive) or sell (negative) at that price. Missing positions
+            hold the last one and missing orders are skipped
+        use_price (str): The price column to fill orders at
+        resample_account_value_for_metrics (str or float): The interval to resample account value at for metrics
+        risk_free_return_rate (float): The theoretical rate of return with no risk
+        quote_account_value_in (str): The currency to value the account in. Defaults to the quote of the symbols
+        benchmark_symbol (str): A symbol from the prices to compare against
+
+    Returns:
+        A BacktestResult
+    """
+    if isinstance(prices, PriceReader):
+        prices = prices.data
+    if len(prices) == 0:
+        raise ValueError("No prices given.")
+    if signal_type not in ('positions', 'orders'):
+        raise ValueError(f"Unknown signal type \"{signal_type}\". Use \"positions\" or \"orders\".")
+    if initial_values is None:
+        raise ValueError("Set initial_values to the starting account, for example {'USD': 10000}.")
+
+    quote_currency = quote_account_value_in
+    if quote_currency is None:
+        quotes = {get_quote_asset(symbol) for symbol in prices}
+        if len(quotes) != 1:
+            raise ValueError(f"Symbols are quoted in {sorted(quotes)}. Set quote_account_value_in and only use "
+                             f"symbols quoted in it.")
+        quote_currency = quotes.pop()
+    for symbol in prices:
+        if get_quote_asset(symbol) != quote_currency:
+            raise ValueError(f"{symbol} is not quoted in {quote_currency}.")
+    for asset in initial_values:
+        if asset != quote_currency and asset not in {get_base_asset(symbol) for symbol in prices}:
+            raise KeyError(f"Failed to quote {asset} because no prices were given for {asset}-{quote_currency}.")
+
+    # Sort every frame (along with its signals) and line everything up on the union of their times
+    frames = {}
+    frame_signals = {}
+    for symbol, frame in prices.items():
+        signal = __signal_array(signals, symbol, len(frame))
+        if not frame['time'].is_monotonic_increasing:
+            order = np.argsort(frame['time'].to_numpy(), kind='stable')
+            frame = frame.iloc[order].reset_index(drop=True)
+            signal = signal[order]
+        frames[symbol] = frame
+        frame_signals[symbol] = signal
+    all_times = np.unique(np.concatenate([frame['time'].to_numpy(dtype=np.float64) for frame in frames.values()]))
+
+    quote_value = np.full(len(all_times), float(initial_values.get(quote_currency, 0)))
+    asset_value = np.zeros(len(all_times))
+    history = {}
+    fills = []
+    for symbol, frame in frames.items():
+        base = get_base_asset(symbol)
+        times = frame['time'].to_numpy(dtype=np.float64)
+        price = frame[use_price].to_numpy(dtype=np.float64)
+        signal = frame_signals[symbol]
+        fee = __taker_fee(fees, symbol)
+        initial_base = float(initial_values.get(base, 0))
+
+        if signal_type == 'positions':
+            signal = pd.Series(signal).ffill().fillna(initial_base).to_numpy()
+            base_change = np.diff(signal, prepend=initial_base)
+            # Buy enough that the position is reached after the fee comes out of the base
+            sizes = np.where(base_change > 0, base_change / (1 - fee), base_change)
+        else:
+            sizes = np.nan_to_num(signal)
+            base_change = np.where(sizes > 0, sizes * (1 - fee), sizes)
+        quote_change = np.where(sizes > 0, -sizes * price, -sizes * price * (1 - fee))
+
+        # Each symbol keeps its last position and price between its own times
+        index = np.searchsorted(times, all_times, side='right') - 1
+        started = index >= 0
+        index = np.maximum(index, 0)
+        base_value = np.where(started, initial_base + np.cumsum(base_change)[index], initial_base)
+        quote_value += np.where(started, np.cumsum(quote_change)[index], 0)
+        asset_value += base_value * price[index]
+        history[base] = base_value
+
+        traded = np.flatnonzero(sizes)
+        fills += [(times[i], symbol, sizes[i], price[i]) for i in traded]
+
+        if np.any(base_value < -1e-9):
+            short_time = all_times[np.argmax(base_value < -1e-9)]
+            raise InvalidOrder(f"Not enough {base} to sell at time {short_time}. Shorting is not supported in "
+                               f"vectorized backtests.")
+
+    if np.any(quote_value < -1e-9 * max(1.0, abs(quote_value[0]))):
+        short_time = all_times[np.argmax(quote_value < -1e-9 * max(1.0, abs(quote_value[0])))]
+        raise InvalidOrder(f"Not enough {quote_currency} to buy at time {short_time}.")
+
+    history[quote_currency] = quote_value
+    history['time'] = all_times
+    history['Account Value (' + quote_currency + ')'] = quote_value + asset_value
+
+    # Record the fills the same way as the trades of a finished event backtest
+    fills.sort(key=lambda fill: fill[0])
+    created = []
+    executed_market_orders = []
+    for fill_time, symbol, size, price in fills:
+        order_id = paper_trade.generate_coinbase_pro_id()
+        created.append({
+            'symbol': symbol,
+            'id': order_id,
+            'time': fill_time,
+            'size': abs(size),
+            'status': 'done',
+            'type': 'spot-market',
+            'side': 'buy' if size > 0 else 'sell',
+            'price': price
+        })
+        executed_market_orders.append({
+            'id': order_id,
+            'executed_price': price
+        })
+
+    result = BacktestResult({'history': pd.DataFrame(history)}, {
+        'created': created,
+        'limits_executed': [],
+        'limits_canceled': [],
+        'executed_market_orders': executed_market_orders
+    }, frames, all_times[0], all_times[-1], quote_currency, [])
+
+    result.metrics = metrics.backtest_metrics(result, time_interval_to_seconds(resample_account_value_for_metrics),
+                                              risk_free_return_rate, benchmark_symbol, use_price)
+    result.metrics = format_metrics(result.metrics)
+    result.user_callbacks = {}
+    return result
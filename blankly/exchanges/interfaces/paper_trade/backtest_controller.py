@@ -17,6 +17,7 @@
 """
 
 import json
+import math
 import os
 import time
 import traceback
@@ -35,18 +36,29 @@ from bokeh.palettes import Category10_10
 from bokeh.plotting import ColumnDataSource, figure, show
 
 import blankly.exchanges.interfaces.paper_trade.metrics as metrics
+from blankly.exchanges.interfaces.paper_trade.backtest.account_history import AccountHistory
 from blankly.exchanges.interfaces.paper_trade.backtest_result import BacktestResult
 from blankly.exchanges.interfaces.paper_trade.futures.futures_paper_trade_interface import FuturesPaperTradeInterface
 from blankly.exchanges.interfaces.paper_trade.paper_trade_interface import PaperTradeInterface
 from blankly.utils.time_builder import time_interval_to_seconds
 from blankly.utils.utils import load_backtest_preferences, write_backtest_preferences, info_print, update_progress, \
-    get_base_asset, get_quote_asset, aggregate_prices_by_resolution
+    get_base_asset, get_quote_asset, aggregate_prices_by_resolution, aggregate_ohlcv
 from blankly.exchanges.interfaces.paper_trade.backtest.format_platform_result import \
     format_platform_result
+from blankly.exchanges.interfaces.paper_trade.backtest.price_cache import get_price_cache, list_price_cache, \
+    compact_price_cache, write_price_cache_index
 
 from blankly.exchanges.interfaces.paper_trade.abc_backtest_controller import ABCBacktestController
 from blankly.exchanges.exchange import ABCExchange
 from blankly.data.data_reader import PriceReader, TickReader, DataReader, FundingRateEventReader
+from blankly.exchanges.interfaces.paper_trade.backtest.events import EventSource, merge_events
+
+
+# The most candles downloaded before they're written to the price cache
+DOWNLOAD_CHUNK_SIZE = 10000
+
+# The price columns the ohlc fill model needs to build bars
+OHLC_COLUMNS = ('open', 'high', 'low', 'close')
 
 
 def to_string_key(separated_list):
@@ -58,6 +70,27 @@ def to_string_key(separated_list):
     return output
 
 
+def to_price_columns(prices: pd.DataFrame) -> typing.Dict[str, np.ndarray]:
+    """
+    Convert a price dataframe into a columnar store: one contiguous array per column. Integer columns (such as epoch
+    times) are kept as int64 while every other numeric column is stored as float64.
+
+    Args:
+        prices: A dataframe that is already sorted by time
+    Returns:
+        A dictionary of numpy arrays keyed by column name, for example {'time': array([...]), 'close': array([...])}
+    """
+    columns = {}
+    for column in prices.columns:
+        values = prices[column].to_numpy()
+        if values.dtype.kind in 'iu':
+            values = np.ascontiguousarray(values, dtype=np.int64)
+        elif values.dtype.kind == 'f':
+            values = np.ascontiguousarray(values, dtype=np.float64)
+        columns[column] = values
+    return columns
+
+
 def split(base_range, local_segments) -> typing.Tuple[list, list]:
     """
     Find the negative given from a range and a set of other ranges
@@ -149,6 +182,56 @@ def split(base_range, local_segments) -> typing.Tuple[list, list]:
     return used_ranges, negative_ranges
 
 
+def plan_derived_ranges(gap, finer_ranges: dict, resolution: int) -> typing.Tuple[list, list]:
+    """
+    Find the parts of a missing range that can be built by aggregating cached prices at a finer resolution that
+    divides the requested one evenly. A candle is only derived when the cache covers it from open to close
+
+    Args:
+        gap: The missing range of candle open times such as [1600000000, 1600086400]
+        finer_ranges: The cached segments at each finer resolution such as {60: [[start, stop], ...], 300: [...]}.
+            A segment covers the times from its start up to its stop
+        resolution: The requested resolution
+    Returns:
+        (derived, remaining) where derived is a list of (finer_resolution, [first_open, last_open], segments) with
+        the cached segments to aggregate, and remaining is the list of ranges that still have to be downloaded
+    """
+    derived = []
+    remaining = [list(gap)]
+    for finer in sorted(finer_ranges, reverse=True):
+        if finer >= resolution or resolution % finer != 0:
+            continue
+
+        # Merge the segments that overlap or touch into continuous runs
+        runs = []
+        for segment in sorted(finer_ranges[finer]):
+            if runs and segment[0] <= runs[-1][1]:
+                runs[-1][1] = max(runs[-1][1], segment[1])
+                runs[-1][2].append(segment)
+            else:
+                runs.append([segment[0], segment[1], [segment]])
+
+        for run_start, run_stop, segments in runs:
+            still_missing = []
+            for missing_start, missing_stop in remaining:
+                first = math.ceil(max(run_start, missing_start) / resolution) * resolution
+                last = min(math.floor((run_stop - resolution) / resolution) * resolution,
+                           math.floor(missing_stop / resolution) * resolution)
+                if last < first:
+                    still_missing.append([missing_start, missing_stop])
+                    continue
+
+                derived.append((finer, [first, last], [i for i in segments if i[0] < last + resolution and
+                                                       i[1] > first]))
+                if first - resolution >= missing_start:
+                    still_missing.append([missing_start, first - resolution])
+                if last + resolution <= missing_stop:
+                    still_missing.append([last + resolution, missing_stop])
+            remaining = still_missing
+
+    return derived, sorted(remaining)
+
+
 class BackTestController(ABCBacktestController):  # circular import to type model
     def __init__(self, model):
         self.backtesting = False
@@ -160,13 +243,16 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
         self.initial_time = None
         self.model = model
 
-        self.traded_account_values = []
-        self.no_trade_account_values = []
+        self.traded_account_values = AccountHistory()
+        self.no_trade_account_values = AccountHistory()
+        self.__valuation_plan = []
+        self.__valuation_asset_count = None
 
-        # Prices sorted by symbol and then records of prices
+        # Prices sorted by symbol and then a columnar store of prices: {'BTC-USD': {'time': array, 'close': array}}
         self.prices = {}
-        # A list of events sorted by time. All events are put into this single list
-        self.events = []
+        # Every custom and tick event merged into one stream ordered by time, and the next event it will dispatch
+        self.events = iter(())
+        self.next_event = None
 
         # User added times
         self.__user_added_times = []
@@ -205,14 +291,15 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
 
         # Use this global to retain where we are in the prices dictionary by index
         self.price_indexes = {}
-        # Use this to keep trace globally of the event index we're using
-        self.event_index = 0
 
         # Custom injected price readers and events readers
         self.__price_readers = []
         self.__event_readers = []
         self.__tick_readers = []
 
+        # Prices loaded ahead of time with preload_prices(). When set, sync_prices skips the cache and the exchange
+        self.preloaded_prices = None
+
     class PriceIdentifiers(enum.Enum):
         exchange: str = 0
         sandbox: bool = 1
@@ -223,54 +310,23 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
 
     def parse_events(self):
         """
-        Transform to:
-        [
-            {
-                "type": "news event",
-                "data": "gotem",
-                "time": 2
-            }
-        ]
+        Merge the custom events and the tick events into a single stream ordered by time. Each source stays in its
+        columns and the merge is lazy, so the data of an event is only built when it's dispatched
         """
-        # TODO some code duplication here for the different events
+        sources = []
         for reader in self.__event_readers:
-            # Get the data as dict of dataframes
-            data = reader.data
-            for event_type in data:
-                self.__check_user_time_bounds(reader.data[event_type]['time'].iloc[0],
-                                              reader.data[event_type]['time'].iloc[-1],
-                                              60)
-                # Get the dataframe in each one
-                event_df: pd.DataFrame = data[event_type]
-                # Now turn it into a set of records
-                records = event_df.to_dict(orient='records')
-                # And make sure to add on the event type to each one
-                for record_index in range(len(records)):
-                    records[record_index]['type'] = event_type
-
-                self.events += records
+            for event_type in reader.keys:
+                self.__check_user_time_bounds(*reader.time_bounds(event_type), 60)
+                sources.append(EventSource(event_type, reader.chunks(event_type)))
 
         for tick_reader in self.__tick_readers:
-            data = tick_reader.data
-            for symbol in data:
-                self.__check_user_time_bounds(tick_reader.data[symbol]['time'].iloc[0],
-                                              tick_reader.data[symbol]['time'].iloc[-1],
-                                              60)
-                symbol_df: pd.DataFrame = data[symbol]
-
-                records = symbol_df.to_dict(orient='records')
-                data_formatted_records = []
-                for record_index in range(len(records)):
-                    data_formatted_records.append({
-                        'type': '__blankly__tick',
-                        'data': records[record_index],
-                        'time': records[record_index]['time']
-                    })
+            # Streaming tick readers read their files a chunk at a time as the merge reaches them
+            for symbol in tick_reader.keys:
+                self.__check_user_time_bounds(*tick_reader.time_bounds(symbol), 60)
+                sources.append(EventSource('__blankly__tick', tick_reader.chunks(symbol), row_data=True))
 
-                self.events += data_formatted_records
-
-        # Now we just need to sort by time
-        self.events = sorted(self.events, key=lambda d: d['time'])
+        self.events = merge_events(sources)
+        self.next_event = next(self.events, None)
 
     def sync_prices(self) -> dict:
         """
@@ -283,8 +339,16 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
             dictionary with keys for each 'symbol'
         """
 
+        if self.preloaded_prices is not None:
+            final_prices, prices_by_resolution = self.preloaded_prices
+            # Copy the containers so that nothing done to this run's dictionaries leaks into the next one
+            self.interface.receive_price_cache({symbol: dict(resolutions) for symbol, resolutions in
+                                                prices_by_resolution.items()})
+            return dict(final_prices)
+
         # Make sure the cache folder exists and read files
         cache_folder = self.preferences['settings']["cache_location"]
+        cache = get_price_cache(self.preferences['settings']['cache_format'])
 
         def sort_prices_by_resolution(price_dict):
             for symbol_ in price_dict:
@@ -294,18 +358,12 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
 
             return price_dict
 
-        def parse_identifiers() -> list:
-            try:
-                files = os.listdir(cache_folder)
-            except FileNotFoundError:
-                files = []
-                os.mkdir(cache_folder)
-
+        def parse_identifiers(segments_: list) -> list:
             identifiers_ = []
-            for file in range(len(files)):
-                # example file name: 'coinbase_pro.sandbox.BTC-USD.1622400000.1622510793.60.csv'
-                # Remove the .csv from each of the files: BTC-USD.1622400000.1622510793.60
-                identifier = files[file][:-4].split(",")
+            for file in segments_.copy():
+                # example file name: 'coinbase_pro,True,BTC-USD,1622400000,1622510793,60.npy'
+                # Remove the extension from each of the files: coinbase_pro,True,BTC-USD,1622400000,1622510793,60
+                identifier = os.path.splitext(file)[0].split(",")
                 # Cast to float first before
                 try:
                     identifiers_.append({
@@ -318,7 +376,8 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
                     })
                 except IndexError:
                     # Remove each of the failed cache objects
-                    os.remove(os.path.join(cache_folder, files[file]))
+                    os.remove(os.path.join(cache_folder, file))
+                    segments_.remove(file)
 
             return identifiers_
 
@@ -369,7 +428,12 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
 
             return local_history_blocks_
 
-        identifiers = parse_identifiers()
+        # Segments written in another format (such as older csv caches) are converted to the current one
+        segments = list_price_cache(cache_folder, cache)
+        if self.preferences['settings']['continuous_caching']:
+            segments = compact_price_cache(cache_folder, segments, cache)
+        identifiers = parse_identifiers(segments)
+        write_price_cache_index(cache_folder, segments)
 
         local_history_blocks = sort_identifiers(identifiers)
 
@@ -408,12 +472,12 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
 
             relevant_data = []
             for j in used_ranges:
-                relevant_data.append(pd.read_csv(os.path.join(cache_folder, to_string_key([exchange,
-                                                                                           True,
-                                                                                           symbol,
-                                                                                           j[0],
-                                                                                           j[1],
-                                                                                           resolution]) + ".csv")))
+                relevant_data.append(cache.read(os.path.join(cache_folder, to_string_key([exchange,
+                                                                                         True,
+                                                                                         symbol,
+                                                                                         j[0],
+                                                                                         j[1],
+                                                                                         resolution]) + cache.extension)))
 
             if len(relevant_data) > 0:
                 final_prices[symbol] = pd.concat(relevant_data)
@@ -421,27 +485,69 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
                     prices_by_resolution = aggregate_prices_by_resolution(prices_by_resolution, symbol, resolution,
                                                                           dataset)
 
-            # If there is any data left to download do it here
+            # Candles at this resolution can also be built from cached prices at any finer resolution dividing it
+            finer_ranges = {}
+            cached_resolutions = local_history_blocks.get(exchange, {}).get(sandbox, {}).get(symbol, {})
+            for finer, blocks in cached_resolutions.items():
+                if finer < resolution and resolution % finer == 0:
+                    finer_ranges[finer] = [[block[self.PriceIdentifiers.epoch_start],
+                                            block[self.PriceIdentifiers.epoch_stop]] for block in blocks]
+
+            missing_ranges = []
             for j in negative_ranges:
+                derived_ranges, remaining = plan_derived_ranges(j, finer_ranges, resolution)
+                missing_ranges.extend(remaining)
+                for finer, (first, last), finer_segments in derived_ranges:
+                    print("Building " + symbol + " from: " + str(first) + " to " + str(last) + " at a resolution of " +
+                          str(resolution) + " seconds from cached " + str(finer) + " second prices.")
+                    finer_prices = pd.concat([cache.read(os.path.join(cache_folder, to_string_key(
+                        [exchange, True, symbol, k[0], k[1], finer]) + cache.extension)) for k in finer_segments])
+                    finer_prices = finer_prices[(finer_prices['time'] >= first) &
+                                                (finer_prices['time'] < last + resolution)]
+                    derived = aggregate_ohlcv(finer_prices.drop_duplicates(subset=['time']), resolution)
+
+                    prices_by_resolution = aggregate_prices_by_resolution(prices_by_resolution, symbol, resolution,
+                                                                          derived)
+                    if symbol not in final_prices:
+                        final_prices[symbol] = derived
+                    else:
+                        final_prices[symbol] = pd.concat([final_prices[symbol], derived])
+
+            # If there is any data left to download do it here
+            for j in missing_ranges:
                 print("No cached data found for " + symbol + " from: " + str(j[0]) + " to " +
                       str(j[1]) + " at a resolution of " + str(resolution) + " seconds.")
-                download = self.interface.get_product_history(symbol,
-                                                              j[0],
-                                                              j[1],
-                                                              resolution)
-
-                # Write the file but this time include very accurately the start and end times
                 if self.preferences['settings']['continuous_caching']:
-                    if not download.empty:
-                        download.to_csv(os.path.join(cache_folder, f'{exchange},'
-                                                                   f'{True},'
-                                                                   f'{symbol},'
-                                                                   f'{int(j[0])},'
-                                                                   f'{int(j[1]) + resolution},'  # This adds resolution 
-                                                                                                 # back to the exported
-                                                                                                 # time series
-                                                                   f'{resolution}.csv'),
-                                        index=False)
+                    # Write each chunk as soon as it downloads so that a failed download can resume from the gaps
+                    chunks = []
+                    chunk_starts = range(int(j[0]), int(j[1]), DOWNLOAD_CHUNK_SIZE * resolution) or [int(j[0])]
+                    for chunk_start in chunk_starts:
+                        chunk_stop = min(chunk_start + DOWNLOAD_CHUNK_SIZE * resolution, int(j[1]))
+                        download = self.interface.get_product_history(symbol, chunk_start, chunk_stop, resolution)
+                        if download.empty:
+                            continue
+
+                        # Write the file but this time include very accurately the start and end times
+                        segment = f'{exchange},' \
+                                  f'{True},' \
+                                  f'{symbol},' \
+                                  f'{chunk_start},' \
+                                  f'{chunk_stop + resolution},' \
+                                  f'{resolution}{cache.extension}'  # This adds resolution back to the exported
+                                                                    # time series
+                        cache.write(os.path.join(cache_folder, segment), download)
+                        segments.append(segment)
+                        write_price_cache_index(cache_folder, segments)
+                        chunks.append(download)
+
+                    if len(chunks) > 0:
+                        # Neighboring chunks share their boundary time
+                        download = pd.concat(chunks).drop_duplicates(subset=['time'], ignore_index=True)
+                else:
+                    download = self.interface.get_product_history(symbol,
+                                                                  j[0],
+                                                                  j[1],
+                                                                  resolution)
 
                 prices_by_resolution = aggregate_prices_by_resolution(prices_by_resolution, symbol, resolution,
                                                                       download)
@@ -484,12 +590,36 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
         # Send the prices by resolution to the interface
         self.interface.receive_price_cache(sort_prices_by_resolution(prices_by_resolution))
 
-        # Finally, convert back into records
+        # Finally, convert into the columnar store
         for symbol in final_prices:
-            final_prices[symbol] = final_prices[symbol].to_records()
+            final_prices[symbol] = to_price_columns(final_prices[symbol])
 
         return final_prices
 
+    def preload_prices(self, exchange: ABCExchange, backtest_settings_path: str = None, **kwargs) -> None:
+        """
+        Read or download every added price once, ahead of time. Each following backtest run by this controller
+        (or by any process forked from it) reuses these prices instead of re-reading the cache
+
+        Args:
+            exchange: A paper trade exchange object to load the prices with
+            backtest_settings_path: Path to the backtest.json file
+            kwargs: Overrides for the backtest.json settings, identical to run()
+        """
+        self.preferences = load_backtest_preferences(backtest_settings_path)
+        for setting in kwargs:
+            self.preferences['settings'][setting] = kwargs[setting]
+
+        if not exchange.get_type().endswith("paper_trade"):
+            raise ValueError("Backtest controller was not constructed with a paper trade exchange object.")
+        self.interface = exchange.get_interface()
+
+        self.preloaded_prices = None
+        prices = self.sync_prices()
+        self.preloaded_prices = prices, self.interface.full_prices
+
+        self.interface = None
+
     def add_prices(self,
                    symbol: str,
                    resolution: [str, int, float],
@@ -597,62 +727,57 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
         """
         self.interface.override_local_account(account_dictionary)
 
-    def format_account_data(self, interface: PaperTradeInterface, local_time) -> \
-            typing.Tuple[typing.Dict[
-                             typing.Union[
-                                 str, typing.Any],
-                             typing.Union[
-                                 int, typing.Any]],
-                         typing.Dict[
-                             typing.Union[str,
-                                          typing.Any],
-                             typing.Union[
-                                 int, typing.Any]]]:
-
-        # This is done so that only traded assets are evaluated.
-        true_available: dict = {}
-        true_account: dict = {}
-        for i in interface.traded_assets:
-            # Grab the account status
-            true_account[i] = interface.get_account(i)
-
+    def __plan_valuation(self) -> None:
+        """
+        Work out how each traded asset is valued so that valuing the account each step is only lookups and sums
+        """
+        interface = self.interface
+        if self.quote_currency not in interface.traded_assets:
+            raise KeyError(f"Failed looking up '{self.quote_currency}'. Try changing your quote_account_value_in in "
+                           f"backtest.json to be '{self.quote_currency}', or try a tether coin in backtest.json like "
+                           f"USDT depending on exchange.")
+
+        is_stonks = interface.get_exchange_type() == 'alpaca'
+        self.__valuation_plan = []
+        for asset in interface.traded_assets:
+            if asset == self.quote_currency:
+                continue
+            is_future = asset.endswith('PERP')
+            currency_pair = asset if is_stonks or is_future else asset + '-' + self.quote_currency
+            initial = self.initial_account[asset]['available'] + self.initial_account[asset]['hold']
+            self.__valuation_plan.append((asset, interface.get_price_symbol(currency_pair), currency_pair,
+                                          is_future, initial))
+        self.__valuation_asset_count = len(interface.traded_assets)
+
+        assets = [asset for asset, _, _, _, _ in self.__valuation_plan]
+        self.traded_account_values.set_columns(assets + ['time', self.quote_currency,
+                                                         'Account Value (' + self.quote_currency + ')'])
+        self.no_trade_account_values.set_columns(assets + ['time', 'Account Value (No Trades)'])
+
+    def __record_account_value(self, local_time) -> None:
+        # The plan only changes when a new asset is traded
+        if len(self.interface.traded_assets) != self.__valuation_asset_count:
+            self.__plan_valuation()
+
+        balances = self.interface.account_balances
+        prices = self.interface.frame['prices']
+
+        traded_row = []
+        no_trade_row = []
         # Create an account total value
         value_total = 0
-
-        no_trade_available = {}
         # No trade account total
         no_trade_value = 0
-
-        # Save this up front so that it can be removed from the price calculation (it's always a value of 1 anyway)
-        try:
-            quote_value = true_account[self.quote_currency]['available'] + true_account[self.quote_currency]['hold']
-        except KeyError as e:
-            raise KeyError(f"Failed looking up {e}. Try changing your quote_account_value_in in backtest.json to be "
-                           f"{e}, or try a tether coin in backtest.json like USDT depending on exchange.")
-        try:
-            del true_account[self.quote_currency]
-        except KeyError:
-            pass
-
-        for i in list(true_account.keys()):
+        for asset, price_symbol, currency_pair, is_future, initial in self.__valuation_plan:
             # Funds on hold are still added
-            true_available[i] = true_account[i]['available'] + true_account[i]['hold']
-            no_trade_available[i] = self.initial_account[i]['available'] + self.initial_account[i]['hold']
-            currency_pair = i
-
-            # Convert to quote (this could be optimized a bit)
-            is_stonks = interface.get_exchange_type() == 'alpaca'
-            is_future = currency_pair.endswith('PERP')
-            if not (is_stonks or is_future):
-                currency_pair += '-'
-                currency_pair += self.quote_currency
-
-            # Get price at time
+            available = balances[asset]['available'] + balances[asset]['hold']
+            traded_row.append(available)
+            no_trade_row.append(initial)
+
             try:
-                price = interface.get_price(currency_pair)
+                price = prices[price_symbol]
             except KeyError:
                 # Must be a currency we have no data for
-                # This used to return zero but I believe all the cases where no data was avaiable have been elimated.
                 raise KeyError(f"Failed to quote {currency_pair} because no downloaded data for that pair is available. "
                                f"Make sure to set \"quote_account_value_in\" in \"backtest.json\" to match the prices "
                                f"you are using. For example if you are trading \"USD-JPY\", set your quote value "
@@ -660,28 +785,23 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
 
             # This is needed for futures apparently
             if is_future:
-                value_total += price * abs(true_available[i])
-                no_trade_value += price * abs(no_trade_available[i])
+                value_total += price * abs(available)
+                no_trade_value += price * abs(initial)
             else:
                 # For stocks make sure not to use an absolute value
-                value_total += price * true_available[i]
-                no_trade_value += price * no_trade_available[i]
-
-        # Make sure to add the time key in
-        true_available['time'] = local_time
-        no_trade_available['time'] = local_time
+                value_total += price * available
+                no_trade_value += price * initial
 
+        quote_account = balances[self.quote_currency]
+        quote_value = quote_account['available'] + quote_account['hold']
         value_total += quote_value
-        true_available[self.quote_currency] = quote_value
-
         no_trade_value += self.initial_account[self.quote_currency][
                               'available'] + self.initial_account[self.quote_currency]['hold']
 
-        true_available['Account Value (' + self.quote_currency + ')'] = value_total
-
-        no_trade_available['Account Value (No Trades)'] = no_trade_value
-
-        return true_available, no_trade_available
+        traded_row += [local_time, quote_value, value_total]
+        no_trade_row += [local_time, no_trade_value]
+        self.traded_account_values.append(traded_row)
+        self.no_trade_account_values.append(no_trade_row)
 
     def __account_was_used(self, column) -> bool:
         show_zero_delta = self.preferences['settings']['show_tickers_with_zero_delta']
@@ -709,28 +829,18 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
                 self.interface.do_funding(data['symbol'], data['rate'])
 
         def run_events():
-            # Ensure that we don't index error here
-            events_length = len(self.events)
-            # Make sure we don't crash at first
-            if self.event_index >= events_length:
-                return
-
             # Store the time because we need accurate time for the async stuff
             time_backup = self.time
-            while self.events[self.event_index]['time'] < time_backup:
+            while self.next_event is not None and self.next_event[0] < time_backup:
                 # Set time to something different here
-                event = self.events[self.event_index]
-                self.time = event['time']
-                if event['type'][0:11] != '__blankly__':
-                    self.model.event(event['type'], event['data'])
+                event_time, type_, chunk, index = self.next_event
+                self.time = event_time
+                if type_[0:11] != '__blankly__':
+                    self.model.event(type_, chunk.data(index))
                 else:
-                    handle_blankly_tick(event['type'][11:], event['data'])
+                    handle_blankly_tick(type_[11:], chunk.data(index))
                 # Fired some event, go to the next one
-                self.event_index += 1
-
-                # Just check after doing that if we went outside the index
-                if self.event_index >= events_length:
-                    return
+                self.next_event = next(self.events, None)
 
             self.time = time_backup
 
@@ -739,20 +849,35 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
 
         for symbol in self.prices:
             # Make sure that each price column is at least at the current time
-
-            # This just incrementing the price indexes until it's less than time and ensuring that
-            #  it's less than the length of the price
-            price_length = len(self.prices[symbol]) - 2
-            while self.prices[symbol][self.price_indexes[symbol]]['time'] < self.time:
-                if price_length >= self.price_indexes[symbol]:
-                    self.price_indexes[symbol] += 1
-                else:
+            times = self.prices[symbol]['time']
+            index = self.price_indexes[symbol]
+
+            # Move to the first price at or after the current time. Dense data almost always moves a single step so
+            #  that is checked first, larger jumps are a binary search over the time column
+            if times[index] < self.time:
+                first = index + 1
+                index = first
+                if index < len(times) and times[index] < self.time:
+                    index = int(np.searchsorted(times, self.time, side='left'))
+                prices = self.prices[symbol]
+                if index >= len(times):
+                    # We've run out of prices for this symbol, stay on the last one
+                    index = len(times) - 1
                     self.model.has_data = False
-                    break
+                elif self.interface.intrabar_path is not None and all(i in prices for i in OHLC_COLUMNS):
+                    # Limit orders can fill anywhere inside the bars that were moved through, so a jump over several
+                    #  bars is combined into one. Without the bar columns only the price is checked
+                    if first == index:
+                        bar = (prices['open'][index], prices['high'][index], prices['low'][index],
+                               prices['close'][index])
+                    else:
+                        bar = (prices['open'][first], prices['high'][first:index + 1].max(),
+                               prices['low'][first:index + 1].min(), prices['close'][index])
+                    self.interface.receive_bar(symbol, bar)
+                self.price_indexes[symbol] = index
 
             # Write this new price into the interface
-            self.interface.receive_price(symbol, new_price=self.prices[symbol][
-                self.price_indexes[symbol]][self.use_price])
+            self.interface.receive_price(symbol, new_price=self.prices[symbol][self.use_price][index])
 
         # Check has_data here also
         if self.time > self.user_stop:
@@ -785,10 +910,7 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
         if not self.backtesting:
             return
 
-        available_dict, no_trade_dict = self.format_account_data(self.interface, self.time)
-
-        self.traded_account_values.append(available_dict)
-        self.no_trade_account_values.append(no_trade_dict)
+        self.__record_account_value(self.time)
 
     # TODO this class should be constructed with a BacktestConfiguration object
     def run(self,
@@ -855,24 +977,35 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
         use_price = self.preferences['settings']['use_price']
         self.use_price = use_price
 
+        fill_model = self.preferences['settings']['fill_model']
+        if fill_model == 'price':
+            self.interface.intrabar_path = None
+        elif fill_model == 'ohlc':
+            intrabar_path = self.preferences['settings']['intrabar_path']
+            if intrabar_path not in ('nearest', 'high_first', 'low_first'):
+                raise ValueError(f"Unknown intrabar path \"{intrabar_path}\". Use \"nearest\", \"high_first\" or "
+                                 f"\"low_first\".")
+            self.interface.intrabar_path = intrabar_path
+        else:
+            raise ValueError(f"Unknown fill model \"{fill_model}\". Use \"price\" or \"ohlc\".")
+        self.interface.frame['bars'] = {}
+
         for frame_symbol, price_list in self.prices.items():
-            # This is a list of dictionaries
-            frame = price_list  # type: list
+            # This is a dictionary of price columns
+            frame = price_list  # type: dict
 
             # Be sure to push these initial prices to the strategy
             try:
-                self.interface.receive_price(frame_symbol, frame[0][use_price])
+                self.interface.receive_price(frame_symbol, frame[use_price][0])
             except IndexError:
                 def check_if_any_column_has_prices(price_dict: dict) -> bool:
                     """
                     In dictionary of symbols, check if at least one key has data
                     """
                     for j in price_dict:
-                        # This handles the weird types
-                        if len(price_dict[j]) == 0:
+                        if len(price_dict[j]['time']) == 0:
                             return False
-                        if not price_dict[j].empty:
-                            return True
+                        return True
                     return False
 
                 if not check_if_any_column_has_prices(self.prices):
@@ -893,7 +1026,7 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
             self.initial_time = copy.copy(self.user_start)
             self.interface.initial_time = self.initial_time
 
-        if self.prices == {} and self.events == []:
+        if self.prices == {} and self.next_event is None:
             raise ValueError("No data given. "
                              "Try setting an argument such as to='1y' in the .backtest() command.\n"
                              "Example: strategy.backtest(to='1y')")
@@ -926,11 +1059,14 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
 
         no_trade_cycle_status = pd.DataFrame(columns=column_keys)
 
+        # Account values are written into columns as the backtest runs
+        self.traded_account_values = AccountHistory()
+        self.no_trade_account_values = AccountHistory()
+        self.__plan_valuation()
+
         # Add an initial account row here
         if self.preferences['settings']['save_initial_account_value']:
-            available_dict, no_trade_dict = self.format_account_data(self.interface, self.user_start)
-            self.traded_account_values.append(available_dict)
-            self.no_trade_account_values.append(no_trade_dict)
+            self.__record_account_value(self.user_start)
 
         print("\nBacktesting...")
 
@@ -949,13 +1085,13 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
         self.time = None
 
         # Push the accounts to the dataframe
-        cycle_status = pd.concat([cycle_status, pd.DataFrame(self.traded_account_values)],
+        cycle_status = pd.concat([cycle_status, self.traded_account_values.to_frame()],
                                  ignore_index=True).sort_values(by=['time'])
 
         if len(cycle_status) == 0:
             raise RuntimeError("Empty result - no valid backtesting events occurred. Was there an error?.")
 
-        no_trade_cycle_status = pd.concat([no_trade_cycle_status, pd.DataFrame(self.no_trade_account_values)],
+        no_trade_cycle_status = pd.concat([no_trade_cycle_status, self.no_trade_account_values.to_frame()],
                                           ignore_index=True).sort_values(by=['time'])
 
         def is_number(s):
@@ -969,7 +1105,6 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
         history_and_returns: dict = {
             'history': cycle_status
         }
-        metrics_indicators = {}
         user_callbacks = {}
 
         result_object = BacktestResult(history_and_returns, {
@@ -989,91 +1124,9 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
 
         interval_value = time_interval_to_seconds(resample_to)
 
-        # This is where we run the actual resample
-        resampled_account_data_frame = result_object.resample_account('Account Value (' + self.quote_currency + ')',
-                                                                      interval_value)
-
-        history_and_returns['resampled_account_value'] = resampled_account_data_frame
-
-        returns = resampled_account_data_frame.copy(deep=True)
-
-        # Default diff parameters should do it
-        returns['value'] = returns['value'].pct_change()
-
-        # Now write it to our dictionary
-        history_and_returns['returns'] = returns
-
-        # -----=====*****=====-----
-        metrics_indicators['Compound Annual Growth Rate (%)'] = metrics.cagr(history_and_returns)
-        try:
-            metrics_indicators['Cumulative Returns (%)'] = metrics.cum_returns(history_and_returns)
-        except ZeroDivisionError as e_:
-            metrics_indicators['Cumulative Returns (%)'] = f'failed: {e_}'
-
-        def attempt(math_callable: typing.Callable, dict_of_dataframes: dict, kwargs_: dict = None):
-            try:
-                if kwargs_ is None:
-                    kwargs_ = {}
-                result = math_callable(dict_of_dataframes, **kwargs_)
-                if isinstance(result, (float, np.floating)) and np.isnan(result):
-                    result = None
-                return result
-            except (ZeroDivisionError, Exception) as e__:
-                return f'failed: {e__}'
-
-        risk_free_return_rate = self.preferences['settings']["risk_free_return_rate"]
-        metrics_indicators['Max Drawdown (%)'] = attempt(metrics.max_drawdown, history_and_returns)
-        metrics_indicators['Variance (%)'] = attempt(metrics.variance, history_and_returns,
-                                                     {'trading_period': interval_value})
-        metrics_indicators['Sortino Ratio'] = attempt(metrics.sortino, history_and_returns,
-                                                      {'risk_free_rate': risk_free_return_rate,
-                                                       'trading_period': interval_value})
-        metrics_indicators['Sharpe Ratio'] = attempt(metrics.sharpe, history_and_returns,
-                                                     {'risk_free_rate': risk_free_return_rate,
-                                                      'trading_period': interval_value})
-        metrics_indicators['Calmar Ratio'] = attempt(metrics.calmar, history_and_returns,
-                                                     {'trading_period': interval_value})
-        metrics_indicators['Volatility'] = attempt(metrics.volatility, history_and_returns,
-                                                   {'trading_period': interval_value})
-        metrics_indicators['Value-at-Risk'] = attempt(metrics.var, history_and_returns)
-        metrics_indicators['Conditional Value-at-Risk'] = attempt(metrics.cvar, history_and_returns)
-
-        # Add risk-free-return rate to dictionary
-        metrics_indicators['Risk Free Return Rate'] = risk_free_return_rate
-        # metrics_indicators['beta'] = attempt(metrics.beta, dataframes)
-        # Add the interval value to dictionary
-        metrics_indicators['Resampled Time'] = interval_value
-        # -----=====*****=====-----
-
-        # If a benchmark was requested, add it to the pd_prices frame
-        if benchmark_symbol is not None:
-            # Resample the benchmark results
-            resampled_benchmark_value = result_object.resample_account(benchmark_symbol,
-                                                                       interval_value,
-                                                                       use_asset_history=True,
-                                                                       use_price=use_price)
-
-            # Push data into the dictionary for use by the metrics
-            history_and_returns['benchmark_value'] = resampled_benchmark_value
-            history_and_returns['benchmark_returns'] = resampled_benchmark_value.copy(deep=True)
-            history_and_returns['benchmark_returns']['value'] = history_and_returns['benchmark_returns'][
-                'value'].pct_change()
-
-            # Calculate beta
-            metrics_indicators['Beta'] = attempt(metrics.beta, history_and_returns,
-                                                 {"trading_period": interval_value})
-
-        # Remove NaN values here
-        history_and_returns['resampled_account_value'] = history_and_returns['resampled_account_value']. \
-            where(history_and_returns['resampled_account_value'].notnull(), None)
-
-        # Remove NaN values on this one too
-        history_and_returns['returns'] = history_and_returns['returns'].where(history_and_returns['returns'].notnull(),
-                                                                              None)
-        # Lastly remove Nan values in the metrics
-        for symbol in metrics_indicators:
-            if not isinstance(metrics_indicators[symbol], str) and np.isnan(metrics_indicators[symbol]):
-                metrics_indicators[symbol] = None
+        metrics_indicators = metrics.backtest_metrics(result_object, interval_value,
+                                                      self.preferences['settings']["risk_free_return_rate"],
+                                                      benchmark_symbol, use_price)
 
         # Assign all these new values back to the result object
         result_object.history_and_returns = history_and_returns
@@ -15,6 +15,7 @@
     You should have received a copy of the GNU Lesser General Public License
     along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
+import numpy as np
 import pandas as pd
 from pandas import DataFrame, to_datetime, Timestamp
 from blankly.utils import time_interval_to_seconds as _time_interval_to_seconds, info_print
@@ -66,66 +67,44 @@ class BacktestResult:
             use_asset_history: Use the history from the assets rather than the account history
             use_price: Specify a price to use when querying comparison columns
         """
-        search_index = 0
-
-        def search_price(values, times, epoch):
-            # In this case because each asset is called individually
-            def search(arr, size, x):
-                # Use a global search index to accelerate search
-                nonlocal search_index
-
-                while True:
-                    if search_index == size:
-                        # Must be the last one in the list
-                        return search_index - 1
-
-                    if len(arr) > 1:
-                        if arr[search_index] <= x <= arr[search_index + 1]:
-                            # Found it in this range
-                            return search_index
-                        else:
-                            search_index += 1
-                    else:
-                        return 0
-            try:
-                # Iterate and find the correct quote price
-                index_ = search(times, len(times), epoch)
-                return values[index_]
-            except KeyError:
-                # Not a currency that we have data for at all
-                return 0
-
-        resampled_array = []
         interval = _time_interval_to_seconds(interval)
 
         if use_asset_history:
             # Find the necessary values to assemble the resamples
-            time_array = self.history[symbol]['time'].tolist()
-            price_array = self.history[symbol][use_price].tolist()
+            times = self.history[symbol]['time']
+            values = self.history[symbol][use_price]
         else:
             # Find the necessary values to assemble the resamples
-            time_array = self.history_and_returns['history']['time'].tolist()
-            price_array = self.history_and_returns['history'][symbol].tolist()
+            times = self.history_and_returns['history']['time']
+            values = self.history_and_returns['history'][symbol]
+        # Asset history is kept as arrays while the account history is a frame
+        times = pd.Series(times).infer_objects().to_numpy()
+        values = np.asarray(values)
 
         # Add the epoch
-        epoch_start = time_array[0]
-        epoch_stop = time_array[-1]
+        epoch_start = times[0]
+        epoch_stop = times[-1]
 
         try:
-            while epoch_start <= epoch_stop:
-                # Append this dict to the array
-                resampled_array.append({
-                    'time': epoch_start,
-                    'value': search_price(price_array, time_array, epoch_start)
-                })
-
-                # Increase the epoch value
-                epoch_start += interval
+            if not epoch_start <= epoch_stop:
+                return DataFrame(columns=['time', 'value'])
+            # Step forward from the start the same way as adding the interval each time, then drop any step that
+            #  rounding carried past the end
+            steps = int((epoch_stop - epoch_start) // interval) + 2
+            resampled_times = np.add.accumulate(np.concatenate(([epoch_start], np.full(steps - 1, interval))))
         except TypeError:
             raise TypeError("No valid account data found, make sure to create valid account value datapoints.")
+        resampled_times = resampled_times[resampled_times <= epoch_stop]
+        if len(resampled_times) == 1:
+            # The interval was never added so the time keeps its own type
+            resampled_times = times[:1]
+
+        # Each step takes the value from the start of the range of times that it falls in, where the ranges include
+        #  both of their ends
+        index = np.maximum(np.searchsorted(times, resampled_times, side='left') - 1, 0)
 
         # Turn that resample into a dataframe
-        return DataFrame(resampled_array, columns=['time', 'value'])
+        return DataFrame({'time': resampled_times, 'value': values[index]}).infer_objects()
 
     def get_quantstats_metrics(self):
         try:
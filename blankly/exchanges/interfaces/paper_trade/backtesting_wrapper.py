@@ -23,13 +23,19 @@ class BacktestingWrapper:
         self.backtesting = False
         self.frame = {
             'prices': {},
+            # Each new (open, high, low, close) bar since limits were last evaluated
+            'bars': {},
             'time': 0
         }
+        # How limit orders assume prices move inside each bar. None fills them on the tick price alone
+        self.intrabar_path = None
 
         # Use this in the inits
         self.initial_time = None
 
         self.full_prices = {}
+        # Sorted time columns matching full_prices for binary searching history windows
+        self.full_price_times = {}
 
     def set_backtesting(self, status: bool):
         self.backtesting = status
@@ -40,7 +46,20 @@ class BacktestingWrapper:
     def receive_price(self, asset_id, new_price):
         self.frame['prices'][asset_id] = new_price
 
+    def receive_bar(self, asset_id, bar: tuple):
+        self.frame['bars'][asset_id] = bar
+
     def receive_price_cache(self, prices: dict):
+        self.full_price_times = {}
+        for symbol in prices:
+            self.full_price_times[symbol] = {}
+            for resolution in prices[symbol]:
+                # The index is only valid if the frame is sorted
+                if not prices[symbol][resolution]['time'].is_monotonic_increasing:
+                    prices[symbol][resolution] = prices[symbol][resolution].sort_values(by=['time'],
+                                                                                        ignore_index=True)
+                self.full_price_times[symbol][resolution] = prices[symbol][resolution]['time'].to_numpy()
+
         self.full_prices = prices
 
     """
@@ -53,6 +72,12 @@ class BacktestingWrapper:
         except KeyError:
             raise KeyError(f"Price not found in recent frame. Have prices for {asset_id} been downloaded?")
 
+    def get_price_symbol(self, asset_id: str) -> str:
+        """
+        The symbol that prices are kept under for an asset or pair
+        """
+        return asset_id
+
     def time(self):
         if self.backtesting:
             return self.frame['time']
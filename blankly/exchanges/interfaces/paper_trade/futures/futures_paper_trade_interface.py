@@ -219,10 +219,20 @@ class FuturesPaperTradeInterface(FuturesExchangeInterface, BacktestingWrapper):
         print(f'failed to download funding rate at time {time}')
         return 0.0001, time + (time % self.get_funding_rate_resolution())
 
+    @property
+    def account_balances(self) -> dict:
+        # The paper account itself rather than a copy, so that backtests can read balances quickly
+        return self.paper_account
+
+    def get_price_symbol(self, asset_id: str) -> str:
+        # Contracts are priced using the underlying symbol
+        if asset_id.endswith('-PERP'):
+            quote = self._quote_map[asset_id]
+            asset_id = asset_id.split('-')[0] + '-' + quote
+        return asset_id
+
     def get_price(self, symbol: str) -> float:
-        if symbol.endswith('-PERP'):
-            quote = self._quote_map[symbol]
-            symbol = symbol.split('-')[0] + '-' + quote
+        symbol = self.get_price_symbol(symbol)
         if self.backtesting:
             return self.get_backtesting_price(symbol)
         else:
@@ -236,7 +246,8 @@ class FuturesPaperTradeInterface(FuturesExchangeInterface, BacktestingWrapper):
 
     def get_product_history(self, symbol, epoch_start, epoch_stop, resolution):
         if self.backtesting:
-            return utils.extract_price_by_resolution(self.full_prices, symbol, epoch_start, epoch_stop, resolution)
+            return utils.extract_price_by_resolution(self.full_prices, symbol, epoch_start, epoch_stop, resolution,
+                                                    time_index=self.full_price_times)
         else:
             return self.interface.get_product_history(symbol, epoch_start, epoch_stop, resolution)
 
@@ -15,6 +15,9 @@
     You should have received a copy of the GNU Lesser General Public License
     along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
+import typing
+
+import numpy as np
 
 import blankly.metrics as metrics
 from blankly.utils.time_builder import build_year
@@ -102,3 +105,110 @@ def cvar(backtest_data):
 def max_drawdown(backtest_data):
     values = backtest_data['returns']['value']
     return abs(round(metrics.max_drawdown(values), 2)) * 100
+
+
+def __attempt(math_callable: typing.Callable, dict_of_dataframes: dict, kwargs_: dict = None):
+    try:
+        if kwargs_ is None:
+            kwargs_ = {}
+        result = math_callable(dict_of_dataframes, **kwargs_)
+        if isinstance(result, (float, np.floating)) and np.isnan(result):
+            result = None
+        return result
+    except (ZeroDivisionError, Exception) as e__:
+        return f'failed: {e__}'
+
+
+def backtest_metrics(result, interval_value: float, risk_free_return_rate: float, benchmark_symbol: str = None,
+                     use_price: str = None) -> dict:
+    """
+    Resample the account value of a finished backtest and calculate every metric from it. The resampled account
+    value, the returns and any benchmark are written into the history_and_returns of the result.
+
+    Args:
+        result: The BacktestResult holding the account history
+        interval_value: The number of seconds between each resampled account value
+        risk_free_return_rate: The theoretical rate of return with no risk
+        benchmark_symbol: A symbol in the price history of the result to compare against
+        use_price: The price column of the benchmark to use
+    Returns:
+        A dictionary of metric names to values
+    """
+    history_and_returns = result.history_and_returns
+    metrics_indicators = {}
+
+    # This is where we run the actual resample
+    resampled_account_data_frame = result.resample_account('Account Value (' + result.quote_currency + ')',
+                                                           interval_value)
+
+    history_and_returns['resampled_account_value'] = resampled_account_data_frame
+
+    returns = resampled_account_data_frame.copy(deep=True)
+
+    # Default diff parameters should do it
+    returns['value'] = returns['value'].pct_change()
+
+    # Now write it to our dictionary
+    history_and_returns['returns'] = returns
+
+    # -----=====*****=====-----
+    metrics_indicators['Compound Annual Growth Rate (%)'] = cagr(history_and_returns)
+    try:
+        metrics_indicators['Cumulative Returns (%)'] = cum_returns(history_and_returns)
+    except ZeroDivisionError as e_:
+        metrics_indicators['Cumulative Returns (%)'] = f'failed: {e_}'
+
+    metrics_indicators['Max Drawdown (%)'] = __attempt(max_drawdown, history_and_returns)
+    metrics_indicators['Variance (%)'] = __attempt(variance, history_and_returns,
+                                                   {'trading_period': interval_value})
+    metrics_indicators['Sortino Ratio'] = __attempt(sortino, history_and_returns,
+                                                    {'risk_free_rate': risk_free_return_rate,
+                                                     'trading_period': interval_value})
+    metrics_indicators['Sharpe Ratio'] = __attempt(sharpe, history_and_returns,
+                                                   {'risk_free_rate': risk_free_return_rate,
+                                                    'trading_period': interval_value})
+    metrics_indicators['Calmar Ratio'] = __attempt(calmar, history_and_returns,
+                                                   {'trading_period': interval_value})
+    metrics_indicators['Volatility'] = __attempt(volatility, history_and_returns,
+                                                 {'trading_period': interval_value})
+    metrics_indicators['Value-at-Risk'] = __attempt(var, history_and_returns)
+    metrics_indicators['Conditional Value-at-Risk'] = __attempt(cvar, history_and_returns)
+
+    # Add risk-free-return rate to dictionary
+    metrics_indicators['Risk Free Return Rate'] = risk_free_return_rate
+    # metrics_indicators['beta'] = attempt(metrics.beta, dataframes)
+    # Add the interval value to dictionary
+    metrics_indicators['Resampled Time'] = interval_value
+    # -----=====*****=====-----
+
+    # If a benchmark was requested, add it to the pd_prices frame
+    if benchmark_symbol is not None:
+        # Resample the benchmark results
+        resampled_benchmark_value = result.resample_account(benchmark_symbol,
+                                                            interval_value,
+                                                            use_asset_history=True,
+                                                            use_price=use_price)
+
+        # Push data into the dictionary for use by the metrics
+        history_and_returns['benchmark_value'] = resampled_benchmark_value
+        history_and_returns['benchmark_returns'] = resampled_benchmark_value.copy(deep=True)
+        history_and_returns['benchmark_returns']['value'] = history_and_returns['benchmark_returns'][
+            'value'].pct_change()
+
+        # Calculate beta
+        metrics_indicators['Beta'] = __attempt(beta, history_and_returns,
+                                               {"trading_period": interval_value})
+
+    # Remove NaN values here
+    history_and_returns['resampled_account_value'] = history_and_returns['resampled_account_value']. \
+        where(history_and_returns['resampled_account_value'].notnull(), None)
+
+    # Remove NaN values on this one too
+    history_and_returns['returns'] = history_and_returns['returns'].where(history_and_returns['returns'].notnull(),
+                                                                          None)
+    # Lastly remove Nan values in the metrics
+    for symbol in metrics_indicators:
+        if isinstance(metrics_indicators[symbol], (float, np.floating)) and np.isnan(metrics_indicators[symbol]):
+            metrics_indicators[symbol] = None
+
+    return metrics_indicators
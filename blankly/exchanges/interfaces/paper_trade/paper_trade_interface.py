@@ -16,9 +16,12 @@
     along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
+import bisect
+import math
 import threading
 import time
 import traceback
+import typing
 import warnings
 
 import blankly.exchanges.interfaces.paper_trade.utils as paper_trade
@@ -27,6 +30,7 @@ from blankly.exchanges.interfaces.paper_trade.local_account.trade_local import L
 from blankly.exchanges.interfaces.abc_exchange_interface import ABCExchangeInterface
 from blankly.exchanges.interfaces.exchange_interface import ExchangeInterface
 from blankly.exchanges.interfaces.paper_trade.backtesting_wrapper import BacktestingWrapper
+from blankly.exchanges.interfaces.price_request import AsyncPriceSource, PriceRequest
 from blankly.exchanges.orders.limit_order import LimitOrder
 from blankly.exchanges.orders.market_order import MarketOrder
 from blankly.exchanges.orders.stop_loss import StopLossOrder
@@ -34,10 +38,18 @@ from blankly.exchanges.orders.take_profit import TakeProfitOrder
 from blankly.utils.exceptions import APIException, InvalidOrder
 
 
-class PaperTradeInterface(ExchangeInterface, BacktestingWrapper):
+class PaperTradeInterface(ExchangeInterface, BacktestingWrapper, AsyncPriceSource):
     def __init__(self, derived_interface: ABCExchangeInterface, initial_account_values: dict = None):
         # This paper trade orders keeps a live track of the orders
         self.paper_trade_orders = []
+        # Pending limit & stop orders are also filed by symbol into ladders sorted on their trigger price
+        self.__order_ladders = {}
+        self.__open_orders = {}
+        # The ladders are shared with the watchdog thread when paper trading live
+        self.__ladder_lock = threading.Lock()
+        self.__order_count = 0
+        self.__evaluated_order_count = 0
+        self.__limit_decimals_cache = {}
         # These two keep track of which limit orders and when the order finishes
         self.canceled_orders = []
         self.executed_orders = []
@@ -107,6 +119,11 @@ class PaperTradeInterface(ExchangeInterface, BacktestingWrapper):
         else:
             return self.__local_account_cache
 
+    @property
+    def account_balances(self) -> dict:
+        # The local account itself rather than a copy, so that backtests can read balances quickly
+        return self.local_account.local_account
+
     def evaluate_traded_account_assets(self):
         # Because alpaca has so many columns we need to optimize to perform an accurate backtest
         accounts = self.get_account()
@@ -205,31 +222,156 @@ class PaperTradeInterface(ExchangeInterface, BacktestingWrapper):
                 })
         self.local_account.override_local_account(current_account)
 
+    def __open_order(self, order: dict):
+        """
+        File a new pending limit or stop order onto the ladder for its symbol. Ladders are sorted by trigger price so
+        that each evaluation only touches the orders that fill at the current price
+
+        Args:
+            order (dict): The pending order response, which is also kept in paper_trade_orders
+        """
+        if order['side'] == 'buy':
+            ladder = 'buy'
+        elif order['type'] == 'stop_loss':
+            ladder = 'stop_loss'
+        else:
+            ladder = 'sell'
+        with self.__ladder_lock:
+            if order['symbol'] not in self.__order_ladders:
+                self.__order_ladders[order['symbol']] = {'buy': [], 'sell': [], 'stop_loss': []}
+
+            # The sequence number keeps fills in the order the orders were created
+            entry = (order['price'], self.__order_count, order)
+            self.__order_count += 1
+            bisect.insort(self.__order_ladders[order['symbol']][ladder], entry)
+            self.__open_orders[order['id']] = (ladder, entry)
+
+    def __close_order(self, order: dict):
+        """
+        Take a pending order off its ladder. The ladder lock must be held
+        """
+        ladder, entry = self.__open_orders.pop(order['id'])
+        ladder = self.__order_ladders[order['symbol']][ladder]
+        del ladder[bisect.bisect_left(ladder, entry[:2])]
+        if not any(self.__order_ladders[order['symbol']].values()):
+            del self.__order_ladders[order['symbol']]
+
+    @staticmethod
+    def __split_ladder(ladder: list, start: int, stop: int, before: float) -> list:
+        """
+        Remove and return the entries in a slice of the ladder that were created before the given sequence number
+        """
+        triggered = [entry for entry in ladder[start:stop] if entry[1] < before]
+        if len(triggered) == stop - start:
+            del ladder[start:stop]
+        else:
+            ladder[start:stop] = [entry for entry in ladder[start:stop] if entry[1] >= before]
+        return triggered
+
+    def __pop_triggered_orders(self, symbol: str, current_price: float, before: float = math.inf) -> list:
+        """
+        Remove and return the ladder entries for a symbol which fill at the current price
+
+        Args:
+            symbol: The symbol of the ladders to check
+            current_price: The price to fill against
+            before: Only orders with a sequence number below this can fill
+
+        The ladder lock must be held
+        """
+        ladders = self.__order_ladders[symbol]
+        triggered = []
+
+        # Buys fill when the limit is above the price
+        buys = ladders['buy']
+        split = bisect.bisect_right(buys, (current_price, math.inf))
+        triggered += self.__split_ladder(buys, split, len(buys), before)
+
+        # Sells fill when the limit is below the price
+        sells = ladders['sell']
+        split = bisect.bisect_left(sells, (current_price, -1))
+        triggered += self.__split_ladder(sells, 0, split, before)
+
+        # Stops fill when the price falls to or below the stop
+        stops = ladders['stop_loss']
+        split = bisect.bisect_left(stops, (current_price, -1))
+        triggered += self.__split_ladder(stops, split, len(stops), before)
+
+        for entry in triggered:
+            del self.__open_orders[entry[2]['id']]
+        if not (buys or sells or stops):
+            del self.__order_ladders[symbol]
+        return triggered
+
+    def __intrabar_path(self, bar: tuple) -> list:
+        """
+        The prices a bar is assumed to move through before its close, based on the intrabar path setting
+        """
+        open_, high, low, _ = bar
+        if self.intrabar_path == 'high_first':
+            return [open_, high, low]
+        elif self.intrabar_path == 'low_first':
+            return [open_, low, high]
+        # Otherwise go to whichever extreme is nearest the open first
+        return [open_, high, low] if high - open_ <= open_ - low else [open_, low, high]
+
+    def __get_limit_decimals(self, symbol: str) -> dict:
+        # The increments don't change while running so the decimals are only found once per symbol
+        if symbol not in self.__limit_decimals_cache:
+            market_limits = self.get_order_filter(symbol)
+            self.__limit_decimals_cache[symbol] = {
+                'quantity_decimals': self.__get_decimals(market_limits['limit_order']['base_increment']),
+                'quote_decimals': self.__get_decimals(market_limits['market_order']['quote_increment'])
+            }
+        return self.__limit_decimals_cache[symbol]
+
     def evaluate_limits(self):
         """
         When this is run it checks the local paper trade orders to see if any need to go through
+
+        In a backtest with an intrabar path set, orders that were open before the newest bar arrived are first checked
+        against its open, high and low in the order given by the path. Orders that the open gaps through fill at the
+        open, the rest fill at their own price.
         """
-        used_currencies = []
-        for i in self.paper_trade_orders:
-            if i["symbol"] not in used_currencies:
-                used_currencies.append(i['symbol'])
+        with self.__ladder_lock:
+            # Orders created after this point are new for the next evaluation
+            placed_before = self.__evaluated_order_count
+            self.__evaluated_order_count = self.__order_count
+            symbols = list(self.__order_ladders)
+
+        bars = self.frame['bars']
+        self.frame['bars'] = {}
+        if not symbols:
+            return
+
+        # Orders can be canceled while the prices are fetched, so the ladders are checked again afterwards
         prices = {}
-
-        decimals_dict = {}
-        # get the market limits so that we can get accurate rounding
-        for i in used_currencies:
-            market_limits = self.get_order_filter(i)
-            decimals_dict[i] = {}
-            decimals_dict[i]['quantity_decimals'] = self.__get_decimals(market_limits['limit_order']['base_increment'])
-            decimals_dict[i]['quote_decimals'] = self.__get_decimals(market_limits['market_order']['quote_increment'])
-
-        for i in used_currencies:
+        for i in symbols:
             prices[i] = self.get_price(i)
             if not self.backtesting:
                 time.sleep(.2)
 
-        for i in range(len(self.paper_trade_orders)):
-            index = self.paper_trade_orders[i]
+        # Fills are tuples of (path step, sequence number, order, fill price)
+        triggered = []
+        with self.__ladder_lock:
+            for symbol, current_price in prices.items():
+                path = []
+                if self.backtesting and self.intrabar_path is not None and symbol in bars:
+                    path = self.__intrabar_path(bars[symbol])
+
+                for step, price in enumerate(path):
+                    if symbol not in self.__order_ladders:
+                        break
+                    for _, sequence, order in self.__pop_triggered_orders(symbol, price, placed_before):
+                        # Anything that fills on the open gapped through its price
+                        triggered.append((step, sequence, order, price if step == 0 else order['price']))
+
+                if symbol in self.__order_ladders:
+                    for _, sequence, order in self.__pop_triggered_orders(symbol, current_price):
+                        triggered.append((len(path), sequence, order, order['price']))
+        triggered.sort(key=lambda fill: fill[:2])
+
+        for _, _, index, fill_price in triggered:
             """
             Coinbase pro example
             {
@@ -250,81 +392,58 @@ class PaperTradeInterface(ExchangeInterface, BacktestingWrapper):
                 "settled": false
             }
             """
-            if index['type'] in ('limit', 'stop_loss') and index['status'] == 'pending':
-                current_price = prices[index['symbol']]
-                limit_price = index['price']
-
-                if index['side'] == 'buy':
-                    if index['price'] > current_price:
-                        # Take everything off hold
-                        asset_id = index['symbol']
-                        quote = utils.get_quote_asset(asset_id)
-
-                        available = self.local_account.get_account(quote)['available']
-                        # Put it back into available
-                        self.local_account.update_available(quote, available + (index['size'] * index['price']))
-
-                        # Take it out of hold
-                        hold = self.local_account.get_account(quote)['hold']
-                        self.local_account.update_hold(quote, hold - (index['size'] * index['price']))
-
-                        order, funds, executed_value, fill_fees, filled_size = self.evaluate_paper_trade(index,
-                                                                                                         index['price'])
-                        self.local_account.trade_local(symbol=index['symbol'],
-                                                       side='buy',
-                                                       base_delta=filled_size,  # Gain filled size after fees
-                                                       quote_delta=funds * -1,  # Loose the original fund amount
-                                                       base_resolution=decimals_dict[index['symbol']]
-                                                       ['quantity_decimals'],
-                                                       quote_resolution=decimals_dict[index['symbol']]
-                                                       ['quote_decimals'])
-                        order['status'] = 'done'
-                        order['settled'] = 'true'
-
-                        # Add this to the executed orders
-                        self.executed_orders.append({
-                            'id': index['id'],
-                            'executed_time': self.time(),
-                        })
-
-                        self.paper_trade_orders[i] = order
-                elif index['side'] == 'sell':
-                    if limit_price < current_price and index['type'] == 'limit' \
-                            or current_price <= limit_price and index['type'] == 'stop_loss':
-                        # Take everything off hold
-
-                        asset_id = index['symbol']
-                        base = utils.get_base_asset(asset_id)
-
-                        available = self.local_account.get_account(base)['available']
-                        # Put it back into available
-                        self.local_account.update_available(base, available + index['size'])
-
-                        # Remove it from hold
-                        hold = self.local_account.get_account(base)['hold']
-                        self.local_account.update_hold(base, hold - index['size'])
-
-                        order, funds, executed_value, fill_fees, filled_size = self.evaluate_paper_trade(index,
-                                                                                                         index['price'])
-                        self.local_account.trade_local(symbol=index['symbol'],
-                                                       side='sell',
-                                                       base_delta=float(order['size'] * - 1),
-                                                       # Loose size before any fees
-                                                       quote_delta=executed_value,  # Executed value after fees
-                                                       base_resolution=decimals_dict[index['symbol']]
-                                                       ['quantity_decimals'],
-                                                       quote_resolution=decimals_dict[index['symbol']]['quote_decimals']
-                                                       )
-                        order['status'] = 'done'
-                        order['settled'] = 'true'
-
-                        # Add this to the executed orders
-                        self.executed_orders.append({
-                            'id': index['id'],
-                            'executed_time': self.time(),
-                        })
-
-                        self.paper_trade_orders[i] = order
+            decimals = self.__get_limit_decimals(index['symbol'])
+            if index['side'] == 'buy':
+                # Take everything off hold
+                asset_id = index['symbol']
+                quote = utils.get_quote_asset(asset_id)
+
+                available = self.local_account.get_account(quote)['available']
+                # Put it back into available
+                self.local_account.update_available(quote, available + (index['size'] * index['price']))
+
+                # Take it out of hold
+                hold = self.local_account.get_account(quote)['hold']
+                self.local_account.update_hold(quote, hold - (index['size'] * index['price']))
+
+                order, funds, executed_value, fill_fees, filled_size = self.evaluate_paper_trade(index, fill_price)
+                self.local_account.trade_local(symbol=index['symbol'],
+                                               side='buy',
+                                               base_delta=filled_size,  # Gain filled size after fees
+                                               quote_delta=funds * -1,  # Loose the original fund amount
+                                               base_resolution=decimals['quantity_decimals'],
+                                               quote_resolution=decimals['quote_decimals'])
+            else:
+                # Take everything off hold
+                asset_id = index['symbol']
+                base = utils.get_base_asset(asset_id)
+
+                available = self.local_account.get_account(base)['available']
+                # Put it back into available
+                self.local_account.update_available(base, available + index['size'])
+
+                # Remove it from hold
+                hold = self.local_account.get_account(base)['hold']
+                self.local_account.update_hold(base, hold - index['size'])
+
+                order, funds, executed_value, fill_fees, filled_size = self.evaluate_paper_trade(index, fill_price)
+                self.local_account.trade_local(symbol=index['symbol'],
+                                               side='sell',
+                                               base_delta=float(order['size'] * - 1),
+                                               # Loose size before any fees
+                                               quote_delta=executed_value,  # Executed value after fees
+                                               base_resolution=decimals['quantity_decimals'],
+                                               quote_resolution=decimals['quote_decimals'])
+            # The order dictionary is shared with paper_trade_orders, which keeps it as a record once it's done
+            order['status'] = 'done'
+            order['settled'] = 'true'
+
+            # Add this to the executed orders
+            self.executed_orders.append({
+                'id': index['id'],
+                'executed_time': self.time(),
+                'executed_price': fill_price
+            })
 
     def evaluate_paper_trade(self, order, current_price):
         """
@@ -621,6 +740,7 @@ class PaperTradeInterface(ExchangeInterface, BacktestingWrapper):
             self.local_account.update_hold(base, hold + size)
         else:
             raise APIException(f"Invalid side {side}")
+        self.__open_order(response)
         # TODO this is super stinky but refactoring this code is even stinkier
         return StopLossOrder(order, response, self) if stop_loss else LimitOrder(order, response, self)
 
@@ -629,16 +749,15 @@ class PaperTradeInterface(ExchangeInterface, BacktestingWrapper):
         This block could potentially work for both exchanges
         """
         del symbol
-        order_index = None
-        for i in range(len(self.paper_trade_orders)):
-            index = self.paper_trade_orders[i]
-            if index['status'] == 'pending' and index['id'] == order_id:
-                order_index = i
-                break
+        with self.__ladder_lock:
+            # The watchdog can fill the order right up until it's taken off the ladder
+            open_order = self.__open_orders.get(order_id)
+            if open_order is not None:
+                self.__close_order(open_order[1][2])
 
-        if order_index is not None:
+        if open_order is not None:
             # Now that we found it make sure that we move the funds back on available
-            order = self.paper_trade_orders[order_index]
+            order = open_order[1][2]
             side = order['side']
             size = order['size']
             symbol = order['symbol']
@@ -668,21 +787,19 @@ class PaperTradeInterface(ExchangeInterface, BacktestingWrapper):
             # Make sure to save this as a canceled order just before closing it
             # Make sure to write in the time also
             self.canceled_orders.append({
-                'id': self.paper_trade_orders[order_index]['id'],
+                'id': order_id,
                 'canceled_time': self.time()
             })
 
-            del self.paper_trade_orders[order_index]
+            self.paper_trade_orders.remove(order)
             return {"order_id": order_id}
         else:
             raise APIException("Order ID not found.")
 
     def get_open_orders(self, symbol=None):
-        open_orders = []
-        for i in self.paper_trade_orders:
-            if i["status"] == "pending":
-                open_orders.append(i)
-        return open_orders
+        # These are kept in the order they were created
+        with self.__ladder_lock:
+            return [entry[2] for _, entry in self.__open_orders.values()]
 
     def get_order(self, symbol, order_id) -> dict:
         for i in self.paper_trade_orders:
@@ -733,7 +850,8 @@ class PaperTradeInterface(ExchangeInterface, BacktestingWrapper):
 
     def get_product_history(self, symbol, epoch_start, epoch_stop, resolution):
         if self.backtesting:
-            return utils.extract_price_by_resolution(self.full_prices, symbol, epoch_start, epoch_stop, resolution)
+            return utils.extract_price_by_resolution(self.full_prices, symbol, epoch_start, epoch_stop, resolution,
+                                                    time_index=self.full_price_times)
         else:
             return self.calls.get_product_history(symbol, epoch_start, epoch_stop, resolution)
 
@@ -772,6 +890,13 @@ class PaperTradeInterface(ExchangeInterface, BacktestingWrapper):
             else:
                 return self.calls.get_price(symbol)
 
+    def price_request(self, symbol) -> typing.Optional[PriceRequest]:
+        # Only live prices from the API are requested, and only when the underlying venue can describe the request
+        if self.backtesting or self.user_preferences['settings']['paper']['price_source'] == 'websocket' or \
+                not isinstance(self.calls, AsyncPriceSource):
+            return None
+        return self.calls.price_request(symbol)
+
     @staticmethod
     def __evaluate_binance_limits(price: (int, float), order_filter):
         order_filter['limit_order']['min_price'] = order_filter['exchange_specific']['limit_multiplier_down'] * price
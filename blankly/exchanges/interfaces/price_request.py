@@ -0,0 +1,46 @@
+"""
+    Describe a venue's REST price request so it can be awaited instead of blocking a thread
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import abc
+from typing import Callable, Optional
+
+
+class PriceRequest:
+    def __init__(self, url: str, params: Optional[dict], parse: Callable[[dict], float]):
+        """
+        A public GET request that answers with the price of a symbol
+
+        Args:
+            url: The full URL of the ticker endpoint
+            params: The query string of the request, if any
+            parse: Turns the decoded JSON response into the price, raising APIException when the venue sent an error
+        """
+        self.url = url
+        self.params = params
+        self.parse = parse
+
+
+class AsyncPriceSource(abc.ABC):
+    """
+    Mixed into the interface of a venue whose get_price() is a single public REST request
+    """
+    @abc.abstractmethod
+    def price_request(self, symbol: str) -> Optional[PriceRequest]:
+        """
+        The request that get_price(symbol) would make, or None if the price has to come from get_price() itself
+        """
+        pass
@@ -62,13 +62,17 @@ class Websocket(ABCExchangeWebsocket, abc.ABC):
         self.time_feed = collections.deque(maxlen=buffer_size)
 
         self.ws = None
+        # Set when the stream is read over a connection shared with other streams
+        self.multiplexer = None
 
     def start_websocket(self, on_open: callable, on_message: callable, on_error: callable, on_close: callable,
                         target: callable):
         """
         Restart websocket if it was asked to stop.
         """
-        if self.ws is None:
+        if self.multiplexer is not None:
+            self.multiplexer.subscribe(self)
+        elif self.ws is None:
             self.ws = websocket.WebSocketApp(self.url,
                                              on_open=on_open,
                                              on_message=on_message,
@@ -98,6 +102,8 @@ class Websocket(ABCExchangeWebsocket, abc.ABC):
     """ Required in manager """
 
     def is_websocket_open(self):
+        if self.multiplexer is not None:
+            return self.multiplexer.is_subscribed(self)
         if self.thread is not None:
             return self.thread.is_alive()
         else:
@@ -141,7 +147,9 @@ class Websocket(ABCExchangeWebsocket, abc.ABC):
     """ Required in manager """
 
     def close_websocket(self):
-        if self.thread is not None and self.thread.is_alive():
+        if self.multiplexer is not None:
+            self.multiplexer.unsubscribe(self)
+        elif self.thread is not None and self.thread.is_alive():
             self.ws.close()
         else:
             print("Websocket for " + self.symbol + '@' + self.stream + " is already closed")
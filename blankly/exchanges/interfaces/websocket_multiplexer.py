@@ -0,0 +1,263 @@
+"""
+    Share a few websocket connections between many streams
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import abc
+import json
+import threading
+import traceback
+from typing import Optional, Tuple
+
+import websocket
+
+from blankly.utils.utils import info_print
+
+
+class MultiplexProtocol(abc.ABC):
+    def __init__(self, url: str, max_streams: int):
+        """
+        How a venue subscribes to many streams on one connection and tells which stream a message belongs to. Streams
+        are named by the same (symbol, stream) key that their Websocket objects use
+
+        Args:
+            url: The websocket URL that takes combined subscriptions
+            max_streams: The most streams subscribed on a single connection
+        """
+        self.url = url
+        self.max_streams = max_streams
+
+    @abc.abstractmethod
+    def subscribe_messages(self, keys: list) -> list:
+        """
+        The messages to send to subscribe to every key
+        """
+        pass
+
+    @abc.abstractmethod
+    def unsubscribe_messages(self, keys: list) -> list:
+        """
+        The messages to send to stop receiving every key
+        """
+        pass
+
+    @abc.abstractmethod
+    def route(self, message: dict) -> Optional[Tuple[tuple, dict]]:
+        """
+        Find the key that a message is for and the message that the stream itself would have received, or None if
+        the message belongs to the connection and not any one stream
+        """
+        pass
+
+
+class MultiplexedStream(abc.ABC):
+    """
+    Mixed into the Websocket of a venue whose streams can be read over a shared connection
+    """
+    @abc.abstractmethod
+    def multiplex_protocol(self) -> MultiplexProtocol:
+        """
+        The protocol for sharing a connection with other streams from the same venue
+        """
+        pass
+
+    @abc.abstractmethod
+    def process_message(self, message: dict) -> None:
+        """
+        Handle a message that was already decoded, such as one routed from a shared connection
+        """
+        pass
+
+
+class _Connection:
+    def __init__(self, multiplexer, url: str):
+        self.keys = []
+        self.ready = False
+        # Only connections that opened at some point are replaced when they drop
+        self.opened = False
+        self.ws = websocket.WebSocketApp(url,
+                                         on_open=self.on_open,
+                                         on_message=multiplexer.on_message,
+                                         on_error=self.on_error,
+                                         on_close=self.on_close)
+        self.__multiplexer = multiplexer
+        self.thread = threading.Thread(target=self.ws.run_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def is_alive(self) -> bool:
+        # Connections are added before their thread is started
+        return self.thread.ident is None or self.thread.is_alive()
+
+    def send(self, messages: list):
+        for message in messages:
+            self.ws.send(message)
+
+    def on_open(self, ws):
+        with self.__multiplexer.lock:
+            self.ready = True
+            self.opened = True
+            keys = list(self.keys)
+        if keys:
+            self.send(self.__multiplexer.protocol.subscribe_messages(keys))
+
+    def on_error(self, ws, error):
+        info_print(error)
+
+    def on_close(self, ws, *args):
+        self.ready = False
+        self.__multiplexer.on_connection_close(self)
+
+
+class WebsocketMultiplexer:
+    def __init__(self, protocol: MultiplexProtocol):
+        """
+        Read many streams over as few connections as the venue allows. Each message is handed to the Websocket that
+        subscribed to its stream, which then runs its feeds and callbacks the same as it would on its own connection
+
+        Args:
+            protocol: The venue's MultiplexProtocol
+        """
+        self.protocol = protocol
+        self.lock = threading.Lock()
+        self.__connections = []
+        # (symbol, stream) -> (Websocket, _Connection)
+        self.__routes = {}
+
+    def subscribe(self, websocket_) -> None:
+        """
+        Start reading a Websocket's stream over a shared connection. This does nothing if it's already subscribed
+        """
+        key = (websocket_.symbol, websocket_.stream)
+        websocket_.multiplexer = self
+        with self.lock:
+            route = self.__routes.get(key)
+            if route is not None and route[1].is_alive():
+                return
+            # A connection that died before its close was handled has every one of its streams moved
+            orphans = [] if route is None else self.__drop_connection(route[1])
+
+            connection = None
+            for i in self.__connections:
+                if len(i.keys) < self.protocol.max_streams and i.is_alive():
+                    connection = i
+                    break
+            start = connection is None
+            if start:
+                connection = _Connection(self, self.protocol.url)
+                self.__connections.append(connection)
+
+            connection.keys.append(key)
+            self.__routes[key] = (websocket_, connection)
+            # Connections that haven't opened yet subscribe to all of their keys when they open
+            send_now = connection.ready
+
+        if start:
+            connection.start()
+        elif send_now:
+            connection.send(self.protocol.subscribe_messages([key]))
+
+        for orphan in orphans:
+            if orphan is not websocket_:
+                self.subscribe(orphan)
+
+    def unsubscribe(self, websocket_) -> None:
+        """
+        Stop reading a Websocket's stream. Connections without any streams left are closed
+        """
+        key = (websocket_.symbol, websocket_.stream)
+        with self.lock:
+            try:
+                _, connection = self.__routes.pop(key)
+            except KeyError:
+                print("Websocket for " + websocket_.symbol + '@' + websocket_.stream + " is already closed")
+                return
+            connection.keys.remove(key)
+            close = len(connection.keys) == 0
+            if close:
+                self.__connections.remove(connection)
+            send_now = connection.ready and not close
+
+        if close:
+            connection.ws.close()
+        elif send_now:
+            connection.send(self.protocol.unsubscribe_messages([key]))
+
+    def __drop_connection(self, connection: _Connection) -> list:
+        """
+        Forget a connection and the routes on it, returning the Websockets that were reading from it. The lock must
+        be held
+        """
+        if connection in self.__connections:
+            self.__connections.remove(connection)
+        websockets = []
+        for key in connection.keys:
+            route = self.__routes.get(key)
+            if route is not None and route[1] is connection:
+                websockets.append(self.__routes.pop(key)[0])
+        return websockets
+
+    def on_connection_close(self, connection: _Connection) -> None:
+        """
+        Move the streams of a connection that dropped onto new connections. Connections closed by unsubscribe() or
+        close() were already removed, so nothing happens for them
+        """
+        with self.lock:
+            if connection not in self.__connections:
+                return
+            websockets = self.__drop_connection(connection)
+
+        if not connection.opened:
+            # Reconnecting to a venue that can't be reached would only fail again
+            info_print(f"Multiplexed connection to {self.protocol.url} failed to open, {len(websockets)} streams "
+                       f"were closed.")
+            return
+        info_print(f"Multiplexed connection to {self.protocol.url} dropped, resubscribing {len(websockets)} streams.")
+        for websocket_ in websockets:
+            self.subscribe(websocket_)
+
+    def is_subscribed(self, websocket_) -> bool:
+        try:
+            _, connection = self.__routes[(websocket_.symbol, websocket_.stream)]
+        except KeyError:
+            return False
+        return connection.is_alive()
+
+    def connection_count(self) -> int:
+        return len(self.__connections)
+
+    def close(self) -> None:
+        with self.lock:
+            connections = self.__connections
+            self.__connections = []
+            self.__routes = {}
+        for connection in connections:
+            connection.ws.close()
+
+    def on_message(self, ws, message):
+        try:
+            routed = self.protocol.route(json.loads(message))
+            if routed is None:
+                return
+            key, stream_message = routed
+            try:
+                websocket_, _ = self.__routes[key]
+            except KeyError:
+                # Messages can still arrive for a stream that was just unsubscribed
+                return
+            websocket_.process_message(stream_message)
+        except Exception:
+            traceback.print_exc()
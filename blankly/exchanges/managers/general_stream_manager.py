@@ -17,8 +17,6 @@
 """
 import random
 
-import requests
-
 import blankly.utils.utils
 from blankly.exchanges.interfaces.alpaca.alpaca_websocket import Tickers as Alpaca_Websocket
 from blankly.exchanges.interfaces.binance.binance_websocket import Tickers as Binance_Websocket
@@ -27,6 +25,7 @@ from blankly.exchanges.interfaces.kucoin.kucoin_websocket import Tickers as Kuco
 from blankly.exchanges.interfaces.ftx.ftx_websocket import Tickers as Ftx_Websocket
 from blankly.exchanges.interfaces.okx.okx_websocket import Tickers as Okx_Websocket
 from blankly.exchanges.managers.websocket_manager import WebsocketManager
+from blankly.utils.sessions import shared_session
 
 
 class GeneralManager(WebsocketManager):
@@ -75,15 +74,15 @@ class GeneralManager(WebsocketManager):
             return websocket
         elif exchange_cache == "kucoin":
             if use_sandbox:
-                response = requests.post('https://trade-sandbox.kucoin.com/_api/bullet-usercenter/v1/bullet-public'
-                                         ).json()
+                response = shared_session().post(
+                    'https://trade-sandbox.kucoin.com/_api/bullet-usercenter/v1/bullet-public').json()
 
                 base_endpoint = response['data']['instanceServers'][0]['endpoint']
                 token = response['data']['token']
                 websocket = Kucoin_Websocket(asset_id_cache, channel, f"{base_endpoint}/socket.io/?token={token}", log)
                 # wss://push-socketio-sandbox.kucoin.com
             else:
-                response = requests.post('https://api.kucoin.com/api/v1/bullet-public').json()
+                response = shared_session().post('https://api.kucoin.com/api/v1/bullet-public').json()
 
                 base_endpoint = response['data']['instanceServers'][0]['endpoint']
                 token = response['data']['token']
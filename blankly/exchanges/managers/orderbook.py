@@ -0,0 +1,99 @@
+"""
+    Sorted orderbook storage that is updated in place by the orderbook manager
+    Copyright (C) 2021  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from bisect import bisect_left
+from typing import Iterable, List, Optional, Tuple
+
+
+class OrderbookSide(list):
+    def __init__(self, levels: Iterable = ()):
+        """
+        The price levels on one side of a book as a list of (price, size) tuples sorted from the lowest price to the
+        highest. A level is found by bisecting the list so that updates don't re-sort the book. Because this is a
+        plain list it can be passed anywhere a list can, such as json.dumps()
+
+        Inserting or removing a level still shifts the levels above it. That's a single memmove of pointers, which
+        for books of a few thousand levels is cheaper than keeping a tree in pure python and needs no extra dependency
+
+        Args:
+            levels: Any levels to start with. Each level starts with the price and the size, and anything after
+                those (such as a sequence number or order count) is ignored
+        """
+        sizes = {}
+        for level in levels:
+            price, size = float(level[0]), float(level[1])
+            if size != 0:
+                sizes[price] = size
+            else:
+                sizes.pop(price, None)
+        super().__init__(sorted(sizes.items()))
+
+    def update(self, price: float, size: float) -> None:
+        """
+        Set the size at a price level. A size of zero removes the level
+        """
+        index = bisect_left(self, (price,))
+        if index < len(self) and self[index][0] == price:
+            if size == 0:
+                del self[index]
+            else:
+                self[index] = (price, size)
+        elif size != 0:
+            self.insert(index, (price, size))
+
+    def size_at(self, price: float) -> float:
+        index = bisect_left(self, (price,))
+        if index < len(self) and self[index][0] == price:
+            return self[index][1]
+        return 0.0
+
+
+class Orderbook(dict):
+    def __init__(self, bids: Iterable = (), asks: Iterable = ()):
+        """
+        A book with 'bids' and 'asks' sides that are both sorted from the lowest price to the highest. The best bid
+        is the last bid and the best ask is the first ask
+
+        Args:
+            bids: Any levels to start the bids with, such as (price, size) pairs
+            asks: Any levels to start the asks with, such as (price, size) pairs
+        """
+        super().__init__(bids=OrderbookSide(bids), asks=OrderbookSide(asks))
+
+    def best_bid(self) -> Optional[Tuple[float, float]]:
+        return self['bids'][-1] if len(self['bids']) else None
+
+    def best_ask(self) -> Optional[Tuple[float, float]]:
+        return self['asks'][0] if len(self['asks']) else None
+
+    def top(self, depth: int) -> dict:
+        """
+        Copy the levels closest to the spread
+
+        Args:
+            depth: The number of levels to copy from each side
+
+        Returns:
+            {'bids': [...], 'asks': [...]} with the best level of each side first
+        """
+        depth = max(depth, 0)
+        bids: List[tuple] = self['bids'][max(len(self['bids']) - depth, 0):]
+        bids.reverse()
+        return {
+            'bids': bids,
+            'asks': self['asks'][:depth]
+        }
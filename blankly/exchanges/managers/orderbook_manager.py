@@ -20,8 +20,6 @@ import warnings
 import random
 from typing import List
 
-import requests
-
 import blankly.exchanges.auth.utils
 import blankly.utils.utils
 from blankly.exchanges.interfaces.alpaca.alpaca_websocket import Tickers as Alpaca_Websocket
@@ -30,7 +28,9 @@ from blankly.exchanges.interfaces.coinbase_pro.coinbase_pro_websocket import Tic
 from blankly.exchanges.interfaces.kucoin.kucoin_websocket import Tickers as Kucoin_Orderbook
 from blankly.exchanges.interfaces.ftx.ftx_websocket import Tickers as Ftx_Orderbook
 from blankly.exchanges.interfaces.okx.okx_websocket import Tickers as Okx_Orderbook
+from blankly.exchanges.managers.orderbook import Orderbook
 from blankly.exchanges.managers.websocket_manager import WebsocketManager
+from blankly.utils.sessions import shared_session
 
 
 def sort_list_tuples(list_with_tuples: list) -> List[tuple]:
@@ -43,7 +43,7 @@ def binance_snapshot(symbol, limit):
         "symbol": symbol,
         "limit": limit
     }
-    response = requests.get("https://api.binance.com/api/v3/depth", params=params).json()
+    response = shared_session().get("https://api.binance.com/api/v3/depth", params=params).json()
     try:
         buys_response = response['bids']
     except KeyError:
@@ -62,18 +62,6 @@ def binance_snapshot(symbol, limit):
     return buys, sells
 
 
-def remove_price(book: list, price: float) -> list:
-    for j in range(len(book)):
-        price_at_index = book[j][0]
-        if price_at_index > price:
-            break
-        if price_at_index == price:
-            book.pop(j)
-            break
-
-    return book
-
-
 class OrderbookManager(WebsocketManager):
     def __init__(self, default_exchange, default_symbol):
         """
@@ -135,24 +123,23 @@ class OrderbookManager(WebsocketManager):
             if use_sandbox:
                 websocket = Coinbase_Pro_Orderbook(override_symbol, "level2",
                                                    pre_event_callback=self.coinbase_snapshot_update,
-                                                   initially_stopped=initially_stopped,
+                                                   initially_stopped=initially_stopped or self.multiplex,
                                                    WEBSOCKET_URL="wss://ws-feed-public.sandbox.pro.coinbase.com")
             else:
                 websocket = Coinbase_Pro_Orderbook(override_symbol, "level2",
                                                    pre_event_callback=self.coinbase_snapshot_update,
-                                                   initially_stopped=initially_stopped
+                                                   initially_stopped=initially_stopped or self.multiplex
                                                    )
             # This is where the sorting magic happens
             websocket.append_callback(self.coinbase_update)
+            if self.multiplex:
+                self.multiplex_websocket(websocket, initially_stopped)
 
             # Store this object
             self.__websockets['coinbase_pro'][override_symbol] = websocket
             self.__websockets_callbacks['coinbase_pro'][override_symbol] = [callback]
             self.__websockets_kwargs['coinbase_pro'][override_symbol] = kwargs
-            self.__orderbooks['coinbase_pro'][override_symbol] = {
-                "bids": [],
-                "asks": []
-            }
+            self.__orderbooks['coinbase_pro'][override_symbol] = Orderbook()
             return websocket
         elif exchange_name == "ftx":
             if override_symbol is None:
@@ -174,16 +161,13 @@ class OrderbookManager(WebsocketManager):
             self.__websockets['ftx'][override_symbol] = websocket
             self.__websockets_callbacks['ftx'][override_symbol] = [callback]
             self.__websockets_kwargs['ftx'][override_symbol] = kwargs
-            self.__orderbooks['ftx'][override_symbol] = {
-                "bids": [],
-                "asks": []
-            }
+            self.__orderbooks['ftx'][override_symbol] = Orderbook()
             return websocket
         elif exchange_name == "kucoin":
             if override_symbol is None:
                 override_symbol = self.__default_currency
 
-            request_data = (requests.post('https://api.kucoin.com/api/v1/bullet-public').json())
+            request_data = (shared_session().post('https://api.kucoin.com/api/v1/bullet-public').json())
 
             if use_sandbox:
                 base_endpoint = request_data['data']['instanceServers'][0]['endpoint']
@@ -208,10 +192,7 @@ class OrderbookManager(WebsocketManager):
             self.__websockets['kucoin'][override_symbol] = websocket
             self.__websockets_callbacks['kucoin'][override_symbol] = [callback]
             self.__websockets_kwargs['kucoin'][override_symbol] = kwargs
-            self.__orderbooks['kucoin'][override_symbol] = {
-                "bids": [],
-                "asks": []
-            }
+            self.__orderbooks['kucoin'][override_symbol] = Orderbook()
 
         elif exchange_name == "okx":
             if override_symbol is None:
@@ -220,22 +201,21 @@ class OrderbookManager(WebsocketManager):
             if use_sandbox:
                 websocket = Okx_Orderbook(override_symbol, "books",
                                           pre_event_callback=self.okx_snapshot_update,
-                                          initially_stopped=initially_stopped,
+                                          initially_stopped=initially_stopped or self.multiplex,
                                           WEBSOCKET_URL="wss://wspap.okx.com:8443/ws/v5/public?brokerId=9999")
             else:
                 websocket = Okx_Orderbook(override_symbol, "books",
                                           pre_event_callback=self.okx_snapshot_update,
-                                          initially_stopped=initially_stopped
+                                          initially_stopped=initially_stopped or self.multiplex
                                           )
 
             websocket.append_callback(self.okx_update)
+            if self.multiplex:
+                self.multiplex_websocket(websocket, initially_stopped)
             self.__websockets['okx'][override_symbol] = websocket
             self.__websockets_callbacks['okx'][override_symbol] = [callback]
             self.__websockets_kwargs['okx'][override_symbol] = kwargs
-            self.__orderbooks['okx'][override_symbol] = {
-                "bids": [],
-                "asks": []
-            }
+            self.__orderbooks['okx'][override_symbol] = Orderbook()
             return websocket
 
         elif exchange_name == "binance":
@@ -246,12 +226,16 @@ class OrderbookManager(WebsocketManager):
             specific_currency_id = blankly.utils.to_exchange_symbol(override_symbol, "binance").lower()
 
             if use_sandbox:
-                websocket = Binance_Orderbook(specific_currency_id, "depth", initially_stopped=initially_stopped,
+                websocket = Binance_Orderbook(specific_currency_id, "depth",
+                                              initially_stopped=initially_stopped or self.multiplex,
                                               WEBSOCKET_URL="wss://testnet.binance.vision/ws")
             else:
-                websocket = Binance_Orderbook(specific_currency_id, "depth", initially_stopped=initially_stopped)
+                websocket = Binance_Orderbook(specific_currency_id, "depth",
+                                              initially_stopped=initially_stopped or self.multiplex)
 
             websocket.append_callback(self.binance_update)
+            if self.multiplex:
+                self.multiplex_websocket(websocket, initially_stopped)
 
             # binance returns the keys in all UPPER so the books should be created based on response
             specific_currency_id = specific_currency_id.upper()
@@ -260,10 +244,7 @@ class OrderbookManager(WebsocketManager):
             self.__websockets_kwargs['binance'][specific_currency_id] = kwargs
 
             buys, sells = binance_snapshot(specific_currency_id, 1000)
-            self.__orderbooks['binance'][specific_currency_id] = {
-                "bids": buys,
-                "asks": sells
-            }
+            self.__orderbooks['binance'][specific_currency_id] = Orderbook(buys, sells)
 
         elif exchange_name == "alpaca":
             warning_string = "Alpaca only allows the viewing of the bid/ask spread, not a total orderbook."
@@ -288,319 +269,136 @@ class OrderbookManager(WebsocketManager):
             self.__websockets_callbacks['alpaca'][override_symbol] = [callback]
             self.__websockets_kwargs['alpaca'][override_symbol] = kwargs
 
-            self.__orderbooks['alpaca'][override_symbol] = {
-                "bids": [],
-                "asks": [],
-            }
+            self.__orderbooks['alpaca'][override_symbol] = Orderbook()
 
         else:
             print(exchange_name + " ticker not supported, skipping creation")
 
     def ftx_update(self, update):
         symbol = update['symbol']
+        book = self.__orderbooks['ftx'][symbol]  # type: Orderbook
 
-        book_buys = self.__orderbooks['ftx'][symbol]['bids']
-        book_sells = self.__orderbooks['ftx'][symbol]['asks']  # type: list
-
-        new_buys = update['bids'][::-1]  # type: list
-        for i in new_buys:
-            i[0] = float(i[0])
-            i[1] = float(i[1])
-            if i[1] == 0:
-                book_buys = remove_price(book_buys, i[0])
-            else:
-                book_buys.append((i[0], i[1]))
-
-        new_sells = update['asks']  # type: list
-        for i in new_sells:
-            i[0] = float(i[0])
-            i[1] = float(i[1])
-            if i[1] == 0:
-                book_sells = remove_price(book_sells, i[0])
-            else:
-                book_sells.append((i[0], i[1]))
-
-        # Now sort them
-        book_buys = sort_list_tuples(book_buys)
-        book_sells = sort_list_tuples(book_sells)
+        for i in update['bids']:
+            book['bids'].update(float(i[0]), float(i[1]))
 
-        self.__orderbooks['ftx'][symbol]['bids'] = book_buys
-        self.__orderbooks['ftx'][symbol]['asks'] = book_sells
+        for i in update['asks']:
+            book['asks'].update(float(i[0]), float(i[1]))
 
         # Pass in this new updated orderbook
         callbacks = self.__websockets_callbacks['ftx'][symbol]
         for i in callbacks:
-            i(self.__orderbooks['ftx'][symbol],
-              **self.__websockets_kwargs['ftx'][symbol])
+            i(book, **self.__websockets_kwargs['ftx'][symbol])
 
     def ftx_snapshot_update(self, update):
         market = update['market'].replace('/', '-')
         print("Orderbook snapshot acquired for: " + market)
-        book = {
-            "bids": [],
-            "asks": []
-        }
-        buys = update['data']['bids']
-
-        for i in range(len(buys)):
-            buy = buys[i]
-            book['bids'].append((float(buy[0]), float(buy[1])))
-
-        sells = update['data']['asks']
-        for i in range(len(sells)):
-            sell = sells[i]
-            book['asks'].append((float(sell[0]), float(sell[1])))
-
-        book["bids"] = sort_list_tuples(book["bids"])
-        book["asks"] = sort_list_tuples(book["asks"])
 
-        self.__orderbooks['ftx'][update['market']] = book
+        self.__orderbooks['ftx'][update['market']] = Orderbook(update['data']['bids'], update['data']['asks'])
 
     def coinbase_snapshot_update(self, update):
         print("Orderbook snapshot acquired for: " + update['product_id'])
         # Clear whatever book we had
-        book = {
-            "bids": [],
-            "asks": []
-        }
-        # Get all bids
-        buys = update['bids']
-        # Convert these to float and write to our order dictionaries
-        for i in range(len(buys)):
-            buy = buys[i]
-            book['bids'].append((float(buy[0]), float(buy[1])))
-
-        sells = update['asks']
-        for i in range(len(sells)):
-            sell = sells[i]
-            book['asks'].append((float(sell[0]), float(sell[1])))
-
-        book["bids"] = sort_list_tuples(book["bids"])
-        book["asks"] = sort_list_tuples(book["asks"])
-
-        self.__orderbooks['coinbase_pro'][update['product_id']] = book
+        self.__orderbooks['coinbase_pro'][update['product_id']] = Orderbook(update['bids'], update['asks'])
 
     def coinbase_update(self, update):
-        # Side is first in list
-        side = update['changes'][0][0]
-
-        # Have to convert coinbase to use this
-        if side == 'buy':
-            side = 'bids'
-        elif side == 'sell':
-            side = 'asks'
-
-        # Price is second
-        price = float(update['changes'][0][1])
-        qty = float(update['changes'][0][2])
-        book = self.__orderbooks['coinbase_pro'][update['product_id']][side]  # type: list
-
-        # Quantity at that point is third
-        if qty == 0:
-            book = remove_price(book, price)
-        else:
-            book.append((price, qty))
+        book = self.__orderbooks['coinbase_pro'][update['product_id']]  # type: Orderbook
+
+        for change in update['changes']:
+            # Side is first in list, then the price and the quantity at that price
+            side = change[0]
 
-        book = sort_list_tuples(book)
-        self.__orderbooks['coinbase_pro'][update['product_id']][side] = book
+            # Have to convert coinbase to use this
+            if side == 'buy':
+                side = 'bids'
+            elif side == 'sell':
+                side = 'asks'
+
+            book[side].update(float(change[1]), float(change[2]))
 
         # Iterate through the callback list
         callbacks = self.__websockets_callbacks['coinbase_pro'][update['product_id']]
         for i in callbacks:
-            i(self.__orderbooks['coinbase_pro'][update['product_id']],
-              **self.__websockets_kwargs['coinbase_pro'][update['product_id']])
+            i(book, **self.__websockets_kwargs['coinbase_pro'][update['product_id']])
 
     def okx_update(self, update):
 
         symbol = update['arg']['instId']
+        book = self.__orderbooks['okx'][symbol]  # type: Orderbook
 
-        book_buys = self.__orderbooks['okx'][symbol]['bids']  # type: list
-        book_sells = self.__orderbooks['okx'][symbol]['asks']  # type: list
-
-        # Buys are b, count from low to high with reverse (which is the ::-1 thing)
-        new_buys = update['data'][0]['bids'][::-1]  # type: list
-        for i in new_buys:
-            i[0] = float(i[0])
-            i[1] = float(i[1])
-            if i[1] == 0:
-                book_buys = remove_price(book_buys, i[0])
-            else:
-                book_buys.append((i[0], i[1]))
-
-        # Asks are sells, these are also counted from low to high
-        new_sells = update['data'][0]['asks']  # type: list
-        for i in new_sells:
-            i[0] = float(i[0])
-            i[1] = float(i[1])
-            if i[1] == 0:
-                book_sells = remove_price(book_sells, i[0])
-            else:
-                book_sells.append((i[0], i[1]))
+        for i in update['data'][0]['bids']:
+            book['bids'].update(float(i[0]), float(i[1]))
 
-        # Now sort them
-        book_buys = sort_list_tuples(book_buys)
-        book_sells = sort_list_tuples(book_sells)
-
-        self.__orderbooks['okx'][symbol]['bids'] = book_buys
-        self.__orderbooks['okx'][symbol]['asks'] = book_sells
+        for i in update['data'][0]['asks']:
+            book['asks'].update(float(i[0]), float(i[1]))
 
         # Pass in this new updated orderbook
         callbacks = self.__websockets_callbacks['okx'][symbol]
         for i in callbacks:
-            i(self.__orderbooks['okx'][symbol],
-              **self.__websockets_kwargs['okx'][symbol])
+            i(book, **self.__websockets_kwargs['okx'][symbol])
 
     def okx_snapshot_update(self, update):
         print("Orderbook snapshot acquired for: " + update['arg']['instId'])
 
-        book = {
-            "bids": [],
-            "asks": []
-        }
-
         buys = update['data'][0]['bids']  # [0][:-1]
         buys[0] = buys[0][:-1]
-        # Convert these to float and write to our order dictionaries
-        for i in range(len(buys)):
-            buy = buys[i]
-            book['bids'].append((float(buy[0]), float(buy[1])))
 
         sells = update['data'][0]['asks']  # [0][:-1]
         sells[0] = sells[0][:-1]
-        for i in range(len(sells)):
-            sell = sells[i]
-            book['asks'].append((float(sell[0]), float(sell[1])))
 
-        book["bids"] = sort_list_tuples(book["bids"])
-        book["asks"] = sort_list_tuples(book["asks"])
-
-        self.__orderbooks['okx'][update['arg']['instId']] = book
+        self.__orderbooks['okx'][update['arg']['instId']] = Orderbook(buys, sells)
 
     def kucoin_update(self, update):
         symbol = update['data']['symbol']
+        book = self.__orderbooks['kucoin'][symbol]  # type: Orderbook
 
-        # Get symbol for orderbook
-        book_buys = self.__orderbooks['kucoin'][symbol]['bids']
-        book_sells = self.__orderbooks['kucoin'][symbol]['asks']  # type: list
-
-        new_buys = update['data']['changes']['bids'][::-1]  # type: list
-        if len(new_buys) == 0:
-            pass
-        else:
-            new_buys[0] = new_buys[0][:-1]
-
-        for i in new_buys:
-            i[0] = float(i[0])  # price
-            i[1] = float(i[1])  # size
-            if i[1] == 0:
-                book_buys = remove_price(book_buys, i[1])
-            else:
-                book_buys.append((i[0], i[1]))
-
-        # Asks are sells, these are also counted from low to high
-        new_sells = update['data']['changes']['asks']  # type: list
-        if len(new_sells) == 0:
-            pass
-        else:
-            new_sells[0] = new_sells[0][:-1]
-
-        for i in new_sells:
-            i[0] = float(i[0])
-            i[1] = float(i[1])
-            if i[1] == 0:
-                book_sells = remove_price(book_sells, i[1])
-            else:
-                book_sells.append((i[0], i[1]))
-
-        # Now sort them
-        book_buys = sort_list_tuples(book_buys)
-        book_sells = sort_list_tuples(book_sells)
+        # Each change is the price, the size and then the sequence
+        for i in update['data']['changes']['bids']:
+            book['bids'].update(float(i[0]), float(i[1]))
 
-        self.__orderbooks['kucoin'][symbol]['bids'] = book_buys
-        self.__orderbooks['kucoin'][symbol]['asks'] = book_sells
+        for i in update['data']['changes']['asks']:
+            book['asks'].update(float(i[0]), float(i[1]))
 
         # Pass in this new updated orderbook
         callbacks = self.__websockets_callbacks['kucoin'][symbol]
         for i in callbacks:
-            i(self.__orderbooks['kucoin'][symbol],
-              **self.__websockets_kwargs['kucoin'][symbol])
+            i(book, **self.__websockets_kwargs['kucoin'][symbol])
 
     def kucoin_snapshot_update(self, update):
         print("Orderbook snapshot acquired for: " + update['data']['symbol'])
         # Clear whatever book we had
-        book = {
-            "bids": [],
-            "asks": []
-        }
-        # Get all bids
         buys = update['data']['changes']['bids']  # [0][:-1]
         buys[0] = buys[0][:-1]
-        # Convert these to float and write to our order dictionaries
-        for i in range(len(buys)):
-            buy = buys[i]
-            book['bids'].append((float(buy[0]), float(buy[1])))
 
         sells = update['data']['changes']['asks']  # [0][:-1]
         sells[0] = sells[0][:-1]
-        for i in range(len(sells)):
-            sell = sells[i]
-            book['asks'].append((float(sell[0]), float(sell[1])))
 
-        book["bids"] = sort_list_tuples(book["bids"])
-        book["asks"] = sort_list_tuples(book["asks"])
-
-        self.__orderbooks['kucoin'][update['data']['symbol']] = book
+        self.__orderbooks['kucoin'][update['data']['symbol']] = Orderbook(buys, sells)
 
     def binance_update(self, update):
         try:
             # TODO this needs a snapshot to work correctly, which needs arun's rest code
             # Get symbol first
             symbol = update['s']
+            book = self.__orderbooks['binance'][symbol]  # type: Orderbook
+
+            for i in update['b']:
+                book['bids'].update(float(i[0]), float(i[1]))
 
-            # Get symbol for orderbook
-            book_buys = self.__orderbooks['binance'][symbol]['bids']  # type: list
-            book_sells = self.__orderbooks['binance'][symbol]['asks']  # type: list
-
-            # Buys are b, count from low to high with reverse (which is the ::-1 thing)
-            new_buys = update['b'][::-1]  # type: list
-            for i in new_buys:
-                i[0] = float(i[0])
-                i[1] = float(i[1])
-                if i[1] == 0:
-                    book_buys = remove_price(book_buys, i[0])
-                else:
-                    book_buys.append((i[0], i[1]))
-
-            # Asks are sells, these are also counted from low to high
-            new_sells = update['a']  # type: list
-            for i in new_sells:
-                i[0] = float(i[0])
-                i[1] = float(i[1])
-                if i[1] == 0:
-                    book_sells = remove_price(book_sells, i[0])
-                else:
-                    book_sells.append((i[0], i[1]))
-
-            # Now sort them
-            book_buys = sort_list_tuples(book_buys)
-            book_sells = sort_list_tuples(book_sells)
-
-            self.__orderbooks['binance'][symbol]['bids'] = book_buys
-            self.__orderbooks['binance'][symbol]['asks'] = book_sells
+            for i in update['a']:
+                book['asks'].update(float(i[0]), float(i[1]))
 
             # Pass in this new updated orderbook
             callbacks = self.__websockets_callbacks['binance'][symbol]
             for i in callbacks:
-                i(self.__orderbooks['binance'][symbol],
-                  **self.__websockets_kwargs['binance'][symbol])
+                i(book, **self.__websockets_kwargs['binance'][symbol])
         except Exception:
             traceback.print_exc()
 
     def alpaca_update(self, update: dict):
         # Alpaca only gives the spread, no orderbook depth (alpaca is very bad)
         symbol = update['S']
-        self.__orderbooks['alpaca'][symbol]['bids'] = [(update['bp'], update['bs'])]
-        self.__orderbooks['alpaca'][symbol]['asks'] = [(update['ap'], update['as'])]
+        self.__orderbooks['alpaca'][symbol] = Orderbook([(update['bp'], update['bs'])],
+                                                        [(update['ap'], update['as'])])
 
         callbacks = self.__websockets_callbacks['alpaca'][symbol]
         for i in callbacks:
@@ -627,7 +425,9 @@ class OrderbookManager(WebsocketManager):
 
     def get_most_recent_orderbook(self, override_symbol=None, override_exchange=None):
         """
-        Get the most recent orderbook under a currency and exchange.
+        Get the most recent orderbook under a currency and exchange. The 'bids' and 'asks' are both sorted from the
+        lowest price to the highest, and the book is updated in place as new levels arrive. Use top() on the book to
+        copy the levels closest to the spread.
 
         Args:
             override_symbol: Ticker id, such as "BTC-USD" or exchange equivalents.
@@ -16,7 +16,6 @@
     along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 import random
-import requests
 
 import blankly.utils.utils
 from blankly.exchanges.interfaces.alpaca.alpaca_websocket import Tickers as Alpaca_Ticker
@@ -27,6 +26,7 @@ from blankly.exchanges.interfaces.ftx.ftx_websocket import Tickers as FTX_Ticker
 from blankly.exchanges.interfaces.okx.okx_websocket import Tickers as Okx_Ticker
 
 from blankly.exchanges.managers.websocket_manager import WebsocketManager
+from blankly.utils.sessions import shared_session
 
 
 class TickerManager(WebsocketManager):
@@ -59,7 +59,7 @@ class TickerManager(WebsocketManager):
     """
 
     def create_ticker(self, callback, log: str = None, override_symbol: str = None, override_exchange: str = None,
-                      **kwargs):
+                      initially_stopped: bool = False, **kwargs):
         """
         Create a ticker on a given exchange.
         Args:
@@ -67,6 +67,7 @@ class TickerManager(WebsocketManager):
             log: Fill this with a path to log the price updates.
             override_symbol: The currency to create a ticker for.
             override_exchange: Override the default exchange.
+            initially_stopped: Keep the websocket stopped when created
             kwargs: Any keyword arguments to be passed into the callback besides the first positional message argument
         Returns:
             Direct ticker object
@@ -94,11 +95,15 @@ class TickerManager(WebsocketManager):
 
             if sandbox_mode:
                 ticker = Coinbase_Pro_Ticker(override_symbol, "ticker", log=log,
+                                             initially_stopped=initially_stopped or self.multiplex,
                                              websocket_url="wss://ws-feed-public.sandbox.pro.coinbase.com", **kwargs)
             else:
-                ticker = Coinbase_Pro_Ticker(override_symbol, "ticker", log=log, **kwargs)
+                ticker = Coinbase_Pro_Ticker(override_symbol, "ticker", log=log,
+                                             initially_stopped=initially_stopped or self.multiplex, **kwargs)
 
             ticker.append_callback(callback)
+            if self.multiplex:
+                self.multiplex_websocket(ticker, initially_stopped)
             # Store this object
             self.__tickers['coinbase_pro'][override_symbol] = ticker
             return ticker
@@ -111,12 +116,16 @@ class TickerManager(WebsocketManager):
                 ticker = Binance_Ticker(override_symbol,
                                         "aggTrade",
                                         log=log,
+                                        initially_stopped=initially_stopped or self.multiplex,
                                         websocket_url="wss://testnet.binance.vision/ws", **kwargs)
             else:
                 ticker = Binance_Ticker(override_symbol,
                                         "aggTrade",
-                                        log=log, **kwargs)
+                                        log=log,
+                                        initially_stopped=initially_stopped or self.multiplex, **kwargs)
             ticker.append_callback(callback)
+            if self.multiplex:
+                self.multiplex_websocket(ticker, initially_stopped)
             override_symbol = override_symbol.upper()
             self.__tickers['binance'][override_symbol] = ticker
             return ticker
@@ -125,7 +134,7 @@ class TickerManager(WebsocketManager):
             if override_symbol is None:
                 override_symbol = self.__default_symbol
 
-            request_data = (requests.post('https://api.kucoin.com/api/v1/bullet-public').json())
+            request_data = (shared_session().post('https://api.kucoin.com/api/v1/bullet-public').json())
 
             override_symbol = blankly.utils.to_exchange_symbol(override_symbol, "kucoin")
             if sandbox_mode:
@@ -134,12 +143,14 @@ class TickerManager(WebsocketManager):
                 ticker = Kucoin_Ticker(override_symbol,
                                        "ticker",
                                        log=log,
+                                       initially_stopped=initially_stopped,
                                        websocket_url=f"{base_endpoint}/socket.io/?token={token}", **kwargs)
             else:
                 base_endpoint = request_data['data']['instanceServers'][0]['endpoint']
                 token = request_data['data']['token']
                 ticker = Kucoin_Ticker(override_symbol, "ticker",
                                        log=log,
+                                       initially_stopped=initially_stopped,
                                        websocket_url=f"{base_endpoint}?token={token}&[connectId="
                                                      f"{random.randint(1, 100000000) * 100000000}]", **kwargs)
             ticker.append_callback(callback)
@@ -150,11 +161,15 @@ class TickerManager(WebsocketManager):
 
             if sandbox_mode:
                 ticker = Okx_Ticker(override_symbol, "tickers", log=log,
+                                    initially_stopped=initially_stopped or self.multiplex,
                                     WEBSOCKET_URL="wss://wspap.okx.com:8443/ws/v5/public?brokerId=9999", **kwargs)
             else:
-                ticker = Okx_Ticker(override_symbol, "tickers", log=log, **kwargs)
+                ticker = Okx_Ticker(override_symbol, "tickers", log=log,
+                                    initially_stopped=initially_stopped or self.multiplex, **kwargs)
 
             ticker.append_callback(callback)
+            if self.multiplex:
+                self.multiplex_websocket(ticker, initially_stopped)
             # Store this object
             self.__tickers['okx'][override_symbol] = ticker
             return ticker
@@ -169,12 +184,14 @@ class TickerManager(WebsocketManager):
                 ticker = Alpaca_Ticker(override_symbol,
                                        "trades",
                                        log=log,
+                                       initially_stopped=initially_stopped,
                                        websocket_url="wss://paper-api.alpaca.markets/stream/v2/{}/".format(stream),
                                        **kwargs)
             else:
                 ticker = Alpaca_Ticker(override_symbol,
                                        "trades",
                                        log=log,
+                                       initially_stopped=initially_stopped,
                                        websocket_url="wss://stream.data.alpaca.markets/v2/{}/".format(stream),
                                        **kwargs)
             ticker.append_callback(callback)
@@ -190,7 +207,8 @@ class TickerManager(WebsocketManager):
             if sandbox_mode:
                 raise ValueError("Error: FTX does not have a sandbox mode")
             else:
-                ticker = FTX_Ticker(override_symbol, "trades", log=log, **kwargs)
+                ticker = FTX_Ticker(override_symbol, "trades", log=log, initially_stopped=initially_stopped,
+                                    **kwargs)
 
             ticker.append_callback(callback)
             # Store this object
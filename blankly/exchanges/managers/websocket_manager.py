@@ -17,6 +17,7 @@
 """
 import blankly.utils.utils
 from blankly.exchanges.abc_exchange_websocket import ABCExchangeWebsocket
+from blankly.exchanges.interfaces.websocket_multiplexer import MultiplexedStream, WebsocketMultiplexer
 
 
 class WebsocketManager(ABCExchangeWebsocket):
@@ -27,6 +28,33 @@ class WebsocketManager(ABCExchangeWebsocket):
 
         self.preferences = blankly.utils.load_user_preferences()
 
+        # Venues that support it read many streams over a few shared connections
+        self.multiplex = self.preferences['settings']['multiplex_websockets']
+        self.__multiplexers = {}
+
+    def multiplex_websocket(self, websocket_, initially_stopped: bool = False):
+        """
+        Read a websocket's stream over a connection shared with the other streams from the same venue. The websocket
+        should be created stopped so that it doesn't open a connection of its own
+
+        Args:
+            websocket_: A websocket that was created stopped
+            initially_stopped: Wait to subscribe until the websocket is restarted
+        """
+        if not isinstance(websocket_, MultiplexedStream):
+            # Venues that can't share connections keep one of their own for each stream
+            if not initially_stopped:
+                websocket_.restart_ticker()
+            return
+
+        protocol = websocket_.multiplex_protocol()
+        key = (type(protocol), protocol.url)
+        if key not in self.__multiplexers:
+            self.__multiplexers[key] = WebsocketMultiplexer(protocol)
+        websocket_.multiplexer = self.__multiplexers[key]
+        if not initially_stopped:
+            websocket_.multiplexer.subscribe(websocket_)
+
     def close_all_websockets(self):
         """
         Iterate through orderbooks and make sure they're closed
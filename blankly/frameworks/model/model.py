@@ -54,12 +54,7 @@ class Model(abc.ABC):
 
         # Toggle backtesting
         self.is_backtesting = True
-        if isinstance(self.__exchange, Exchange):
-            self.__exchange = PaperTrade(self.__exchange)
-        elif isinstance(self.__exchange, FuturesExchange):
-            self.__exchange = FuturesPaperTrade(self.__exchange)
-        else:
-            raise NotImplementedError
+        self.__exchange = self.__paper_trade(self.__exchange)
         self.interface = self.__exchange.interface
         backtest = self.__backtester.run(args,
                                          initial_account_values=initial_values,
@@ -74,6 +69,26 @@ class Model(abc.ABC):
 
         return backtest
 
+    def preload_backtest_prices(self, settings_path: str = None, kwargs=None):
+        """
+        Load the prices for the backtest once so that every following backtest of this model reuses them
+        """
+        if kwargs is None:
+            kwargs = {}
+
+        self.__backtester.preload_prices(self.__paper_trade(self.__exchange),
+                                         backtest_settings_path=settings_path,
+                                         **kwargs)
+
+    @staticmethod
+    def __paper_trade(exchange: ABCBaseExchange) -> ABCBaseExchange:
+        if isinstance(exchange, Exchange):
+            return PaperTrade(exchange)
+        elif isinstance(exchange, FuturesExchange):
+            return FuturesPaperTrade(exchange)
+        else:
+            raise NotImplementedError
+
     def run(self, args: typing.Any = None) -> threading.Thread:
         thread = threading.Thread(target=self.main, args=(args,))
         thread.start()
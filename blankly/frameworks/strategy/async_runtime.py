@@ -0,0 +1,210 @@
+"""
+    Run a live strategy's events on a single asyncio event loop
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import asyncio
+import functools
+import threading
+import time
+import traceback
+import typing
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime as dt
+
+from blankly.exchanges.interfaces.price_request import AsyncPriceSource, PriceRequest
+from blankly.frameworks.strategy.strategy_base import EventType
+from blankly.utils.sessions import AsyncSession
+from blankly.utils.utils import ceil_date
+
+# REST requests block a pool thread for their whole round trip, so the pool allows many more threads than there are
+#  cores. The pool is still shared by every event instead of growing with them
+DEFAULT_WORKERS = 64
+
+
+class AsyncRuntime:
+    def __init__(self, model, max_workers: int = None):
+        """
+        Runs the scheduled events of a strategy as tasks on one event loop instead of a thread per scheduler. When
+        aiohttp is installed and the interface can describe its price request, the prices of price and arbitrage
+        events are awaited on the loop. Other blocking work such as the remaining REST requests and synchronous
+        callbacks runs on a single bounded thread pool, while coroutine callbacks are awaited directly on the loop.
+        Websocket messages are handed to the loop as they arrive
+
+        Args:
+            model: The strategy structure with event_arguments() and an interface
+            max_workers: The most threads used for blocking work and the most price requests open to each host.
+                Threads are only started when requests overlap
+        """
+        self.model = model
+        if max_workers is None:
+            max_workers = DEFAULT_WORKERS
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='blankly_runtime')
+        self.loop: typing.Optional[asyncio.AbstractEventLoop] = None
+        try:
+            self.session: typing.Optional[AsyncSession] = AsyncSession(pool_size=max_workers)
+        except ImportError:
+            # Prices are requested on the pool like everything else
+            self.session = None
+
+        self.__started = threading.Event()
+        self.__stop_event: typing.Optional[asyncio.Event] = None
+        # Callbacks for a single state run one at a time and in the order they arrived
+        self.__locks = weakref.WeakKeyDictionary()
+
+    def run(self, schedulers: list, start_websockets: typing.Callable = None) -> None:
+        """
+        Block while the loop runs the schedulers until stop() is called
+
+        Args:
+            schedulers: The blankly.Scheduler objects to run. Only their interval, sync setting and kwargs are used
+            start_websockets: Run once the loop is ready to receive websocket messages
+        """
+        asyncio.run(self.__main(schedulers, start_websockets))
+
+    def wait_until_started(self, timeout: float = None) -> bool:
+        return self.__started.wait(timeout)
+
+    def stop(self) -> None:
+        """
+        End every scheduled task and let run() return. This can be called from any thread
+        """
+        if self.loop is not None and not self.loop.is_closed():
+            try:
+                self.loop.call_soon_threadsafe(self.__stop_event.set)
+            except RuntimeError:
+                # The loop already closed
+                pass
+
+    def dispatch(self, callback: typing.Callable, *args) -> None:
+        """
+        Run a callback on the loop from any thread, such as a websocket thread. The last argument is the state.
+        Callbacks dispatched after the runtime stops are dropped
+        """
+        try:
+            self.loop.call_soon_threadsafe(self.__create_task, callback, args)
+        except RuntimeError:
+            pass
+
+    async def call(self, callback: typing.Callable, *args) -> None:
+        """
+        Await a coroutine callback or run a synchronous one in the thread pool. The last argument is the state
+        """
+        async with self.__state_lock(args[-1]):
+            try:
+                if asyncio.iscoroutinefunction(callback):
+                    await callback(*args)
+                else:
+                    await self.loop.run_in_executor(None, functools.partial(callback, *args))
+            except Exception:
+                traceback.print_exc()
+
+    def __state_lock(self, state) -> asyncio.Lock:
+        lock = self.__locks.get(state)
+        if lock is None:
+            lock = self.__locks[state] = asyncio.Lock()
+        return lock
+
+    def __create_task(self, callback, args):
+        self.loop.create_task(self.call(callback, *args))
+
+    async def __main(self, schedulers: list, start_websockets: typing.Callable):
+        self.loop = asyncio.get_running_loop()
+        self.loop.set_default_executor(self.executor)
+        self.__stop_event = asyncio.Event()
+
+        tasks = [self.loop.create_task(self.__schedule(scheduler.get_interval(), scheduler.synced,
+                                                       scheduler.get_kwargs()))
+                 for scheduler in schedulers]
+        self.__started.set()
+
+        try:
+            if start_websockets is not None:
+                await self.loop.run_in_executor(None, start_websockets)
+            await self.__stop_event.wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if self.session is not None:
+                await self.session.close()
+
+    async def __schedule(self, interval: float, synced: bool, kwargs: dict):
+        # This keeps the same timing as the threaded scheduler
+        base_time = time.time()
+        if synced:
+            base_time = ceil_date(dt.now(), seconds=interval).timestamp()
+            await asyncio.sleep(max(base_time - time.time(), 0))
+            kwargs['bar_time'] = base_time
+        while True:
+            try:
+                await self.__rest_event(kwargs)
+            except Exception:
+                traceback.print_exc()
+            base_time += interval
+            if synced:
+                kwargs['bar_time'] += interval
+
+            await asyncio.sleep(max(base_time - time.time(), 0))
+
+    async def __rest_event(self, event: dict):
+        prices = None
+        if event['type'] in (EventType.price_event, EventType.arbitrage_event):
+            symbols = event['symbol'] if event['type'] == EventType.arbitrage_event else [event['symbol']]
+            requests = self.__price_requests(symbols)
+            if requests is not None:
+                prices = dict(zip(symbols, await asyncio.gather(*[self.__request_price(i) for i in requests])))
+            elif event['type'] == EventType.arbitrage_event:
+                # Arbitrage prices are requested together on the pool rather than on a thread per symbol
+                prices = dict(zip(symbols, await asyncio.gather(
+                    *[self.loop.run_in_executor(None, self.model.interface.get_price, i) for i in symbols])))
+
+        if not asyncio.iscoroutinefunction(event['callback']):
+            # Synchronous callbacks run on the same pool thread that found their arguments
+            async with self.__state_lock(event['state']):
+                await self.loop.run_in_executor(None, self.__run_event, prices, event)
+            return
+
+        if prices is None:
+            args = await self.loop.run_in_executor(None, functools.partial(self.model.event_arguments, prices=prices,
+                                                                           **event))
+        else:
+            # There is nothing left to request
+            args = self.model.event_arguments(prices=prices, **event)
+        if args is None:
+            return
+        await self.call(event['callback'], *args)
+
+    def __price_requests(self, symbols: list) -> typing.Optional[typing.List[PriceRequest]]:
+        interface = self.model.interface
+        if self.session is None or not isinstance(interface, AsyncPriceSource):
+            return None
+        requests = [interface.price_request(i) for i in symbols]
+        if None in requests:
+            return None
+        return requests
+
+    async def __request_price(self, request: PriceRequest) -> float:
+        return request.parse(await self.session.get_json(request.url, request.params))
+
+    def __run_event(self, prices: typing.Optional[dict], event: dict):
+        args = self.model.event_arguments(prices=prices, **event)
+        if args is None:
+            return
+        try:
+            event['callback'](*args)
+        except Exception:
+            traceback.print_exc()
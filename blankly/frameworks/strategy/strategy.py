@@ -15,12 +15,19 @@
     You should have received a copy of the GNU Lesser General Public License
     along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
+import copy
+import heapq
+import itertools
+import multiprocessing
+import multiprocessing.connection
 import threading
 import time
 import traceback
 import typing
 import warnings
 
+import pandas as pd
+
 import blankly
 from blankly.exchanges.abc_base_exchange import ABCBaseExchange
 from blankly.exchanges.exchange import Exchange
@@ -30,6 +37,7 @@ from blankly.exchanges.strategy_logger import StrategyLogger
 from blankly.frameworks.model.model import Model
 from blankly.frameworks.strategy.strategy_base import StrategyBase, EventType
 from blankly.frameworks.strategy import StrategyState
+from blankly.frameworks.strategy.async_runtime import AsyncRuntime
 from blankly.utils.utils import info_print
 
 
@@ -44,6 +52,8 @@ class StrategyStructure(Model):
         self.orderbook_manager = None
         self.schedulers = None
         self.remote_backtesting = None
+        # Set to an AsyncRuntime to run the live events on an event loop instead of a thread per event
+        self.runtime: typing.Optional[AsyncRuntime] = None
 
     def construct_strategy(self, schedulers, orderbook_websockets,
                            ticker_websockets, orderbook_manager, ticker_manager):
@@ -54,7 +64,23 @@ class StrategyStructure(Model):
         self.ticker_manager = ticker_manager
 
     def rest_event(self, **event):
-        callback = event['callback']  # type: callable
+        args = self.event_arguments(**event)
+        if args is None:
+            return
+
+        try:
+            event['callback'](*args)
+        except Exception:
+            traceback.print_exc()
+
+    def event_arguments(self, prices: dict = None, **event) -> typing.Optional[list]:
+        """
+        Find the arguments that an event's callback is run with
+
+        Args:
+            prices: Prices that were already requested for a price or arbitrage event, keyed by symbol
+            event: The kwargs of the event's scheduler
+        """
         symbol = event['symbol']  # type: str
         resolution = event['resolution']  # type: int
         variables = event['variables']  # type: dict
@@ -92,19 +118,24 @@ class StrategyStructure(Model):
 
             args = [data, symbol, state]
         elif type_ == EventType.price_event:
-            data = self.interface.get_price(symbol)
+            if prices is None:
+                data = self.interface.get_price(symbol)
+            else:
+                data = prices[symbol]
             args = [data, symbol, state]
         elif type_ == EventType.scheduled_event:
             args = [state]
         elif type_ == EventType.arbitrage_event:
-            prices = {}
             # If we're backtesting loop through the symbol and just grab the price
-            if self.is_backtesting:
+            if prices is None and self.is_backtesting:
+                prices = {}
                 for sym in symbol:
                     prices[sym] = self.interface.get_price(sym)
 
             # We have to be a bit more strategy if we're live
-            else:
+            elif prices is None:
+                prices = {}
+
                 def grab_price(threaded_symbol):
                     prices[threaded_symbol] = self.interface.get_price(threaded_symbol)
 
@@ -123,34 +154,47 @@ class StrategyStructure(Model):
         else:
             return
 
-        try:
-            callback(*args)
-        except Exception:
-            traceback.print_exc()
+        return args
 
     def run_price_events(self, events: list):
-        # run all events once at start
-        for event in events:
+        # Keep the events in a heap keyed on their next run time. The index breaks ties so that events scheduled at the
+        #  same time always run in the order they were added
+        queue = []
+        for index, event in enumerate(events):
+            # run all events once at start
             event['next_run'] = self.backtester.initial_time
+            heapq.heappush(queue, (event['next_run'], index))
 
-        while self.has_data:
-            events.sort(key=lambda d: d['next_run'])
-            event = events[0]
+        while self.has_data and queue:
+            next_run = queue[0][0]
 
             # Sleep the difference
-            self.sleep(event['next_run'] - self.time)
-
-            # Run the event
-            next_run = self.rest_event(**event)
-            if next_run:
-                # if rest_event returns something, run this event again at that time
-                # this implies the event did *not* run
-                event['next_run'] = next_run
-                event['was_delayed'] = True
-            else:
-                # otherwise, the event ran. we can revalue account and re-run normally @ `resolution` intervals
+            self.sleep(next_run - self.time)
+
+            # Pull every event that shares this time so that the account is only valued once for all of them
+            batch = []
+            while queue and queue[0][0] == next_run:
+                batch.append(heapq.heappop(queue)[1])
+
+            ran = False
+            for index in batch:
+                event = events[index]
+                # Run the event
+                delayed_run = self.rest_event(**event)
+                if delayed_run:
+                    # if rest_event returns something, run this event again at that time
+                    # this implies the event did *not* run
+                    event['next_run'] = delayed_run
+                    event['was_delayed'] = True
+                else:
+                    # otherwise, the event ran. re-run normally @ `resolution` intervals
+                    ran = True
+                    event['next_run'] += event['resolution']
+                heapq.heappush(queue, (event['next_run'], index))
+
+            # We can revalue the account once everything at this time has run
+            if ran:
                 self.backtester.value_account()
-                event['next_run'] += event['resolution']
 
     def main(self, args):
         if self.is_backtesting:
@@ -190,9 +234,17 @@ class StrategyStructure(Model):
     def run_live(self):
         self.__run_init()
 
+        if self.runtime is not None:
+            # This blocks the model thread until the strategy is torn down
+            self.runtime.run(self.schedulers, self.start_websockets)
+            return
+
         for scheduler in self.schedulers:
             scheduler.start()
 
+        self.start_websockets()
+
+    def start_websockets(self):
         for i in self.orderbook_websockets:
             # Index 2 contains the initialization function for the assigned websockets array
             if i[2] is not None:
@@ -206,6 +258,8 @@ class StrategyStructure(Model):
 
     def teardown(self):
         self.lock.acquire()
+        if self.runtime is not None:
+            self.runtime.stop()
         for i in self.schedulers:
             i.stop_scheduler()
             kwargs = i.get_kwargs()
@@ -227,6 +281,41 @@ class StrategyStructure(Model):
         self.lock.release()
 
 
+# The strategy being swept by backtest_grid(). Worker processes are forked, so they inherit it without pickling
+_grid_strategy = None
+
+
+def _grid_backtest_metrics(strategy, job: tuple) -> dict:
+    """
+    Write a backtest_grid() configuration into the strategy's state variables, backtest it and return the metrics
+    """
+    params, initial_values, settings_path, kwargs = job
+    for scheduler in strategy.schedulers:
+        scheduler.get_kwargs()['variables'].update(params)
+
+    result = strategy.model.backtest(args={}, initial_values=initial_values, settings_path=settings_path,
+                                     kwargs=kwargs)
+    strategy.model.teardown()
+
+    metrics = {}
+    for metric in result.get_metrics().values():
+        metrics[metric['display_name']] = metric['value']
+    return metrics
+
+
+def _run_grid_backtest(job: tuple, connection) -> None:
+    """
+    Run a single backtest_grid() configuration inside a forked process and send the metrics back over the connection
+    """
+    try:
+        # This process is a fresh fork, so the variables can be modified without affecting other configurations
+        connection.send((True, _grid_backtest_metrics(_grid_strategy, job)))
+    except Exception:
+        connection.send((False, traceback.format_exc()))
+    finally:
+        connection.close()
+
+
 class Strategy(StrategyBase):
     __exchange: Exchange
     interface: ABCExchangeInterface
@@ -270,6 +359,15 @@ class Strategy(StrategyBase):
                 use_price: str = 'close',
                     Set which price column to use.
 
+                fill_model: str = 'price'
+                    How limit and stop orders fill. 'price' checks them against the use_price column at each tick.
+                    'ohlc' also checks the open, high and low of every new bar, so coarse resolutions fill orders
+                    that the bar traded through. Orders that the open gaps through fill at the open.
+
+                intrabar_path: str = 'nearest'
+                    The order the 'ohlc' fill model assumes a bar moves in. 'nearest' goes from the open to whichever
+                    of the high or low is closer first, 'high_first' and 'low_first' always visit that extreme first.
+
                 smooth_prices: bool = False,
                     Create linear connections between downloaded prices
 
@@ -286,11 +384,15 @@ class Strategy(StrategyBase):
                     Show a progress bar as the backtest runs
 
                 cache_location: str = './price_caches'
-                    Set a location for the price cache csv's to be written to
+                    Set a location for the price cache files to be written to
+
+                cache_format: str = 'npy'
+                    The file format of the price cache, either 'npy' (binary) or 'csv'. Cached files in
+                    the other format are converted automatically
 
                 continuous_caching: bool
                     Utilize the advanced price caching system built into the backtest. Automatically aggregate and prune
-                    downloaded data.
+                    downloaded data. Overlapping or touching cached segments are merged into a single file.
 
                 resample_account_value_for_metrics: str or bool = '1d' or False
                     Because backtest data can be input at a variety of resolutions, account value often needs to be
@@ -321,6 +423,127 @@ class Strategy(StrategyBase):
         self.model.teardown()
         return res
 
+    def backtest_grid(self,
+                      param_space: typing.Union[dict, list],
+                      workers: int = None,
+                      to: str = None,
+                      initial_values: dict = None,
+                      start_date: typing.Union[str, float, int] = None,
+                      end_date: typing.Union[str, float, int] = None,
+                      settings_path: str = None,
+                      **kwargs
+                      ) -> pd.DataFrame:
+        """
+        Backtest this strategy across a grid of parameters in parallel.
+
+        Each parameter set is written into the state variables of every event before the backtest (and the init
+        functions) run, so callbacks can read them with state.variables['my_parameter']. Prices are read or
+        downloaded a single time and shared with every worker process.
+
+        Args:
+            param_space (dict or list): Either a dictionary of parameter names to lists of values, which is expanded
+                into every combination, or a list of parameter dictionaries to run as given.
+                Example: {'rsi_period': [10, 14], 'oversold': [20, 30]} runs 4 backtests
+            workers (int): The number of backtests to run at once. Defaults to the number of CPUs
+            to (str): Identical to backtest()
+            initial_values (dict): Identical to backtest()
+            start_date (str): Identical to backtest()
+            end_date (str): Identical to backtest()
+            settings_path (str): Identical to backtest()
+
+            Keyword Arguments:
+                Identical to backtest(). GUI_output and show_progress_during_backtest are always disabled.
+
+        Returns:
+            A dataframe with one row per parameter set containing the parameters and the backtest metrics
+
+        Platforms without the 'fork' start method (such as Windows) run the parameter sets one at a time in this
+        process instead. The callbacks can't be pickled for spawned processes.
+        """
+        global _grid_strategy
+
+        if isinstance(param_space, dict):
+            names = list(param_space.keys())
+            param_sets = [dict(zip(names, values)) for values in itertools.product(*param_space.values())]
+        else:
+            param_sets = list(param_space)
+
+        kwargs['GUI_output'] = False
+        kwargs['show_progress_during_backtest'] = False
+
+        self.setup_model()
+        self.__add_prices(to, start_date, end_date)
+        self.model.preload_backtest_prices(settings_path=settings_path, kwargs=kwargs)
+
+        jobs = [(params, initial_values, settings_path, kwargs) for params in param_sets]
+
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            info_print("Multiprocessing with fork isn't available on this platform. The grid will be backtested "
+                       "serially.")
+            try:
+                results = [self.__serial_grid_backtest(job) for job in jobs]
+            finally:
+                self.model.backtester.preloaded_prices = None
+            return pd.DataFrame([{**params, **metrics} for params, metrics in zip(param_sets, results)])
+
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+
+        context = multiprocessing.get_context('fork')
+        results = [None] * len(jobs)
+        pending = list(enumerate(jobs))
+        running = {}
+
+        _grid_strategy = self
+        try:
+            while pending or running:
+                # Every configuration gets a freshly forked process so no state carries between backtests. Processes
+                #  are only ever forked from this thread
+                while pending and len(running) < workers:
+                    index, job = pending.pop(0)
+                    receiver, sender = context.Pipe(duplex=False)
+                    process = context.Process(target=_run_grid_backtest, args=(job, sender), daemon=True)
+                    process.start()
+                    sender.close()
+                    running[receiver] = (index, process)
+
+                for receiver in multiprocessing.connection.wait(list(running.keys())):
+                    index, process = running.pop(receiver)
+                    try:
+                        succeeded, output = receiver.recv()
+                    except EOFError:
+                        succeeded, output = False, f"Process exited with code {process.exitcode}"
+                    receiver.close()
+                    process.join()
+
+                    if not succeeded:
+                        raise RuntimeError(f"Backtest failed for parameters {param_sets[index]}:\n{output}")
+                    results[index] = output
+        finally:
+            for receiver, (index, process) in running.items():
+                process.terminate()
+                receiver.close()
+            _grid_strategy = None
+            self.model.backtester.preloaded_prices = None
+
+        return pd.DataFrame([{**params, **metrics} for params, metrics in zip(param_sets, results)])
+
+    def __serial_grid_backtest(self, job: tuple) -> dict:
+        """
+        Run a backtest_grid() configuration in this process, putting the state variables back afterwards so that
+        nothing carries over into the next configuration
+        """
+        variables = [scheduler.get_kwargs()['variables'] for scheduler in self.schedulers]
+        saved = [copy.deepcopy(dict(i)) for i in variables]
+        try:
+            return _grid_backtest_metrics(self, job)
+        except Exception as e:
+            raise RuntimeError(f"Backtest failed for parameters {job[0]}") from e
+        finally:
+            for current, initial in zip(variables, saved):
+                current.clear()
+                current.update(initial)
+
     def __add_prices(self, to, start_date, end_date):
         for scheduler in self.schedulers:
             event_element = scheduler.get_kwargs()
@@ -364,16 +587,23 @@ class Strategy(StrategyBase):
                                       self.ticker_websockets, self.orderbook_manager,
                                       self.ticker_manager)
 
-    def start(self):
+    def start(self, async_runtime: bool = False):
         """
         Run your model live!
 
         Simply call this function to take your strategy configuration live on your exchange
+
+        Args:
+            async_runtime: Run every event on a single asyncio event loop instead of giving each event its own
+                thread. Callbacks can then be written as coroutines (async def), and synchronous callbacks run on a
+                shared thread pool. Callbacks for the same event never overlap.
         """
         self.setup_model()
         if self.remote_backtesting:
             warnings.warn("Aborted attempt to start a live strategy a backtest configuration")
             return
+        if async_runtime:
+            self.model.runtime = AsyncRuntime(self.model)
         self.model.run()
 
     def time(self) -> float:
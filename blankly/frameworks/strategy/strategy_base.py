@@ -207,13 +207,17 @@ class StrategyBase:
             else:
                 blankly.reporter.export_used_symbol(symbol)
 
-    @staticmethod
-    def __websocket_callback(tick, **kwargs):
+    def __websocket_callback(self, tick, **kwargs):
         user_callback = kwargs['user_callback']
         user_symbol = kwargs['user_symbol']
         user_state = kwargs['state']
 
-        user_callback(tick, user_symbol, user_state)
+        runtime = getattr(self.model, 'runtime', None)
+        if runtime is not None and runtime.loop is not None:
+            # Hand the tick to the event loop so that the websocket thread can keep reading
+            runtime.dispatch(user_callback, tick, user_symbol, user_state)
+        else:
+            user_callback(tick, user_symbol, user_state)
 
     def add_tick_event(self, callback: callable, symbol: str, init: callable = None, teardown: callable = None,
                        variables: dict = None):
@@ -277,11 +281,14 @@ class StrategyBase:
 
         self.orderbook_websockets.append([symbol, self.__exchange.get_type(), init, state, teardown])
 
-    def start(self):
+    def start(self, async_runtime: bool = False):
         """
         Run your model live!
 
         Simply call this function to take your strategy configuration live on your exchange
+
+        Args:
+            async_runtime: Run every event on a single asyncio event loop instead of a thread per event
         """
         raise NotImplementedError
 
@@ -30,9 +30,10 @@ from blankly.indicators.utils import check_series
 def bbands(data, period=14, stddev=2):
     series = pd.Series(data)
     bands = ta.bbands(series, length=period, std=stddev)
-    lower = bands[f"BBL_{period}_{float(stddev)}"].dropna().to_numpy()
-    middle = bands[f"BBM_{period}_{float(stddev)}"].dropna().to_numpy()
-    upper = bands[f"BBU_{period}_{float(stddev)}"].dropna().to_numpy()
+    # Newer pandas-ta versions name the columns with both deviations (BBL_14_2.0_2.0) so select them by position
+    lower = bands.iloc[:, 0].dropna().to_numpy()
+    middle = bands.iloc[:, 1].dropna().to_numpy()
+    upper = bands.iloc[:, 2].dropna().to_numpy()
     return lower, middle, upper
 
 
@@ -0,0 +1,137 @@
+"""
+    NumPy kernels for the batch indicators when the input isn't a pandas series
+    Copyright (C) 2021 Brandon Fan
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from collections import deque
+from typing import Any, Callable, Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Past this many values the compiled pandas-ta routines are faster than the kernels (see
+#  tests/indicators/benchmark_indicators.py)
+KERNEL_MAX_SIZE = 2000
+
+# The most values held in a temporary array when reducing rolling windows
+_CHUNK_VALUES = 1 << 20
+
+
+def use_kernel(data: Any, use_series: bool) -> bool:
+    """
+    Lists, deques and arrays skip pandas-ta unless a series was asked for or the input is long
+    """
+    return not use_series and isinstance(data, (list, deque, np.ndarray)) and len(data) <= KERNEL_MAX_SIZE
+
+
+def to_array(data: Any) -> np.ndarray:
+    if isinstance(data, np.ndarray):
+        return data.astype(np.float64, copy=False)
+    return np.fromiter(data, np.float64, len(data))
+
+
+def kernel_input(data: Any, use_series: bool) -> Optional[np.ndarray]:
+    """
+    The data as a float array when a kernel can compute the indicator, otherwise None to go through pandas-ta.
+    Missing or infinite values always go through pandas-ta so that they're dropped the same way
+    """
+    if not use_kernel(data, use_series):
+        return None
+    try:
+        values = to_array(data)
+    except (TypeError, ValueError):
+        return None
+    return values if np.isfinite(values).all() else None
+
+
+def _drop_nan(x: np.ndarray) -> np.ndarray:
+    # The same as the dropna() at the end of the pandas-ta path
+    return x[~np.isnan(x)]
+
+
+def _rolling(x: np.ndarray, period: int, reduce: Callable[[np.ndarray], np.ndarray]) -> np.ndarray:
+    """
+    Apply a reduction to every full window of the data. Windows are reduced in chunks so that reductions which
+    create temporary arrays never hold more than _CHUNK_VALUES values at once
+    """
+    if period < 1 or len(x) < period:
+        return np.empty(0)
+    windows = sliding_window_view(x, period)
+    rows = max(1, _CHUNK_VALUES // period)
+    if len(windows) <= rows:
+        return reduce(windows)
+    return np.concatenate([reduce(windows[i:i + rows]) for i in range(0, len(windows), rows)])
+
+
+def _ewm(values: list, alpha: float) -> list:
+    """
+    An exponentially weighted mean without adjustment, computed with the same operations as pandas so that both give
+    identical results
+    """
+    old_weight = 1 - alpha
+    total_weight = old_weight + alpha
+    weighted = values[0]
+    output = [weighted]
+    for value in values[1:]:
+        if weighted != value:
+            weighted = (old_weight * weighted + alpha * value) / total_weight
+        output.append(weighted)
+    return output
+
+
+def sma(x: np.ndarray, period: int) -> np.ndarray:
+    weights = np.ones(period) / period
+    return _rolling(x, period, lambda windows: windows @ weights)
+
+
+def ema(x: np.ndarray, period: int) -> np.ndarray:
+    if len(x) < period:
+        return np.empty(0)
+    # Seeded with the simple average of the first period values
+    values = x[period:].tolist()
+    values.insert(0, float(x[:period].mean()))
+    return np.array(_ewm(values, 1 / (1 + (period - 1) / 2)))
+
+
+def wma(x: np.ndarray, period: int) -> np.ndarray:
+    weights = np.arange(1, period + 1, dtype=np.float64)
+    return _rolling(x, period, lambda windows: (windows * weights).sum(axis=1)) * (2 / (period * period + period))
+
+
+def rsi(x: np.ndarray, period: int) -> np.ndarray:
+    change = np.diff(x)
+    if len(change) == 0:
+        return np.empty(0)
+    # Go through the center of mass the same way pandas does with an alpha
+    alpha = 1 / period
+    alpha = 1 / (1 + (1 - alpha) / alpha)
+    gain = np.array(_ewm(np.where(change < 0, 0, change).tolist(), alpha))
+    loss = np.abs(_ewm(np.where(change > 0, 0, change).tolist(), alpha))
+    # Prices that haven't moved yet give 0 / 0, which pandas-ta drops
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return _drop_nan(100 * gain / (gain + loss))
+
+
+def minimum(x: np.ndarray, period: int) -> np.ndarray:
+    return _rolling(x, period, lambda windows: windows.min(axis=1))
+
+
+def maximum(x: np.ndarray, period: int) -> np.ndarray:
+    return _rolling(x, period, lambda windows: windows.max(axis=1))
+
+
+def total(x: np.ndarray, period: int) -> np.ndarray:
+    return _rolling(x, period, lambda windows: windows.sum(axis=1))
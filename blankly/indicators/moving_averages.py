@@ -27,12 +27,16 @@ import pandas as pd
 np.NaN = np.nan
 import pandas_ta as ta
 
+from blankly.indicators import kernels
 from blankly.indicators.utils import check_series
 
 
 def ema(data: Any, period: int = 50, use_series=False) -> Any:
     if check_series(data):
         use_series = True
+    values = kernels.kernel_input(data, use_series)
+    if values is not None:
+        return kernels.ema(values, period)
     series = pd.Series(data)
     ema = ta.ema(series, length=period).dropna()
     return ema if use_series else ema.to_numpy()
@@ -52,6 +56,9 @@ def vwma(data: Any, volume_data: Any, period: int = 50, use_series=False) -> Any
 def wma(data: Any, period: int = 50, use_series=False) -> Any:
     if check_series(data):
         use_series = True
+    values = kernels.kernel_input(data, use_series)
+    if values is not None:
+        return kernels.wma(values, period)
     series = pd.Series(data)
     wma = ta.wma(series, length=period).dropna()
     return wma if use_series else wma.to_numpy()
@@ -74,6 +81,9 @@ def sma(data: Any, period: int = 50, use_series=False) -> Any:
     """
     if check_series(data):
         use_series = True
+    values = kernels.kernel_input(data, use_series)
+    if values is not None:
+        return kernels.sma(values, period)
     series = pd.Series(data)
     sma = ta.sma(series, length=period).dropna()
     return sma if use_series else sma.to_numpy()
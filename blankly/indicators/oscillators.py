@@ -26,6 +26,7 @@ import pandas as pd
 np.NaN = np.nan
 import pandas_ta as ta
 
+from blankly.indicators import kernels
 from blankly.indicators.utils import check_series
 
 
@@ -35,6 +36,10 @@ def rsi(data: Any, period: int = 14, round_rsi: bool = False, use_series=False)
         return pd.Series() if use_series else []
     if check_series(data):
         use_series = True
+    values = kernels.kernel_input(data, use_series)
+    if values is not None:
+        rsi_values = kernels.rsi(values, period)
+        return np.round(rsi_values, 2) if round_rsi else rsi_values
     series = pd.Series(data)
     rsi_values = ta.rsi(series, length=period).dropna()
     if round_rsi:
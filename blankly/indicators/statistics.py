@@ -26,12 +26,15 @@ import pandas as pd
 np.NaN = np.nan
 import pandas_ta as ta
 
+from blankly.indicators import kernels
 from blankly.indicators.utils import check_series
 
 
 def stddev_period(data, period=14, use_series=False) -> Any:
     if check_series(data):
         use_series = True
+    if period > len(data):
+        return pd.Series(dtype=float) if use_series else []
     series = pd.Series(data)
     stddev = ta.stdev(series, length=period).dropna()
     return stddev if use_series else stddev.to_numpy()
@@ -56,6 +59,9 @@ def stderr_period(data, period=14, use_series=False) -> Any:
 def min_period(data, period, use_series=False) -> Any:
     if check_series(data):
         use_series = True
+    values = kernels.kernel_input(data, use_series)
+    if values is not None:
+        return kernels.minimum(values, period)
     series = pd.Series(data)
     minimum = series.rolling(period).min().dropna()
     return minimum if use_series else minimum.to_numpy()
@@ -64,6 +70,9 @@ def min_period(data, period, use_series=False) -> Any:
 def max_period(data, period, use_series=False) -> Any:
     if check_series(data):
         use_series = True
+    values = kernels.kernel_input(data, use_series)
+    if values is not None:
+        return kernels.maximum(values, period)
     series = pd.Series(data)
     maximum = series.rolling(period).max().dropna()
     return maximum if use_series else maximum.to_numpy()
@@ -72,6 +81,9 @@ def max_period(data, period, use_series=False) -> Any:
 def sum_period(data, period, use_series=False) -> Any:
     if check_series(data):
         use_series = True
+    values = kernels.kernel_input(data, use_series)
+    if values is not None:
+        return kernels.total(values, period)
     series = pd.Series(data)
     total = series.rolling(period).sum().dropna()
     return total if use_series else total.to_numpy()
@@ -0,0 +1,311 @@
+"""
+    Incremental indicators that update in constant time with each new value
+    Copyright (C) 2021 Brandon Fan
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import abc
+import math
+from collections import deque
+from typing import Any, Optional
+
+# Used in place of a zero high/low range, the same way pandas-ta does
+_EPSILON = 2.220446049250313e-16
+
+
+class StreamingIndicator(abc.ABC):
+    """
+    An indicator that keeps its own state. Each call to update() takes the newest value and returns the newest
+    indicator value, which matches the last value of the batch function run on every value so far. Until enough
+    values have been given to fill the period the indicator value is None.
+    """
+    def __init__(self):
+        self.value = None
+
+    @property
+    def ready(self) -> bool:
+        return self.value is not None
+
+    @abc.abstractmethod
+    def update(self, *args) -> Any:
+        pass
+
+
+class SMA(StreamingIndicator):
+    def __init__(self, period: int = 50):
+        super().__init__()
+        self.period = period
+        self.__window = deque()
+        self.__total = 0.0
+
+    def update(self, value: float) -> Optional[float]:
+        self.__window.append(value)
+        self.__total += value
+        if len(self.__window) > self.period:
+            self.__total -= self.__window.popleft()
+
+        if len(self.__window) == self.period:
+            self.value = self.__total / self.period
+        return self.value
+
+
+class EMA(StreamingIndicator):
+    def __init__(self, period: int = 50, alpha: float = None):
+        """
+        Exponential moving average seeded with the simple average of the first period values
+
+        Args:
+            period: The number of values in the seed average
+            alpha: The smoothing factor, 2 / (period + 1) by default
+        """
+        super().__init__()
+        self.period = period
+        self.alpha = 2 / (period + 1) if alpha is None else alpha
+        self.__count = 0
+        self.__total = 0.0
+
+    def update(self, value: float) -> Optional[float]:
+        self.__count += 1
+        if self.__count < self.period:
+            self.__total += value
+        elif self.__count == self.period:
+            self.value = (self.__total + value) / self.period
+        else:
+            self.value = (1 - self.alpha) * self.value + self.alpha * value
+        return self.value
+
+
+class Wilders(StreamingIndicator):
+    def __init__(self, period: int = 50):
+        """
+        Wilder's moving average, an exponential moving average with a smoothing factor of 1 / period that starts
+        from the first value
+        """
+        super().__init__()
+        self.period = period
+        self.alpha = 1 / period
+
+    def update(self, value: float) -> float:
+        if self.value is None:
+            self.value = value
+        else:
+            self.value = (1 - self.alpha) * self.value + self.alpha * value
+        return self.value
+
+
+class WMA(StreamingIndicator):
+    def __init__(self, period: int = 50):
+        super().__init__()
+        self.period = period
+        self.__window = deque()
+        self.__total = 0.0
+        self.__weighted_total = 0.0
+
+    def update(self, value: float) -> Optional[float]:
+        self.__window.append(value)
+        if len(self.__window) > self.period:
+            # Every remaining value loses one weight and the newest value gets the full weight
+            self.__weighted_total += self.period * value - self.__total
+            self.__total += value - self.__window.popleft()
+        else:
+            self.__weighted_total += len(self.__window) * value
+            self.__total += value
+
+        if len(self.__window) == self.period:
+            self.value = self.__weighted_total * 2 / (self.period * (self.period + 1))
+        return self.value
+
+
+class StdDev(StreamingIndicator):
+    def __init__(self, period: int = 14):
+        """
+        Sample standard deviation over a rolling window, updated with Welford's method
+        """
+        super().__init__()
+        self.period = period
+        self.variance = None
+        self.__window = deque()
+        self.__mean = 0.0
+        self.__squares = 0.0
+
+    def update(self, value: float) -> Optional[float]:
+        self.__window.append(value)
+        if len(self.__window) > self.period:
+            removed = self.__window.popleft()
+            previous_mean = self.__mean
+            self.__mean += (value - removed) / self.period
+            self.__squares += (value - removed) * (value - self.__mean + removed - previous_mean)
+        else:
+            delta = value - self.__mean
+            self.__mean += delta / len(self.__window)
+            self.__squares += delta * (value - self.__mean)
+
+        if len(self.__window) == self.period and self.period > 1:
+            self.variance = max(self.__squares, 0.0) / (self.period - 1)
+            self.value = math.sqrt(self.variance)
+        return self.value
+
+
+class RollingExtreme(StreamingIndicator):
+    def __init__(self, period: int, maximum: bool = False):
+        """
+        Rolling minimum (or maximum) using a monotonic queue, which is amortized constant time per value
+        """
+        super().__init__()
+        self.period = period
+        self.maximum = maximum
+        self.__count = 0
+        # Pairs of (index, value) where values only increase (or decrease for a maximum) from the front
+        self.__candidates = deque()
+
+    def update(self, value: float) -> Optional[float]:
+        while self.__candidates and (self.__candidates[-1][1] <= value if self.maximum else
+                                     self.__candidates[-1][1] >= value):
+            self.__candidates.pop()
+        self.__candidates.append((self.__count, value))
+        if self.__candidates[0][0] <= self.__count - self.period:
+            self.__candidates.popleft()
+
+        self.__count += 1
+        if self.__count >= self.period:
+            self.value = self.__candidates[0][1]
+        return self.value
+
+
+class RSI(StreamingIndicator):
+    def __init__(self, period: int = 14):
+        super().__init__()
+        self.period = period
+        self.__count = 0
+        self.__previous = None
+        self.__gain = None
+        self.__loss = None
+
+    def update(self, value: float) -> Optional[float]:
+        self.__count += 1
+        if self.__previous is not None:
+            change = value - self.__previous
+            gain = max(change, 0.0)
+            loss = max(-change, 0.0)
+            if self.__gain is None:
+                self.__gain, self.__loss = gain, loss
+            else:
+                alpha = 1 / self.period
+                self.__gain = (1 - alpha) * self.__gain + alpha * gain
+                self.__loss = (1 - alpha) * self.__loss + alpha * loss
+        self.__previous = value
+
+        if self.__count > self.period:
+            total = self.__gain + self.__loss
+            self.value = 100 * self.__gain / total if total != 0 else math.nan
+        return self.value
+
+
+class MACD(StreamingIndicator):
+    def __init__(self, short_period: int = 12, long_period: int = 26, signal_period: int = 9):
+        """
+        The value is a tuple of (macd, macd_signal, macd_histogram) once the signal line has filled. The macd line
+        alone is available earlier as the macd attribute.
+        """
+        super().__init__()
+        if long_period < short_period:
+            short_period, long_period = long_period, short_period
+        self.__short = EMA(short_period)
+        self.__long = EMA(long_period)
+        self.__signal = EMA(signal_period)
+        self.macd = None
+
+    def update(self, value: float) -> Optional[tuple]:
+        short = self.__short.update(value)
+        long = self.__long.update(value)
+        if long is None:
+            return self.value
+
+        self.macd = short - long
+        signal = self.__signal.update(self.macd)
+        if signal is not None:
+            self.value = (self.macd, signal, self.macd - signal)
+        return self.value
+
+
+class BBands(StreamingIndicator):
+    def __init__(self, period: int = 14, stddev: float = 2):
+        """
+        The value is a tuple of the (lower, middle, upper) bands
+        """
+        super().__init__()
+        self.stddev = stddev
+        self.__middle = SMA(period)
+        self.__deviation = StdDev(period)
+
+    def update(self, value: float) -> Optional[tuple]:
+        middle = self.__middle.update(value)
+        deviation = self.__deviation.update(value)
+        if middle is not None and deviation is not None:
+            self.value = (middle - self.stddev * deviation, middle, middle + self.stddev * deviation)
+        return self.value
+
+
+class TrueRange(StreamingIndicator):
+    def __init__(self):
+        super().__init__()
+        self.__previous_close = None
+
+    def update(self, high: float, low: float, close: float) -> float:
+        self.value = abs(high - low) if high != low else _EPSILON
+        if self.__previous_close is not None:
+            self.value = max(self.value, abs(high - self.__previous_close), abs(self.__previous_close - low))
+        self.__previous_close = close
+        return self.value
+
+
+class ATR(StreamingIndicator):
+    def __init__(self, period: int = 50):
+        super().__init__()
+        self.__true_range = TrueRange()
+        # Wilder's smoothing seeded with the simple average of the first period true ranges
+        self.__average = EMA(period, alpha=1 / period)
+
+    def update(self, high: float, low: float, close: float) -> Optional[float]:
+        self.value = self.__average.update(self.__true_range.update(high, low, close))
+        return self.value
+
+
+class StochasticOscillator(StreamingIndicator):
+    def __init__(self, pct_k_period: int = 14, pct_k_slowing_period: int = 3, pct_d_period: int = 3):
+        """
+        The value is a tuple of (pct_k, pct_d) once both lines have filled
+        """
+        super().__init__()
+        self.__lowest = RollingExtreme(pct_k_period)
+        self.__highest = RollingExtreme(pct_k_period, maximum=True)
+        self.__pct_k = SMA(pct_k_slowing_period)
+        self.__pct_d = SMA(pct_d_period)
+
+    def update(self, high: float, low: float, close: float) -> Optional[tuple]:
+        lowest = self.__lowest.update(low)
+        highest = self.__highest.update(high)
+        if lowest is None:
+            return self.value
+
+        spread = highest - lowest
+        pct_k = self.__pct_k.update(100 * (close - lowest) / (spread if spread != 0 else _EPSILON))
+        if pct_k is None:
+            return self.value
+
+        pct_d = self.__pct_d.update(pct_k)
+        if pct_d is not None:
+            self.value = (pct_k, pct_d)
+        return self.value
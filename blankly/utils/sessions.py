@@ -0,0 +1,218 @@
+"""
+    Pooled keep-alive HTTP sessions shared by the exchange API clients and the asyncio runtime
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import asyncio
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from blankly.utils.utils import load_user_preferences
+
+# Path segments such as order ids or uuids are folded together so each route is one endpoint
+_ID_SEGMENT = re.compile(r'^(?=.*\d)[\w\-.:]{12,}$|^\d+$')
+# Rate limits and server errors that are worth another try
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def endpoint_name(method: str, url: str) -> str:
+    """
+    Name the endpoint of a request: the method, host and path with the ids removed
+    """
+    parts = urlsplit(url)
+    path = '/'.join('{id}' if _ID_SEGMENT.match(segment) else segment for segment in parts.path.split('/'))
+    return f'{method.upper()} {parts.netloc}{path}'
+
+
+class LatencyMetrics:
+    def __init__(self):
+        """
+        Running request latency statistics for each endpoint
+        """
+        self.__lock = threading.Lock()
+        self.__endpoints = {}
+
+    def record(self, endpoint: str, seconds: float, error: bool = False) -> None:
+        with self.__lock:
+            stats = self.__endpoints.get(endpoint)
+            if stats is None:
+                stats = self.__endpoints[endpoint] = {'count': 0, 'errors': 0, 'total': 0.0, 'max': 0.0}
+            stats['count'] += 1
+            stats['total'] += seconds
+            stats['last'] = seconds
+            if seconds > stats['max']:
+                stats['max'] = seconds
+            if error:
+                stats['errors'] += 1
+
+    def get(self) -> dict:
+        """
+        Get the statistics for every endpoint that has been requested
+
+        Returns:
+            {'GET api.binance.com/api/v3/depth': {'count': 12, 'errors': 0, 'mean': 0.08, 'max': 0.2, 'last': 0.07,
+             'total': 0.96}, ...} with times in seconds
+        """
+        with self.__lock:
+            metrics = {}
+            for endpoint, stats in self.__endpoints.items():
+                metrics[endpoint] = dict(stats, mean=stats['total'] / stats['count'])
+            return metrics
+
+    def reset(self) -> None:
+        with self.__lock:
+            self.__endpoints = {}
+
+
+latency_metrics = LatencyMetrics()
+
+
+class PooledSession(requests.Session):
+    def __init__(self, pool_size: int = None, timeout: float = None, retries: int = None,
+                 backoff_factor: float = None, metrics: LatencyMetrics = latency_metrics):
+        """
+        A session that keeps its connections alive in a pool so that each request doesn't open a new TCP and TLS
+        connection. Any argument that isn't given is read from the "http" block of settings.json
+
+        Args:
+            pool_size: The most connections kept open to each host
+            timeout: Seconds to wait for a connection or a response when a request doesn't set its own timeout
+            retries: How many times to retry connection failures and rate limit or server errors. Requests that
+                reach the exchange are only retried for idempotent methods, so an order is never posted twice
+            backoff_factor: Retries wait backoff_factor * 2 ** (retry - 1) seconds, or whatever Retry-After says
+            metrics: Where request latencies are recorded
+        """
+        super().__init__()
+        settings = load_user_preferences(override_allow_nonexistent=True)['settings']['http']
+        self.pool_size = settings['pool_size'] if pool_size is None else pool_size
+        self.timeout = settings['timeout'] if timeout is None else timeout
+        self.retries = settings['retries'] if retries is None else retries
+        self.backoff_factor = settings['backoff_factor'] if backoff_factor is None else backoff_factor
+        self.metrics = metrics
+
+        retry = Retry(total=self.retries,
+                      backoff_factor=self.backoff_factor,
+                      status_forcelist=RETRY_STATUSES,
+                      # Give the exchange's own error back once the retries run out
+                      raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=retry)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+
+        endpoint = endpoint_name(request.method, request.url)
+        start = time.perf_counter()
+        try:
+            response = super().send(request, **kwargs)
+        except requests.exceptions.RequestException:
+            self.metrics.record(endpoint, time.perf_counter() - start, error=True)
+            raise
+        self.metrics.record(endpoint, time.perf_counter() - start, error=response.status_code >= 400)
+        return response
+
+
+class AsyncSession:
+    def __init__(self, pool_size: int = None, timeout: float = None, retries: int = None,
+                 backoff_factor: float = None, metrics: LatencyMetrics = latency_metrics):
+        """
+        The aiohttp counterpart of PooledSession for GET requests awaited on an event loop, so that a request waiting
+        on the exchange doesn't hold a thread. The connections are opened by the first request so that they belong
+        to the running loop. Any argument that isn't given is read from the "http" block of settings.json
+
+        Args:
+            pool_size: The most connections open to each host at once. Requests beyond this wait for a connection
+            timeout: Seconds to wait for the whole request
+            retries: How many times to retry connection failures and rate limit or server errors
+            backoff_factor: Retries wait backoff_factor * 2 ** (retry - 1) seconds
+            metrics: Where request latencies are recorded
+        """
+        try:
+            import aiohttp
+        except ImportError:
+            raise ImportError("Please \"pip install aiohttp\" to request prices on the asyncio runtime.")
+        self.__aiohttp = aiohttp
+
+        settings = load_user_preferences(override_allow_nonexistent=True)['settings']['http']
+        self.pool_size = settings['pool_size'] if pool_size is None else pool_size
+        self.timeout = settings['timeout'] if timeout is None else timeout
+        self.retries = settings['retries'] if retries is None else retries
+        self.backoff_factor = settings['backoff_factor'] if backoff_factor is None else backoff_factor
+        self.metrics = metrics
+
+        self.__session = None
+
+    async def get_json(self, url: str, params: dict = None):
+        """
+        Request a URL and decode its JSON body. Once the retries run out the exchange's own error is given back
+        """
+        aiohttp = self.__aiohttp
+        if self.__session is None:
+            self.__session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit_per_host=self.pool_size),
+                                                   timeout=aiohttp.ClientTimeout(total=self.timeout))
+
+        endpoint = endpoint_name('GET', url)
+        retry = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                async with self.__session.get(url, params=params) as response:
+                    if response.status not in RETRY_STATUSES or retry >= self.retries:
+                        body = await response.json(content_type=None)
+                        self.metrics.record(endpoint, time.perf_counter() - start, error=response.status >= 400)
+                        return body
+                self.metrics.record(endpoint, time.perf_counter() - start, error=True)
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                self.metrics.record(endpoint, time.perf_counter() - start, error=True)
+                if retry >= self.retries:
+                    raise
+
+            await asyncio.sleep(self.backoff_factor * 2 ** retry)
+            retry += 1
+
+    async def close(self) -> None:
+        if self.__session is not None:
+            await self.__session.close()
+            self.__session = None
+
+
+_shared_session = None
+_shared_lock = threading.Lock()
+
+
+def shared_session() -> PooledSession:
+    """
+    The session used for requests that don't need headers of their own, created the first time it's needed
+    """
+    global _shared_session
+    with _shared_lock:
+        if _shared_session is None:
+            _shared_session = PooledSession()
+        return _shared_session
+
+
+def get_latency_metrics() -> dict:
+    """
+    Get the latency of every endpoint requested through a PooledSession or AsyncSession. See LatencyMetrics.get()
+    """
+    return latency_metrics.get()
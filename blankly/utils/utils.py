@@ -33,10 +33,17 @@ default_general_settings = {
     "settings": {
         "use_sandbox_websockets": False,
         "websocket_buffer_size": 10000,
+        "multiplex_websockets": False,
         "test_connectivity_on_auth": True,
         "auto_truncate": False,
         "global_shorting": False,
         "simulate_margin": True,
+        "http": {
+            "pool_size": 10,
+            "timeout": 30,
+            "retries": 3,
+            "backoff_factor": 0.3
+        },
 
         "coinbase_pro": {
             "cash": "USD"
@@ -87,12 +94,15 @@ default_backtest_settings = {
     },
     "settings": {
         "use_price": "close",
+        "fill_model": "price",
+        "intrabar_path": "nearest",
         "smooth_prices": False,
         "GUI_output": True,
         "show_tickers_with_zero_delta": False,
         "save_initial_account_value": True,
         "show_progress_during_backtest": True,
         "cache_location": "./price_caches",
+        "cache_format": "npy",
         "continuous_caching": True,
         "resample_account_value_for_metrics": "1d",
         "quote_account_value_in": "USD",
@@ -468,6 +478,23 @@ def convert_epochs(epoch):
     return epoch
 
 
+def convert_epoch_array(epochs: np.ndarray) -> np.ndarray:
+    """
+    Apply convert_epochs() to every epoch in an array at once. Each epoch is divided by its power of ten a single
+    time, and arrays that are already in seconds are given back unchanged
+    """
+    epochs = np.asarray(epochs)
+    over = epochs > 5000000000
+    if not over.any():
+        return epochs
+
+    scales = np.ones(len(epochs))
+    while over.any():
+        scales[over] *= 10
+        over = epochs / scales > 5000000000
+    return epochs / scales
+
+
 def compare_dictionaries(dict1, dict2, force_exchange_specific=True) -> bool:
     """
     Compare two output dictionaries to check if they have the same keys (excluding "exchange_specific")
@@ -580,27 +607,62 @@ def split_df(df, n):
     return df.groupby(np.arange(len(df)) // n)
 
 
+OHLCV_COLUMNS = ['time', 'open', 'high', 'low', 'close', 'volume']
+
+
+def _reduce_ohlcv(candles: pd.DataFrame, starts: np.ndarray, times: np.ndarray) -> pd.DataFrame:
+    # Build one candle from each run of rows beginning at the start offsets
+    ends = np.append(starts[1:], len(candles)) - 1
+    return pd.DataFrame({
+        'time': times,
+        'open': candles['open'].to_numpy()[starts],
+        'high': np.maximum.reduceat(candles['high'].to_numpy(dtype=float), starts),
+        'low': np.minimum.reduceat(candles['low'].to_numpy(dtype=float), starts),
+        'close': candles['close'].to_numpy()[ends],
+        'volume': np.add.reduceat(candles['volume'].to_numpy(dtype=float), starts)
+    })
+
+
+def aggregate_ohlcv(candles: pd.DataFrame, resolution: int, origin: int = 0) -> pd.DataFrame:
+    """
+    Aggregate candles into coarser candles on bins aligned to the epoch (such as turning 1m data into 1h candles that
+    open on the hour). Missing candles don't shift the bins: each bin is built from whichever candles fall inside it
+    and bins without any candles are left out
+
+    Args:
+        candles: A blankly generated dataframe
+        resolution: The resolution of the aggregated candles in seconds
+        origin: Offset of the bins from the epoch in seconds, for candles that don't open on the epoch grid
+    """
+    if len(candles) == 0:
+        return pd.DataFrame(columns=OHLCV_COLUMNS)
+    if not candles['time'].is_monotonic_increasing:
+        candles = candles.sort_values('time', kind='stable')
+
+    bins = np.floor((candles['time'].to_numpy(dtype=float) - origin) / resolution).astype('int64')
+    starts = np.flatnonzero(np.diff(bins, prepend=bins[0] - 1))
+    return _reduce_ohlcv(candles, starts, bins[starts] * int(resolution) + origin)
+
+
 def get_ohlcv(candles, n, from_zero: bool):
+    """
+    Aggregate every n rows of candles into a single candle
+
+    Args:
+        candles: A dataframe of candles
+        n: The number of rows in each aggregated candle
+        from_zero: Read the times from the 'time' column. Otherwise they're read from the datetime index
+    """
     if len(candles) < n:
         raise ValueError("Not enough candles provided, required at least {} candles, "
                          "but only received {}".format(n, len(candles)))
-    new_candles = pd.DataFrame()
-    df = split_df(candles, n)
-    new_candles['high'] = df['high'].max().reset_index(drop=True)
-    new_candles['low'] = df['low'].min().reset_index(drop=True)
-    new_candles['volume'] = df['volume'].sum().reset_index(drop=True)
-    new_candles['volume'] = new_candles['volume'].apply(lambda x: float(x))
+    starts = np.arange(0, len(candles), n)
     if from_zero:
-        new_candles['close'] = candles['close'].iloc[0::n].reset_index(drop=True)
-        new_candles['open'] = candles['open'].iloc[0::n].reset_index(drop=True)
-        new_candles['time'] = candles['time'].iloc[0::n].reset_index(drop=True).astype('int64')
-        new_candles['time'] = new_candles['time'].apply(lambda x: np.int64(x))
+        times = candles['time'].to_numpy(dtype='int64')[starts]
     else:
-        new_candles['close'] = candles['close'].iloc[::n].reset_index(drop=True)
-        new_candles['open'] = candles['open'].iloc[::n].reset_index(drop=True)
-        new_candles['time'] = candles.index.to_series().iloc[::n].reset_index(drop=True)
-        new_candles['time'] = new_candles['time'].apply(lambda x: np.int64(x.timestamp()))
-    return new_candles
+        index = candles.index
+        times = ((index - pd.Timestamp(0, tz=index.tz)) // pd.Timedelta(seconds=1)).to_numpy(dtype='int64')[starts]
+    return _reduce_ohlcv(candles, starts, times)
 
 
 def aggregate_candles(history: pd.DataFrame, aggregation_size: int):
@@ -609,26 +671,12 @@ def aggregate_candles(history: pd.DataFrame, aggregation_size: int):
     Args:
         history: A blankly generated dataframe
         aggregation_size: How many rows of history to aggregate - ex: aggregation_size=15 on 1m data produces
-         15m intervals
+         15m intervals. Use aggregate_ohlcv() to aggregate by time when the history may be missing candles
     """
-    aggregated = pd.DataFrame()
-    splits = split_df(history, aggregation_size)
-    for i in splits:
-        # Build candles from the split dataframes
-        frame: dict = i[1].to_dict()
-        try:
-            tick = {
-                'time': list(frame['time'].values())[0],
-                'open': list(frame['open'].values())[0],
-                'high': max(frame['high'].values()),
-                'low': min(frame['low'].values()),
-                'close': list(frame['close'].values())[-1],
-                'volume': sum(frame['volume'].values()),
-            }
-        except IndexError:
-            continue
-        aggregated = aggregated.append(tick, ignore_index=True)
-    return aggregated
+    if len(history) == 0:
+        return pd.DataFrame(columns=OHLCV_COLUMNS)
+    starts = np.arange(0, len(history), aggregation_size)
+    return _reduce_ohlcv(history, starts, history['time'].to_numpy()[starts])
 
 
 def get_ohlcv_from_list(tick_list: list, last_price: float):
@@ -832,6 +880,23 @@ def trim_df_time_column(df, epoch_start: [int, float], epoch_stop: [int, float])
     return df
 
 
+def slice_df_time_column(df, time_index: np.ndarray, epoch_start: [int, float], epoch_stop: [int, float]):
+    """
+    Identical output to trim_df_time_column but found with a binary search over a pre-sorted time index rather than
+    two boolean masks over the whole dataframe
+
+    Args:
+        df: A dataframe sorted by its time column
+        time_index: The time column of df as a sorted numpy array
+        epoch_start: The first time to include
+        epoch_stop: The last time to include
+    """
+    start = np.searchsorted(time_index, epoch_start, side='left')
+    stop = np.searchsorted(time_index, epoch_stop, side='right')
+
+    return df.iloc[start:stop]
+
+
 def aggregate_prices_by_resolution(price_dict, symbol_, resolution_, data_) -> dict:
     if symbol_ not in price_dict:
         price_dict[symbol_] = {}
@@ -844,7 +909,19 @@ def aggregate_prices_by_resolution(price_dict, symbol_, resolution_, data_) -> d
     return price_dict
 
 
-def extract_price_by_resolution(prices, symbol, epoch_start, epoch_stop, resolution):
+def extract_price_by_resolution(prices, symbol, epoch_start, epoch_stop, resolution, time_index: dict = None):
+    """
+    Pull a window of prices out of a dictionary of {symbol: {resolution: dataframe}}
+
+    Args:
+        prices: The price dictionary
+        symbol: The symbol to extract
+        epoch_start: The start of the window
+        epoch_stop: The end of the window
+        resolution: The resolution of the prices to extract
+        time_index: Optional matching dictionary of {symbol: {resolution: sorted time array}}. When given the window is
+         found with a binary search instead of filtering the whole dataframe
+    """
     if symbol in prices:
         if resolution in prices[symbol]:
             price_set = prices[symbol][resolution]
@@ -853,6 +930,9 @@ def extract_price_by_resolution(prices, symbol, epoch_start, epoch_stop, resolut
     else:
         raise LookupError(f"Prices for this symbol ({symbol}) not found")
 
+    if time_index is not None:
+        return slice_df_time_column(price_set, time_index[symbol][resolution], epoch_start - resolution, epoch_stop)
+
     return trim_df_time_column(price_set, epoch_start - resolution, epoch_stop)
 
 
@@ -0,0 +1,42 @@
+"""
+    Compare PriceReader's vectorized epoch conversion and resolution guessing against a row by row guess
+    Run with: python -m tests.backtest.benchmark_price_reader
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import timeit
+
+from blankly.data import PriceReader
+from tests.backtest.test_data_reader import make_minute_frames, rowwise_guess
+
+SYMBOL_COUNTS = [10, 100, 300]
+ROWS = 1440
+
+
+def benchmark():
+    print(f"{'symbols':>8}{'rows':>8}{'PriceReader (ms)':>18}{'row by row (ms)':>17}{'speedup':>10}")
+    for count in SYMBOL_COUNTS:
+        frames, symbols = make_minute_frames(count, ROWS)
+
+        reader_time = min(timeit.repeat(lambda: PriceReader(frames, symbols), number=1, repeat=3))
+        rowwise_time = min(timeit.repeat(lambda: [rowwise_guess(frame) for frame in frames], number=1, repeat=3))
+
+        print(f"{count:>8}{ROWS:>8}{reader_time * 1000:>18.1f}{rowwise_time * 1000:>17.1f}"
+              f"{rowwise_time / reader_time:>9.1f}x")
+
+
+if __name__ == '__main__':
+    benchmark()
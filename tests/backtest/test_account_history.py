@@ -0,0 +1,55 @@
+"""
+    Tests for the columnar account value history
+    Copyright (C) 2021  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from blankly.exchanges.interfaces.paper_trade.backtest.account_history import AccountHistory
+
+
+class AccountHistoryTest(unittest.TestCase):
+    def test_matches_rows_of_dicts(self):
+        history = AccountHistory(capacity=2)
+        rows = []
+        history.set_columns(['BTC', 'time', 'USD'])
+        for i in range(5):
+            history.append([i / 10, 100 + i, 1000 - i])
+            rows.append({'BTC': i / 10, 'time': 100 + i, 'USD': 1000 - i})
+
+        # A new asset is traded partway through
+        history.set_columns(['BTC', 'time', 'USD', 'ETH'])
+        for i in range(5, 9):
+            history.append([i / 10, 100 + i, 1000 - i, i])
+            rows.append({'BTC': i / 10, 'time': 100 + i, 'USD': 1000 - i, 'ETH': i})
+
+        self.assertEqual(len(history), 9)
+        pd.testing.assert_frame_equal(history.to_frame(), pd.DataFrame(rows).astype(float))
+        self.assertTrue(np.isnan(history.to_frame()['ETH'][:5]).all())
+
+    def test_empty(self):
+        history = AccountHistory()
+        history.set_columns(['time', 'USD'])
+        frame = history.to_frame()
+        self.assertEqual(list(frame.columns), ['time', 'USD'])
+        self.assertEqual(len(frame), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
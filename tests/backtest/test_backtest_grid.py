@@ -0,0 +1,108 @@
+"""
+    Tests for running parameter grids of backtests
+    Copyright (C) 2021  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import multiprocessing
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+import blankly
+from blankly.data import PriceReader
+
+
+def price_event(price, symbol, state: blankly.StrategyState):
+    history = state.variables.setdefault('history', [])
+    history.append(price)
+    if len(history) > state.variables['slow']:
+        fast = np.mean(history[-state.variables['fast']:])
+        slow = np.mean(history[-state.variables['slow']:])
+        held = state.interface.account[state.base_asset].available
+        if fast > slow and not held:
+            state.interface.market_order(symbol, 'buy', 10)
+        elif fast < slow and held:
+            state.interface.market_order(symbol, 'sell', held)
+
+
+class BacktestGrid(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        size = 500
+        generator = np.random.default_rng(1)
+        close = np.abs(100 + np.cumsum(generator.normal(0, 1, size))) + 10
+        cls.start = 1600000000
+        cls.stop = cls.start + (size - 1) * 3600
+        cls.prices = pd.DataFrame({
+            'time': cls.start + np.arange(size) * 3600,
+            'open': close,
+            'high': close + 1,
+            'low': close - 1,
+            'close': close,
+            'volume': 1.0
+        })
+        cls.cache = tempfile.TemporaryDirectory()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.cache.cleanup()
+
+    def create_strategy(self, variables: dict) -> blankly.Strategy:
+        exchange = blankly.KeylessExchange(price_reader=PriceReader(self.prices, 'AAA-USD'),
+                                           settings_path='./tests/config/settings.json')
+        strategy = blankly.Strategy(exchange)
+        strategy.add_price_event(price_event, 'AAA-USD', '1h', variables=variables)
+        return strategy
+
+    def backtest_kwargs(self) -> dict:
+        return {
+            'start_date': self.start,
+            'end_date': self.stop,
+            'initial_values': {'USD': 100000},
+            'settings_path': './tests/config/backtest.json',
+            'cache_location': self.cache.name,
+            'benchmark_symbol': None
+        }
+
+    @unittest.skipIf('fork' not in multiprocessing.get_all_start_methods(), "Worker processes are forked")
+    def test_grid_matches_single_backtests(self):
+        strategy = self.create_strategy({'fast': 5, 'slow': 20})
+        grid = strategy.backtest_grid({'fast': [3, 8], 'slow': [20, 40]}, workers=2, **self.backtest_kwargs())
+
+        self.assertEqual(len(grid), 4)
+        self.assertEqual(grid[['fast', 'slow']].values.tolist(), [[3, 20], [3, 40], [8, 20], [8, 40]])
+
+        single = self.create_strategy({'fast': 8, 'slow': 40}).backtest(GUI_output=False,
+                                                                        show_progress_during_backtest=False,
+                                                                        **self.backtest_kwargs())
+        for metric in single.get_metrics().values():
+            self.assertEqual(grid.iloc[3][metric['display_name']], metric['value'])
+
+    def test_grid_without_fork(self):
+        space = [{'fast': 3, 'slow': 20}, {'fast': 8, 'slow': 40}]
+        with mock.patch('multiprocessing.get_all_start_methods', return_value=['spawn']):
+            grid = self.create_strategy({'fast': 5, 'slow': 20}).backtest_grid(space, **self.backtest_kwargs())
+
+        # Each configuration starts from the original variables even though they all run in this process
+        for row, params in zip(grid.itertuples(), space):
+            single = self.create_strategy(dict(params)).backtest(GUI_output=False,
+                                                                 show_progress_during_backtest=False,
+                                                                 **self.backtest_kwargs())
+            for metric in single.get_metrics().values():
+                self.assertEqual(grid.loc[row.Index, metric['display_name']], metric['value'])
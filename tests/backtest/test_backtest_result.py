@@ -0,0 +1,60 @@
+"""
+    Tests for resampling backtest results
+    Copyright (C) 2021  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from blankly.exchanges.interfaces.paper_trade.backtest_result import BacktestResult
+
+
+def make_result(history: pd.DataFrame) -> BacktestResult:
+    return BacktestResult({'history': history}, {}, {'BTC-USD': history.rename(columns={'value': 'close'})},
+                          history['time'].iloc[0], history['time'].iloc[-1], 'USD', [])
+
+
+class ResampleAccountTest(unittest.TestCase):
+    def test_uneven_times(self):
+        history = pd.DataFrame({'time': [0, 50, 60, 130, 200, 400], 'value': [1., 2., 3., 4., 5., 6.]})
+        resampled = make_result(history).resample_account('value', '1m')
+
+        self.assertEqual(resampled['time'].tolist(), [0, 60, 120, 180, 240, 300, 360])
+        # A step takes the value from the start of the range it lands in, including when it lands on the end
+        self.assertEqual(resampled['value'].tolist(), [1., 2., 3., 4., 5., 5., 5.])
+
+    def test_asset_history(self):
+        history = pd.DataFrame({'time': np.arange(0, 1000, 10), 'value': np.arange(100, dtype=np.float64)})
+        resampled = make_result(history).resample_account('BTC-USD', 100, use_asset_history=True, use_price='close')
+
+        self.assertEqual(resampled['time'].tolist(), list(range(0, 1000, 100)))
+        self.assertEqual(resampled['value'].tolist(), [0.] + [float(i) for i in range(9, 99, 10)])
+
+    def test_single_row(self):
+        history = pd.DataFrame({'time': [100], 'value': [5.]})
+        resampled = make_result(history).resample_account('value', '1d')
+        self.assertEqual(resampled.values.tolist(), [[100, 5.]])
+
+    def test_invalid_times(self):
+        history = pd.DataFrame({'time': [None, None], 'value': [1., 2.]})
+        with self.assertRaises(TypeError):
+            make_result(history).resample_account('value', '1d')
+
+
+if __name__ == '__main__':
+    unittest.main()
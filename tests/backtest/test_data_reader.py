@@ -0,0 +1,180 @@
+"""
+    Tests for reading price, tick and event files inside a time window and streaming them in chunks
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from blankly.data import JsonEventReader, PriceReader, TickReader
+from blankly.utils import convert_epochs
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+START = 1600000000
+
+
+def make_prices(n: int, scale: int = 1) -> pd.DataFrame:
+    close = 100 + np.cumsum(np.random.default_rng(0).normal(0, 1, n))
+    return pd.DataFrame({'time': (START + np.arange(n) * 60) * scale, 'open': close, 'high': close + 1,
+                         'low': close - 1, 'close': close, 'volume': 1.0})
+
+
+def make_ticks(n: int) -> pd.DataFrame:
+    rng = np.random.default_rng(1)
+    return pd.DataFrame({'time': np.sort(rng.integers(START, START + 10000, n)), 'price': rng.uniform(90, 110, n),
+                         'size': rng.uniform(0, 1, n)})
+
+
+def make_minute_frames(count: int, rows: int) -> tuple:
+    """
+    Days of minute bars in milliseconds for many symbols, each with a few missing bars
+    """
+    rng = np.random.default_rng(0)
+    frames, symbols = [], []
+    for i in range(count):
+        times = np.delete(START + np.arange(rows) * 60, rng.choice(rows, 20, replace=False)) * 1000
+        frames.append(make_prices(len(times)).assign(time=times))
+        symbols.append(f'S{i}-USD')
+    return frames, symbols
+
+
+def rowwise_guess(frame: pd.DataFrame) -> dict:
+    """
+    Guess the resolution with a python call per row, the way PriceReader used to
+    """
+    time_series = frame['time'].apply(lambda x: convert_epochs(x))
+    time_dif = time_series.diff()
+    return {'resolution': int(time_dif.value_counts().idxmax()), 'start_time': time_series.iloc[0],
+            'stop_time': time_series.iloc[-1]}
+
+
+class DataReaderTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory.name, name)
+
+    def test_price_window(self):
+        prices = make_prices(1000)
+        prices.to_csv(self.path('prices.csv'), index=False)
+        start, stop = START + 60 * 100, START + 60 * 200
+
+        expected = prices[(prices['time'] >= start) & (prices['time'] <= stop)].reset_index(drop=True)
+        csv = PriceReader(self.path('prices.csv'), 'AAA-USD', start=start, stop=stop)
+        pd.testing.assert_frame_equal(csv.data['AAA-USD'].reset_index(drop=True), expected)
+        df = PriceReader(prices, 'AAA-USD', start=start, stop=stop)
+        pd.testing.assert_frame_equal(df.data['AAA-USD'].reset_index(drop=True), expected)
+        self.assertEqual(csv.prices_info['AAA-USD'], {'resolution': 60, 'start_time': start, 'stop_time': stop})
+
+        # Without a window the whole file is read
+        self.assertEqual(len(PriceReader(self.path('prices.csv'), 'AAA-USD').data['AAA-USD']), 1000)
+
+    def test_window_matches_millisecond_epochs(self):
+        prices = make_prices(1000, scale=1000)
+        prices.to_csv(self.path('prices.csv'), index=False)
+        reader = PriceReader(self.path('prices.csv'), 'AAA-USD', start=START + 60 * 100, stop=START + 60 * 199)
+        self.assertEqual(len(reader.data['AAA-USD']), 100)
+        self.assertEqual(reader.data['AAA-USD']['time'].iloc[0], (START + 60 * 100) * 1000)
+
+    def test_unsorted_prices_are_sorted(self):
+        prices = make_prices(100)
+        prices.sample(frac=1, random_state=0).to_csv(self.path('prices.csv'), index=False)
+        reader = PriceReader(self.path('prices.csv'), 'AAA-USD', start=START + 60 * 10)
+        self.assertTrue(reader.data['AAA-USD']['time'].is_monotonic_increasing)
+        self.assertEqual(len(reader.data['AAA-USD']), 90)
+
+    def test_unsorted_ticks_keep_file_order_within_a_time(self):
+        # Many ticks share each time, and the size counts up in the order they were written
+        times = START + np.random.default_rng(2).integers(0, 20, 2000)
+        ticks = pd.DataFrame({'time': times, 'price': 100.0, 'size': np.arange(len(times), dtype=float)})
+        ticks.to_csv(self.path('ticks.csv'), index=False)
+
+        loaded = TickReader(self.path('ticks.csv'), 'AAA-USD').data['AAA-USD']
+        pd.testing.assert_frame_equal(loaded.reset_index(drop=True),
+                                      ticks.sort_values('time', kind='stable').reset_index(drop=True))
+
+    def test_streamed_ticks_match_loaded_ticks(self):
+        ticks = make_ticks(5000)
+        ticks.to_csv(self.path('ticks.csv'), index=False)
+        start, stop = START + 2000, START + 8000
+
+        loaded = TickReader(self.path('ticks.csv'), 'AAA-USD', start=start, stop=stop)
+        streamed = TickReader(self.path('ticks.csv'), 'AAA-USD', start=start, stop=stop, chunk_size=128)
+        self.assertFalse(loaded.streaming)
+        self.assertTrue(streamed.streaming)
+        self.assertEqual(streamed.keys, ['AAA-USD'])
+
+        chunks = list(streamed.chunks('AAA-USD'))
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(chunk) <= 128 for chunk in chunks))
+        pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True),
+                                      loaded.data['AAA-USD'].reset_index(drop=True))
+        self.assertEqual(streamed.time_bounds('AAA-USD'), loaded.time_bounds('AAA-USD'))
+
+        window = ticks[(ticks['time'] >= start) & (ticks['time'] <= stop)]
+        self.assertEqual(streamed.time_bounds('AAA-USD'), (window['time'].iloc[0], window['time'].iloc[-1]))
+
+    def test_streaming_stops_after_the_window(self):
+        ticks = make_ticks(1000)
+        after = ticks.iloc[:100].copy()
+        after['time'] += 100000
+        # The rows after those are out of order, but they're never read
+        tail = ticks.iloc[::-1]
+        pd.concat([ticks, after, tail]).to_csv(self.path('ticks.csv'), index=False)
+
+        reader = TickReader(self.path('ticks.csv'), 'AAA-USD', stop=START + 10000, chunk_size=100)
+        self.assertEqual(sum(len(chunk) for chunk in reader.chunks('AAA-USD')), 1000)
+
+        unbounded = TickReader(self.path('ticks.csv'), 'AAA-USD', chunk_size=100)
+        with self.assertRaises(ValueError):
+            list(unbounded.chunks('AAA-USD'))
+
+    def test_json_event_window(self):
+        events = {'news': {'time': [START + i for i in range(10)], 'data': [{'n': i} for i in range(10)]}}
+        with open(self.path('events.json'), 'w') as file:
+            json.dump(events, file)
+        reader = JsonEventReader(self.path('events.json'), start=START + 3, stop=START + 5)
+        self.assertEqual(reader.data['news']['data'].tolist(), [{'n': 3}, {'n': 4}, {'n': 5}])
+        self.assertEqual(reader.time_bounds('news'), (START + 3, START + 5))
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_parquet(self):
+        ticks = make_ticks(2000)
+        ticks.to_parquet(self.path('ticks.parquet'), row_group_size=300)
+        streamed = TickReader(self.path('ticks.parquet'), 'AAA-USD', start=START + 1000, chunk_size=100)
+        loaded = TickReader(self.path('ticks.parquet'), 'AAA-USD', start=START + 1000)
+        pd.testing.assert_frame_equal(pd.concat(streamed.chunks('AAA-USD'), ignore_index=True),
+                                      loaded.data['AAA-USD'].reset_index(drop=True))
+
+
+class PriceReaderLargeInputTest(unittest.TestCase):
+    def test_large_inputs(self):
+        frames, symbols = make_minute_frames(300, 1440)
+        reader = PriceReader(frames, symbols)
+        self.assertEqual(reader.prices_info, {symbol: rowwise_guess(frame) for symbol, frame in zip(symbols, frames)})
@@ -0,0 +1,132 @@
+"""
+    Tests for building coarser backtest resolutions out of cached finer prices
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import blankly
+from blankly.data import PriceReader
+from blankly.exchanges.interfaces.paper_trade.backtest_controller import plan_derived_ranges
+from blankly.utils.utils import aggregate_ohlcv
+
+
+class PlanDerivedRanges(unittest.TestCase):
+    def test_whole_bins(self):
+        # Minute candles cached from 00:30 up to 05:00 cover the 01:00 through 04:00 hourly candles
+        derived, remaining = plan_derived_ranges([0, 6 * 3600], {60: [[1800, 5 * 3600]]}, 3600)
+        self.assertEqual(derived, [(60, [3600, 4 * 3600], [[1800, 5 * 3600]])])
+        self.assertEqual(remaining, [[0, 0], [5 * 3600, 6 * 3600]])
+
+    def test_touching_segments_and_resolutions(self):
+        finer = {
+            # 5 minute candles for the first two hours and touching minute segments for the next two
+            300: [[0, 2 * 3600]],
+            60: [[2 * 3600, 3 * 3600], [3 * 3600, 4 * 3600], [10 * 3600, 11 * 3600]],
+            # Doesn't divide an hour
+            420: [[0, 100 * 3600]]
+        }
+        derived, remaining = plan_derived_ranges([0, 5 * 3600], finer, 3600)
+        self.assertEqual(derived, [(300, [0, 3600], [[0, 2 * 3600]]),
+                                   (60, [2 * 3600, 3 * 3600], [[2 * 3600, 3 * 3600], [3 * 3600, 4 * 3600]])])
+        self.assertEqual(remaining, [[4 * 3600, 5 * 3600]])
+
+    def test_nothing_cached(self):
+        self.assertEqual(plan_derived_ranges([0, 3600], {}, 3600), ([], [[0, 3600]]))
+        # Shorter than a single candle
+        self.assertEqual(plan_derived_ranges([0, 3600], {60: [[0, 1800]]}, 3600), ([], [[0, 3600]]))
+
+
+def price_event(price, symbol, state: blankly.StrategyState):
+    state.variables['prices'].append((state.time, price))
+
+
+class DerivedResolutions(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        size = 24 * 20
+        cls.start = 1600000000 - 1600000000 % 86400
+        cls.stop = cls.start + size * 3600
+        close = np.abs(100 + np.cumsum(np.random.default_rng(2).normal(0, 1, size))) + 10
+        cls.prices = pd.DataFrame({
+            'time': cls.start + np.arange(size) * 3600,
+            'open': close - .5,
+            'high': close + 1,
+            'low': close - 1,
+            'close': close,
+            'volume': 1.0
+        })
+
+    def backtest(self, cache_location: str, resolution: str, start: int, stop: int,
+                 served: pd.DataFrame = None) -> tuple:
+        # Unless told otherwise the exchange only serves hourly prices, so anything else is built from the cache
+        served = self.prices if served is None else served
+        exchange = blankly.KeylessExchange(price_reader=PriceReader(served, 'AAA-USD'),
+                                           settings_path='./tests/config/settings.json')
+        download = exchange.calls.get_product_history
+        requests = []
+
+        def get_product_history(symbol, epoch_start, epoch_stop, resolution_):
+            requests.append((epoch_start, epoch_stop, resolution_))
+            return download(symbol, epoch_start, epoch_stop, resolution_)
+
+        exchange.calls.get_product_history = get_product_history
+        strategy = blankly.Strategy(exchange)
+        prices = []
+        strategy.add_price_event(price_event, 'AAA-USD', resolution, init=lambda symbol, state:
+                                 state.variables.update(prices=prices))
+        strategy.backtest(start_date=start, end_date=stop, initial_values={'USD': 10000},
+                          settings_path='./tests/config/backtest.json', cache_location=cache_location,
+                          benchmark_symbol=None, GUI_output=False)
+        return requests, prices
+
+    def test_coarser_resolution_from_cache(self):
+        with tempfile.TemporaryDirectory() as folder:
+            hourly_requests, _ = self.backtest(folder, '1h', self.start, self.stop)
+            self.assertGreater(len(hourly_requests), 0)
+            segments = sorted(os.listdir(folder))
+
+            requests, prices = self.backtest(folder, '4h', self.start + 4 * 3600, self.stop - 4 * 3600)
+            # Nothing is downloaded and nothing new is cached
+            self.assertEqual(requests, [])
+            self.assertEqual(sorted(os.listdir(folder)), segments)
+            self.assertGreater(len(prices), 0)
+
+        # The same prices as an exchange serving the coarser resolution itself
+        with tempfile.TemporaryDirectory() as folder:
+            served = aggregate_ohlcv(self.prices, 4 * 3600)
+            requests, downloaded = self.backtest(folder, '4h', self.start + 4 * 3600, self.stop - 4 * 3600, served)
+            self.assertGreater(len(requests), 0)
+        self.assertEqual(prices, downloaded)
+
+    def test_gaps_are_downloaded(self):
+        served = aggregate_ohlcv(self.prices, 2 * 3600)
+        with tempfile.TemporaryDirectory() as folder:
+            middle = self.start + 10 * 86400
+            self.backtest(folder, '1h', self.start, middle)
+
+            # The first half is built from the cached hourly prices and only the rest is downloaded
+            requests, prices = self.backtest(folder, '2h', self.start, self.stop, served)
+            self.assertEqual(requests, [(middle, self.stop - 2 * 3600, 2 * 3600)])
+
+        with tempfile.TemporaryDirectory() as folder:
+            _, downloaded = self.backtest(folder, '2h', self.start, self.stop, served)
+        self.assertEqual(prices, downloaded)
@@ -0,0 +1,91 @@
+"""
+    Tests for merging backtest event sources by time
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from blankly.exchanges.interfaces.paper_trade.backtest.events import EventSource, merge_events
+
+
+def dispatched(stream):
+    return [(time, type_, chunk.data(index)) for time, type_, chunk, index in stream]
+
+
+class MergeEventsTest(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        # Unsorted custom events that share times with each other and with the ticks
+        self.news = pd.DataFrame({'time': rng.integers(0, 100, 200), 'data': [{'n': i} for i in range(200)]})
+        self.other = pd.DataFrame({'time': rng.integers(0, 100, 50), 'data': np.arange(50)})
+        self.ticks = pd.DataFrame({'time': np.sort(rng.integers(0, 100, 500)),
+                                   'price': rng.uniform(90, 110, 500),
+                                   'side': rng.choice(['buy', 'sell'], 500)})
+
+    def expected(self):
+        """
+        Every event as a record, stably sorted by time
+        """
+        events = []
+        for type_, frame in [('news', self.news), ('other', self.other)]:
+            for record in frame.to_dict(orient='records'):
+                events.append((record['time'], type_, record['data']))
+        for record in self.ticks.to_dict(orient='records'):
+            events.append((record['time'], '__blankly__tick', record))
+        return sorted(events, key=lambda event: event[0])
+
+    def test_matches_sorted_records(self):
+        stream = merge_events([EventSource('news', [self.news]),
+                               EventSource('other', [self.other]),
+                               EventSource('__blankly__tick', [self.ticks], row_data=True)])
+        events = dispatched(stream)
+        self.assertEqual(events, self.expected())
+
+        # The data has the same python types that the records do
+        self.assertIs(type(events[0][0]), int)
+        tick = next(event[2] for event in events if event[1] == '__blankly__tick')
+        self.assertIs(type(tick['price']), float)
+        self.assertIs(type(next(event[2] for event in events if event[1] == 'other')), int)
+
+    def test_chunks(self):
+        chunks = [self.ticks.iloc[:100], self.ticks.iloc[100:101], self.ticks.iloc[101:]]
+        stream = merge_events([EventSource('news', [self.news]),
+                               EventSource('other', [self.other]),
+                               EventSource('__blankly__tick', chunks, row_data=True)])
+        self.assertEqual(dispatched(stream), self.expected())
+
+    def test_chunks_are_read_lazily(self):
+        read = []
+
+        def chunks():
+            for start in range(0, len(self.ticks), 100):
+                read.append(start)
+                yield self.ticks.iloc[start:start + 100]
+
+        stream = merge_events([EventSource('__blankly__tick', chunks(), row_data=True)])
+        self.assertEqual(read, [])
+        for _ in range(150):
+            next(stream)
+        self.assertEqual(read, [0, 100])
+
+    def test_empty(self):
+        self.assertEqual(list(merge_events([])), [])
+        empty = pd.DataFrame({'time': [], 'data': []})
+        self.assertEqual(dispatched(merge_events([EventSource('news', [empty]), EventSource('other', [self.other])])),
+                         [event for event in self.expected() if event[1] == 'other'])
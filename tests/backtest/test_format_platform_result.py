@@ -0,0 +1,77 @@
+"""
+    Tests for exporting backtest results to the platform format
+    Copyright (C) 2021  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import unittest
+
+import pandas as pd
+
+from blankly.exchanges.interfaces.paper_trade.backtest.format_platform_result import format_platform_result
+from blankly.exchanges.interfaces.paper_trade.backtest_result import BacktestResult
+
+METRIC_NAMES = ['Calmar Ratio', 'Compound Annual Growth Rate (%)', 'Conditional Value-at-Risk',
+                'Cumulative Returns (%)', 'Max Drawdown (%)', 'Resampled Time', 'Risk Free Return Rate',
+                'Sharpe Ratio', 'Sortino Ratio', 'Value-at-Risk', 'Variance (%)', 'Volatility']
+
+
+def make_result(history: pd.DataFrame, trades: dict) -> BacktestResult:
+    result = BacktestResult({'history': history}, trades, {}, 0, 10, 'USD', [])
+    result.metrics = {name: 0.0 for name in METRIC_NAMES}
+    result.user_callbacks = {}
+    result.exchange = 'coinbase_pro'
+    return result
+
+
+class FormatPlatformResultTest(unittest.TestCase):
+    def test_account_values(self):
+        # Repeated times keep their first position with their last value
+        history = pd.DataFrame({'time': [1, 2, 2, 3, 3, 3, 4],
+                                'Account Value (USD)': [10., 11., 12., 13., 14., 15., 16.]})
+        formatted = format_platform_result(make_result(history, {
+            'created': [], 'limits_executed': [], 'limits_canceled': [], 'executed_market_orders': []
+        }))
+
+        self.assertEqual(formatted['account_values'], [{'time': 1, 'value': 10.}, {'time': 2, 'value': 12.},
+                                                       {'time': 3, 'value': 15.}, {'time': 4, 'value': 16.}])
+        self.assertEqual(formatted['initial_account_value'], 10.)
+        self.assertEqual(formatted['final_account_value'], 16.)
+
+    def test_trades(self):
+        history = pd.DataFrame({'time': [1], 'Account Value (USD)': [10.]})
+        formatted = format_platform_result(make_result(history, {
+            'created': [
+                {'id': 'a', 'symbol': 'BTC-USD', 'type': 'limit', 'created_at': 1},
+                {'id': 'b', 'symbol': 'ETH-USD', 'type': 'limit', 'created_at': 2},
+                {'id': 'c', 'symbol': 'BTC-USD', 'type': 'market', 'created_at': 3},
+                {'id': 'd', 'symbol': 'BTC-USD', 'type': 'limit', 'created_at': 4},
+            ],
+            'limits_executed': [{'id': 'a', 'executed_time': 5}],
+            'limits_canceled': [{'id': 'b', 'canceled_time': 6}],
+            'executed_market_orders': [{'id': 'c', 'executed_price': 100.}]
+        }))
+
+        self.assertEqual(formatted['symbols'], ['BTC-USD', 'ETH-USD'])
+        self.assertEqual(formatted['trades'], [
+            {'id': 'a', 'symbol': 'BTC-USD', 'type': 'limit', 'time': 1, 'executed_time': 5},
+            {'id': 'b', 'symbol': 'ETH-USD', 'type': 'limit', 'time': 2, 'canceled_time': 6},
+            {'id': 'c', 'symbol': 'BTC-USD', 'type': 'spot-market', 'time': 3, 'price': 100.},
+            {'id': 'd', 'symbol': 'BTC-USD', 'type': 'limit', 'time': 4},
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,205 @@
+"""
+    Tests for filling paper trade limit and stop orders in backtests
+    Copyright (C) 2021  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+import blankly
+from blankly.data import PriceReader
+from blankly.exchanges.interfaces.paper_trade.backtest_controller import BackTestController, \
+    to_price_columns
+from blankly.exchanges.interfaces.paper_trade.backtest_result import BacktestResult
+from blankly.utils import load_backtest_preferences
+
+# The price walks down to 88 and then back up to 112
+CLOSES = [100, 97, 94, 91, 88, 92, 96, 100, 104, 108, 112, 112]
+
+# Bars which only reach the orders inside their range or by gapping on the open
+BARS = [
+    # open, high, low, close
+    (100, 100, 100, 100),
+    (100, 100.5, 99.5, 100),
+    (100, 106, 94, 100),
+    (100, 101, 99, 100),
+    (90, 91, 89, 90),
+    (90, 90, 90, 90)
+]
+
+START = 1600000000
+
+# Filled in by the strategy so the test can check on it afterwards
+record = {}
+
+
+def init(symbol, state: blankly.StrategyState):
+    interface = state.interface
+    record['orders'] = {
+        'buy_95': interface.limit_order(symbol, 'buy', 95, 1).get_id(),
+        'buy_90': interface.limit_order(symbol, 'buy', 90, 1).get_id(),
+        'buy_80': interface.limit_order(symbol, 'buy', 80, 1).get_id(),
+        'sell_105': interface.limit_order(symbol, 'sell', 105, 1).get_id(),
+        'sell_110': interface.limit_order(symbol, 'sell', 110, 1).get_id(),
+        'stop_93': interface.stop_loss_order(symbol, 93, 1).get_id(),
+        'canceled': interface.limit_order(symbol, 'buy', 99, 1).get_id(),
+    }
+    interface.cancel_order(symbol, record['orders']['canceled'])
+
+
+def price_event(price, symbol, state: blankly.StrategyState):
+    record['open'].append(len(state.interface.get_open_orders()))
+
+
+def cancel_while_fetching(symbol, state: blankly.StrategyState):
+    """
+    Cancel every order the first time the limit evaluation asks for a price, like a live strategy thread racing the
+    watchdog
+    """
+    init(symbol, state)
+    interface = state.interface
+    get_price = interface.get_price
+
+    def racing_get_price(symbol_):
+        if 'race' not in record:
+            record['race'] = [i['id'] for i in interface.get_open_orders()]
+            for id_ in record['race']:
+                interface.cancel_order(symbol_, id_)
+        return get_price(symbol_)
+    interface.get_price = racing_get_price
+
+
+def run_backtest(bars: list, fill_model: str = 'price', intrabar_path: str = 'nearest', init_=init) \
+        -> BacktestResult:
+    record.clear()
+    record['open'] = []
+    prices = pd.DataFrame(bars, columns=['open', 'high', 'low', 'close'], dtype=float)
+    prices['time'] = START + np.arange(len(bars)) * 3600
+    prices['volume'] = 1.0
+
+    exchange = blankly.KeylessExchange(price_reader=PriceReader(prices, 'AAA-USD'),
+                                       settings_path='./tests/config/settings.json')
+    strategy = blankly.Strategy(exchange)
+    strategy.add_price_event(price_event, 'AAA-USD', '1h', init=init_)
+
+    with tempfile.TemporaryDirectory() as cache:
+        return strategy.backtest(start_date=START, end_date=START + (len(bars) - 1) * 3600,
+                                 initial_values={'USD': 1000, 'AAA': 10},
+                                 settings_path='./tests/config/backtest.json', cache_location=cache,
+                                 benchmark_symbol=None, fill_model=fill_model, intrabar_path=intrabar_path)
+
+
+def fills(result: BacktestResult) -> list:
+    """
+    The names of the filled orders along with the bar they filled on and the price they filled at
+    """
+    names = {id_: name for name, id_ in record['orders'].items()}
+    return [(names[i['id']], int((i['executed_time'] - START) / 3600), i['executed_price'])
+            for i in result.trades['limits_executed']]
+
+
+class LimitOrderBook(unittest.TestCase):
+    @classmethod
+    def tearDownClass(cls) -> None:
+        # Backtest keyword arguments stay in the loaded preferences, so put the defaults back for other tests
+        settings = load_backtest_preferences('./tests/config/backtest.json')['settings']
+        settings['fill_model'] = 'price'
+        settings['intrabar_path'] = 'nearest'
+
+    def test_fills(self):
+        result = run_backtest([(i, i, i, i) for i in CLOSES])
+
+        # Each order fills at its own price on the first price that crosses it, in the order they were created
+        self.assertEqual(fills(result), [('buy_95', 2, 95), ('stop_93', 3, 93), ('buy_90', 4, 90),
+                                         ('sell_105', 9, 105), ('sell_110', 10, 110)])
+        self.assertEqual([i['id'] for i in result.trades['limits_canceled']], [record['orders']['canceled']])
+        self.assertNotIn(record['orders']['canceled'], [i['id'] for i in result.trades['created']])
+
+        statuses = {i['id']: i['status'] for i in result.trades['created']}
+        self.assertEqual(statuses[record['orders']['buy_80']], 'pending')
+        self.assertEqual(sum(i == 'done' for i in statuses.values()), 5)
+        # Only the order at 80 is left open at the end
+        self.assertEqual(record['open'][-1], 1)
+
+    def test_price_fill_model(self):
+        # Only the closes are checked, so the range of the third bar doesn't fill anything
+        self.assertEqual(fills(run_backtest(BARS)), [('buy_95', 4, 95), ('stop_93', 4, 93)])
+
+    def test_ohlc_fill_model(self):
+        # The third bar trades through the buy at 95 and the sell at 105. The fifth bar gaps through the stop at 93
+        #  so it fills at the open, then trades down through the buy at 90
+        self.assertEqual(fills(run_backtest(BARS, fill_model='ohlc', intrabar_path='low_first')),
+                         [('buy_95', 2, 95), ('sell_105', 2, 105), ('stop_93', 4, 90), ('buy_90', 4, 90)])
+        self.assertEqual(fills(run_backtest(BARS, fill_model='ohlc', intrabar_path='high_first')),
+                         [('sell_105', 2, 105), ('buy_95', 2, 95), ('stop_93', 4, 90), ('buy_90', 4, 90)])
+        # The low is further from the open than the high
+        bars = list(BARS)
+        bars[2] = (100, 106, 93, 100)
+        self.assertEqual(fills(run_backtest(bars, fill_model='ohlc'))[:2], [('sell_105', 2, 105), ('buy_95', 2, 95)])
+
+    def test_ohlc_fill_model_uses_later_bars(self):
+        # Orders placed in the init only see the close of the first bar, even though it trades through them. The
+        #  buy at 95 then fills at the better price of the gap down
+        bars = [(100, 106, 94, 100)] + BARS[3:]
+        self.assertEqual(fills(run_backtest(bars, fill_model='ohlc')),
+                         [('buy_95', 2, 90), ('stop_93', 2, 90), ('buy_90', 2, 90)])
+
+    def test_cancel_during_evaluation(self):
+        # The ladders empty out between fetching the prices and checking them, which shouldn't fill or raise
+        result = run_backtest([(i, i, i, i) for i in CLOSES], init_=cancel_while_fetching)
+        self.assertEqual(len(record['race']), 6)
+        self.assertEqual(result.trades['limits_executed'], [])
+        self.assertEqual(len(result.trades['limits_canceled']), 7)
+        self.assertEqual(set(record['open']), {0})
+
+    def test_bars_skipped_over(self):
+        prices = pd.DataFrame(BARS, columns=['open', 'high', 'low', 'close'], dtype=float)
+        prices['time'] = START + np.arange(len(BARS)) * 3600
+
+        controller = BackTestController(mock.Mock())
+        controller.interface = mock.Mock(intrabar_path='nearest')
+        controller.use_price = 'close'
+        controller.user_stop = START + 86400
+        controller.prices = {'AAA-USD': to_price_columns(prices)}
+        controller.price_indexes = {'AAA-USD': 1}
+
+        # Moving past several bars at once combines everything in between into one bar
+        controller.time = START + 4 * 3600
+        controller.advance_time_and_price_index()
+        controller.interface.receive_bar.assert_called_once_with('AAA-USD', (100, 106, 89, 90))
+        controller.interface.receive_price.assert_called_once_with('AAA-USD', new_price=90)
+
+        controller.interface.reset_mock()
+        controller.time = START + 5 * 3600
+        controller.advance_time_and_price_index()
+        controller.interface.receive_bar.assert_called_once_with('AAA-USD', BARS[5])
+
+        # Prices without the bar columns are only checked at the price
+        controller.interface.reset_mock()
+        controller.prices = {'AAA-USD': to_price_columns(prices[['time', 'close']])}
+        controller.price_indexes = {'AAA-USD': 0}
+        controller.time = START + 3 * 3600
+        controller.advance_time_and_price_index()
+        controller.interface.receive_bar.assert_not_called()
+        controller.interface.receive_price.assert_called_once_with('AAA-USD', new_price=100)
+
+    def test_unknown_fill_model(self):
+        with self.assertRaises(ValueError):
+            run_backtest(BARS, fill_model='vwap')
@@ -0,0 +1,108 @@
+"""
+    Tests for the backtest price cache file formats
+    Copyright (C) 2021  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from blankly.exchanges.interfaces.paper_trade.backtest.price_cache import get_price_cache, migrate_price_cache, \
+    compact_price_cache, list_price_cache, read_price_cache_index, write_price_cache_index
+
+
+class PriceCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        size = 100
+        cls.prices = pd.DataFrame({
+            'time': 1600000000 + np.arange(size) * 60,
+            'low': np.linspace(0, 1, size),
+            'high': np.linspace(2, 3, size),
+            'open': np.linspace(1, 2, size),
+            'close': np.linspace(1, 2, size),
+            'volume': np.linspace(5, 6, size)
+        })
+        cls.key = 'coinbase_pro,True,BTC-USD,1600000000,1600006000,60'
+
+    def test_round_trip(self):
+        with tempfile.TemporaryDirectory() as folder:
+            for cache_format in ('csv', 'npy'):
+                cache = get_price_cache(cache_format)
+                path = os.path.join(folder, self.key + cache.extension)
+                cache.write(path, self.prices)
+                pd.testing.assert_frame_equal(cache.read(path), self.prices)
+
+    def test_migrate_csv(self):
+        csv = get_price_cache('csv')
+        npy = get_price_cache('npy')
+        with tempfile.TemporaryDirectory() as folder:
+            csv.write(os.path.join(folder, self.key + csv.extension), self.prices)
+
+            migrated = migrate_price_cache(folder, self.key + csv.extension, npy)
+
+            self.assertEqual(migrated, self.key + npy.extension)
+            self.assertEqual(os.listdir(folder), [migrated])
+            pd.testing.assert_frame_equal(npy.read(os.path.join(folder, migrated)), self.prices)
+
+            # Already in the right format
+            self.assertEqual(migrate_price_cache(folder, migrated, npy), migrated)
+
+    def test_unknown_format(self):
+        with self.assertRaises(LookupError):
+            get_price_cache('xlsx')
+
+    def test_compact(self):
+        cache = get_price_cache('npy')
+        with tempfile.TemporaryDirectory() as folder:
+            # Two overlapping segments, one touching the second and one separate segment
+            segments = {
+                'coinbase_pro,True,BTC-USD,1600000000,1600003000,60': self.prices.iloc[:50],
+                'coinbase_pro,True,BTC-USD,1600002400,1600004800,60': self.prices.iloc[40:80],
+                'coinbase_pro,True,BTC-USD,1600004800,1600006000,60': self.prices.iloc[80:],
+                'coinbase_pro,True,BTC-USD,1700000000,1700006000,60': self.prices
+            }
+            for key, prices in segments.items():
+                cache.write(os.path.join(folder, key + cache.extension), prices)
+
+            compacted = compact_price_cache(folder, [i + cache.extension for i in segments], cache)
+
+            merged = 'coinbase_pro,True,BTC-USD,1600000000,1600006000,60' + cache.extension
+            self.assertEqual(sorted(compacted),
+                             [merged, 'coinbase_pro,True,BTC-USD,1700000000,1700006000,60' + cache.extension])
+            self.assertEqual(sorted(os.listdir(folder)), sorted(compacted))
+            pd.testing.assert_frame_equal(cache.read(os.path.join(folder, merged)), self.prices)
+
+    def test_index(self):
+        cache = get_price_cache('npy')
+        with tempfile.TemporaryDirectory() as folder:
+            cache.write(os.path.join(folder, self.key + cache.extension), self.prices)
+            self.assertIsNone(read_price_cache_index(folder))
+
+            self.assertEqual(list_price_cache(folder, cache), [self.key + cache.extension])
+            self.assertEqual(read_price_cache_index(folder), [self.key + cache.extension])
+
+            # Anything else changing the folder invalidates the index
+            other = 'coinbase_pro,True,ETH-USD,1600000000,1600006000,60' + cache.extension
+            cache.write(os.path.join(folder, other), self.prices)
+            self.assertIsNone(read_price_cache_index(folder))
+            self.assertEqual(sorted(list_price_cache(folder, cache)), sorted([self.key + cache.extension, other]))
+
+            write_price_cache_index(folder, [other])
+            self.assertEqual(list_price_cache(folder, cache), [other])
@@ -0,0 +1,95 @@
+"""
+    Tests for resuming interrupted backtest price downloads from the cache
+    Copyright (C) 2021  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+import blankly
+from blankly.data import PriceReader
+from blankly.exchanges.interfaces.paper_trade.backtest.price_cache import INDEX_FILE, get_price_cache
+
+
+def price_event(price, symbol, state: blankly.StrategyState):
+    if state.interface.account[state.base_asset].available:
+        state.interface.market_order(symbol, 'sell', 1)
+    else:
+        state.interface.market_order(symbol, 'buy', 1)
+
+
+class ResumableDownload(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        size = 500
+        cls.start = 1600000000
+        cls.stop = cls.start + (size - 1) * 3600
+        close = np.abs(100 + np.cumsum(np.random.default_rng(1).normal(0, 1, size))) + 10
+        cls.prices = pd.DataFrame({
+            'time': cls.start + np.arange(size) * 3600,
+            'open': close,
+            'high': close + 1,
+            'low': close - 1,
+            'close': close,
+            'volume': 1.0
+        })
+
+    def backtest(self, cache_location: str, fail_after: int = None) -> list:
+        exchange = blankly.KeylessExchange(price_reader=PriceReader(self.prices, 'AAA-USD'),
+                                           settings_path='./tests/config/settings.json')
+        download = exchange.calls.get_product_history
+        requests = []
+
+        def get_product_history(symbol, epoch_start, epoch_stop, resolution):
+            if fail_after is not None and len(requests) == fail_after:
+                raise ConnectionError('Download interrupted')
+            requests.append((epoch_start, epoch_stop))
+            return download(symbol, epoch_start, epoch_stop, resolution)
+
+        exchange.calls.get_product_history = get_product_history
+        strategy = blankly.Strategy(exchange)
+        strategy.add_price_event(price_event, 'AAA-USD', '1h')
+        strategy.backtest(start_date=self.start, end_date=self.stop, initial_values={'USD': 10000},
+                          settings_path='./tests/config/backtest.json', cache_location=cache_location,
+                          benchmark_symbol=None, GUI_output=False)
+        return requests
+
+    @mock.patch('blankly.exchanges.interfaces.paper_trade.backtest_controller.DOWNLOAD_CHUNK_SIZE', 100)
+    def test_resume(self):
+        with tempfile.TemporaryDirectory() as folder:
+            with self.assertRaises(ConnectionError):
+                self.backtest(folder, fail_after=2)
+
+            # The chunks that finished are already cached
+            self.assertEqual(len([i for i in os.listdir(folder) if i != INDEX_FILE]), 2)
+
+            # Only the remaining chunks are downloaded on the retry
+            requests = self.backtest(folder)
+            self.assertEqual(len(requests), 3)
+            self.assertEqual(requests[0][0], self.start + 201 * 3600)
+
+            # The chunks are compacted the next time the cache is read and nothing else is downloaded
+            self.assertEqual(self.backtest(folder), [])
+            segments = [i for i in os.listdir(folder) if i != INDEX_FILE]
+            self.assertEqual(len(segments), 1)
+            cached = get_price_cache('npy').read(os.path.join(folder, segments[0]))
+            # The backtest range stops one candle before the end date
+            pd.testing.assert_frame_equal(cached[self.prices.columns], self.prices.iloc[:-1], check_dtype=False)
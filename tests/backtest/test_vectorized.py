@@ -0,0 +1,112 @@
+"""
+    Tests for vectorized signal backtests
+    Copyright (C) 2021  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import blankly
+from blankly.data import PriceReader
+from blankly.utils.exceptions import InvalidOrder
+
+START = 1600000000
+TAKER_FEE = 0.001
+
+
+def price_event(price, symbol, state: blankly.StrategyState):
+    order = state.variables['orders'][int((state.time - START) / 3600)]
+    if order > 0:
+        state.interface.market_order(symbol, 'buy', order)
+    elif order < 0:
+        state.interface.market_order(symbol, 'sell', -order)
+
+
+class VectorizedBacktest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        size = 300
+        generator = np.random.default_rng(3)
+        close = np.abs(100 + np.cumsum(generator.normal(0, 1, size))) + 10
+        cls.prices = pd.DataFrame({
+            'time': START + np.arange(size) * 3600,
+            'open': close,
+            'high': close + 1,
+            'low': close - 1,
+            'close': close,
+            'volume': 1.0
+        })
+
+        # Go in and out of a position of 10 as a fast average crosses a slow one
+        fast = cls.prices['close'].rolling(5).mean()
+        slow = cls.prices['close'].rolling(20).mean()
+        cls.positions = np.where(fast > slow, 10.0, 0.0)
+        # The same trades as orders, where each sell gives back what the buy kept after fees
+        changes = np.diff(cls.positions, prepend=0.0)
+        cls.orders = np.where(changes > 0, changes, changes * (1 - TAKER_FEE))
+
+    def test_matches_event_backtest(self):
+        exchange = blankly.KeylessExchange(price_reader=PriceReader(self.prices, 'AAA-USD'), taker_fee=TAKER_FEE,
+                                           settings_path='./tests/config/settings.json')
+        strategy = blankly.Strategy(exchange)
+        strategy.add_price_event(price_event, 'AAA-USD', '1h', variables={'orders': self.orders})
+        with tempfile.TemporaryDirectory() as cache:
+            expected = strategy.backtest(start_date=START, end_date=START + (len(self.prices) - 1) * 3600,
+                                         initial_values={'USD': 10000}, settings_path='./tests/config/backtest.json',
+                                         cache_location=cache, benchmark_symbol=None)
+
+        result = blankly.backtest_vectorized({'AAA-USD': self.prices}, {'AAA-USD': self.orders}, fees=exchange,
+                                             initial_values={'USD': 10000}, signal_type='orders')
+
+        # The event backtest also records the starting account, so compare on the last row for each time. Its final
+        #  row is valued before the last price is read, so leave that out
+        expected_history = expected.get_account_history().drop_duplicates('time', keep='last')[:-1]
+        history = result.get_account_history()[:-1]
+        self.assertEqual(history['time'].tolist(), expected_history['time'].tolist())
+        for column in ('AAA', 'USD', 'Account Value (USD)'):
+            np.testing.assert_allclose(history[column].to_numpy(dtype=float),
+                                       expected_history[column].to_numpy(dtype=float), rtol=1e-9, atol=1e-6)
+
+        trade_keys = ('time', 'type', 'side', 'price')
+        self.assertEqual([[i[key] for key in trade_keys] + [round(i['size'], 9)] for i in result.trades['created']],
+                         [[i[key] for key in trade_keys] + [round(i['size'], 9)] for i in expected.trades['created']])
+        self.assertEqual(result.get_metrics(), expected.get_metrics())
+
+    def test_positions(self):
+        result = blankly.backtest_vectorized({'AAA-USD': self.prices}, pd.DataFrame({'AAA-USD': self.positions}),
+                                             fees={'maker_fee_rate': 0, 'taker_fee_rate': TAKER_FEE},
+                                             initial_values={'USD': 10000})
+        history = result.get_account_history()
+        # Positions are reached exactly because each buy covers its fee
+        np.testing.assert_allclose(history['AAA'], self.positions)
+
+        close = self.prices['close'].to_numpy()
+        changes = np.diff(self.positions, prepend=0.0)
+        spent = np.where(changes > 0, changes / (1 - TAKER_FEE) * close, changes * close * (1 - TAKER_FEE))
+        np.testing.assert_allclose(history['USD'], 10000 - np.cumsum(spent))
+        np.testing.assert_allclose(history['Account Value (USD)'], history['USD'] + self.positions * close)
+        self.assertEqual(len(result.trades['created']), np.count_nonzero(changes))
+
+    def test_insufficient_funds(self):
+        with self.assertRaises(InvalidOrder):
+            blankly.backtest_vectorized({'AAA-USD': self.prices}, {'AAA-USD': self.positions * 100},
+                                        initial_values={'USD': 10000})
+        with self.assertRaises(InvalidOrder):
+            blankly.backtest_vectorized({'AAA-USD': self.prices}, {'AAA-USD': -self.orders},
+                                        initial_values={'USD': 10000}, signal_type='orders')
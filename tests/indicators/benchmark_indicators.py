@@ -0,0 +1,50 @@
+"""
+    Compare the NumPy kernels against the pandas-ta path of the batch indicators
+    Run with: python -m tests.indicators.benchmark_indicators
+    Copyright (C) 2021  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from blankly.indicators import ema, max_period, min_period, rsi, sma, sum_period, wma
+
+SIZES = [50, 150, 1000, 10000, 100000]
+PERIOD = 14
+
+
+def benchmark():
+    functions = [sma, ema, wma, rsi, min_period, max_period, sum_period]
+    print(f"{'indicator':<15}{'size':>8}{'pandas-ta (ms)':>16}{'numpy (ms)':>12}{'speedup':>10}")
+    for function in functions:
+        for size in SIZES:
+            data = 100 + np.random.default_rng(0).normal(0, 1, size).cumsum()
+            series = pd.Series(data)
+            number = max(1, 20000 // size)
+
+            # A series keeps the pandas-ta path while a list goes through the kernels
+            pandas_time = min(timeit.repeat(lambda: function(series, PERIOD), number=number, repeat=3)) / number
+            data = data.tolist()
+            numpy_time = min(timeit.repeat(lambda: function(data, PERIOD), number=number, repeat=3)) / number
+
+            print(f"{function.__name__:<15}{size:>8}{pandas_time * 1000:>16.4f}{numpy_time * 1000:>12.4f}"
+                  f"{pandas_time / numpy_time:>9.1f}x")
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,81 @@
+"""
+    Tests for the NumPy indicator kernels
+    Copyright (C) 2021  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import pickle
+import unittest
+import warnings
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from blankly.indicators import ema, max_period, min_period, rsi, sma, stddev_period, sum_period, wma, kernels
+
+
+class Kernels(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        data_path = Path("tests/config/test_data.p").resolve()
+        with open(data_path, 'rb') as f:
+            cls.data = pickle.load(f)
+        cls.functions = [ema, max_period, min_period, rsi, sma, stddev_period, sum_period, wma]
+
+    def test_same_as_series(self):
+        close = self.data['close']
+        for period in self.data['periods']:
+            for function in self.functions:
+                expected = function(pd.Series(close), period).to_numpy()
+                for data in (close, list(close), deque(close, maxlen=len(close))):
+                    self.assertTrue(np.allclose(function(data, period), expected), function.__name__)
+
+    def test_use_series(self):
+        close = list(self.data['close'])
+        for function in self.functions:
+            result = function(close, 14, use_series=True)
+            self.assertIsInstance(result, pd.Series)
+            pd.testing.assert_series_equal(result, function(pd.Series(close), 14))
+
+    def test_short_input(self):
+        for function in (sma, wma, ema, min_period, max_period, sum_period, stddev_period):
+            self.assertEqual(len(function([1.0, 2.0], 14)), 0)
+        self.assertEqual(len(rsi([1.0, 2.0], 14)), 0)
+
+    def test_missing_and_flat_values(self):
+        rng = np.random.default_rng(1)
+        noise = list(100 + np.cumsum(rng.normal(0, 1, 40)))
+        inputs = {
+            'flat': [5.0] * 30,
+            'flat prefix': [5.0] * 5 + noise,
+            'nan': noise[:10] + [np.nan] + noise[10:],
+            'infinite': noise[:10] + [np.inf] + noise[10:]
+        }
+        for name, data in inputs.items():
+            for function in self.functions:
+                expected = function(pd.Series(data), 14).to_numpy()
+                with warnings.catch_warnings():
+                    warnings.simplefilter('error')
+                    result = function(data, 14)
+                self.assertEqual(len(result), len(expected), f'{function.__name__} on {name} data')
+                self.assertTrue(np.allclose(result, expected, equal_nan=True), f'{function.__name__} on {name} data')
+
+    def test_chunks(self):
+        # Windows are reduced in chunks past a size limit
+        data = np.random.default_rng(0).normal(0, 1, kernels._CHUNK_VALUES // 10 + 50)
+        expected = pd.Series(data).rolling(20).sum().dropna().to_numpy()
+        self.assertTrue(np.allclose(kernels.total(data, 20), expected))
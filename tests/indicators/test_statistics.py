@@ -91,3 +91,11 @@ class Statistics(unittest.TestCase):
         max_res = max_period(self.data['close'], period)
         expected_max = series.rolling(period).max().dropna().to_numpy()
         self.assertTrue(compare_equal(max_res, expected_max))
+
+    def test_stddev_shorter_than_period(self):
+        # A series input still comes back as a series when there isn't a full period
+        short = pd.Series(self.data['close'][:5])
+        result = stddev_period(short, 14)
+        self.assertIsInstance(result, pd.Series)
+        self.assertEqual(len(result), 0)
+        self.assertEqual(len(stddev_period(list(short), 14)), 0)
@@ -0,0 +1,105 @@
+"""
+    Streaming indicator tests
+    Copyright (C) 2021  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import pickle
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from blankly.indicators import sma, ema, wma, wilders, rsi, macd, bbands, stddev_period, min_period, max_period, \
+    true_range, average_true_range, stochastic_oscillator, stream
+
+
+def stream_values(indicator, *data) -> list:
+    # The indicator value after every update, skipping the ones before the period filled
+    values = [indicator.update(*point) for point in zip(*data)]
+    return [i for i in values if i is not None]
+
+
+class StreamingIndicators(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        data_path = Path("tests/config/test_data.p").resolve()
+        with open(data_path, 'rb') as f:
+            cls.data = pickle.load(f)
+
+    def assert_matches(self, streamed, batch):
+        self.assertEqual(len(streamed), len(batch))
+        self.assertTrue(np.allclose(streamed, batch, equal_nan=True))
+
+    def test_moving_averages(self):
+        close = self.data['close']
+        for period in self.data['periods']:
+            self.assert_matches(stream_values(stream.SMA(period), close), sma(close, period))
+            self.assert_matches(stream_values(stream.EMA(period), close), ema(close, period))
+            self.assert_matches(stream_values(stream.WMA(period), close), wma(close, period))
+            self.assert_matches(stream_values(stream.Wilders(period), close), wilders(close, period))
+
+    def test_statistics(self):
+        close = self.data['close']
+        for period in self.data['periods']:
+            self.assert_matches(stream_values(stream.StdDev(period), close), stddev_period(close, period))
+            self.assert_matches(stream_values(stream.RollingExtreme(period), close), min_period(close, period))
+            self.assert_matches(stream_values(stream.RollingExtreme(period, maximum=True), close),
+                                max_period(close, period))
+
+    def test_rsi(self):
+        close = self.data['close']
+        for period in self.data['periods']:
+            indicator = stream.RSI(period)
+            for i in range(len(close)):
+                value = indicator.update(close[i])
+                if i + 1 > period:
+                    self.assertAlmostEqual(value, rsi(close[:i + 1], period)[-1])
+                else:
+                    self.assertIsNone(value)
+
+    def test_macd(self):
+        close = self.data['close']
+        macd_values, signal, histogram = macd(close, self.data['short_period'], self.data['long_period'])
+        streamed = stream_values(stream.MACD(self.data['short_period'], self.data['long_period']), close)
+        self.assert_matches([i[0] for i in streamed], macd_values[-len(streamed):])
+        self.assert_matches([i[1] for i in streamed], signal)
+        self.assert_matches([i[2] for i in streamed], histogram)
+
+    def test_bbands(self):
+        close = self.data['close']
+        for period in self.data['periods']:
+            lower, middle, upper = bbands(close, period, self.data['stddev'])
+            streamed = stream_values(stream.BBands(period, self.data['stddev']), close)
+            self.assert_matches([i[0] for i in streamed], lower)
+            self.assert_matches([i[1] for i in streamed], middle)
+            self.assert_matches([i[2] for i in streamed], upper)
+
+    def test_true_range(self):
+        high, low, close = self.data['high'], self.data['low'], self.data['close']
+        self.assert_matches(stream_values(stream.TrueRange(), high, low, close), true_range(high, low, close))
+        for period in self.data['periods']:
+            self.assert_matches(stream_values(stream.ATR(period), high, low, close),
+                                average_true_range(high, low, close, period))
+
+    def test_stochastic_oscillator(self):
+        high, low, close = self.data['high'], self.data['low'], self.data['close']
+        pct_k, pct_d = stochastic_oscillator(high, low, close, self.data['pct_k_period'],
+                                             self.data['pct_k_slowing_period'], self.data['pct_d_period'])
+        streamed = stream_values(stream.StochasticOscillator(self.data['pct_k_period'],
+                                                             self.data['pct_k_slowing_period'],
+                                                             self.data['pct_d_period']), high, low, close)
+        self.assert_matches([i[0] for i in streamed], pct_k[-len(streamed):])
+        self.assert_matches([i[1] for i in streamed], pct_d)
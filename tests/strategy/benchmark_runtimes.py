@@ -0,0 +1,168 @@
+"""
+    Compare event timing between the threaded schedulers and the asyncio runtime of a live strategy, with prices
+    requested from a local server that answers after a fixed delay
+    Run with: python -m tests.strategy.benchmark_runtimes
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import asyncio
+import multiprocessing
+import threading
+import time
+
+import numpy as np
+import requests
+
+import blankly
+from blankly.exchanges.interfaces.price_request import AsyncPriceSource, PriceRequest
+from blankly.frameworks.strategy.async_runtime import AsyncRuntime
+from blankly.frameworks.strategy.strategy_base import EventType
+from blankly.utils.sessions import PooledSession
+
+EVENT_COUNTS = [10, 100, 200]
+INTERVAL = .1
+DURATION = 3
+# Stands in for the round trip of a REST price request
+REQUEST_TIME = .01
+PORT = 8765
+URL = f'http://127.0.0.1:{PORT}/ticker'
+
+
+def serve():
+    from aiohttp import web
+
+    async def ticker(request):
+        await asyncio.sleep(REQUEST_TIME)
+        return web.json_response({'price': '1.0'})
+
+    app = web.Application()
+    app.router.add_get('/ticker', ticker)
+    web.run_app(app, host='127.0.0.1', port=PORT, print=None)
+
+
+class State:
+    pass
+
+
+class Interface:
+    def __init__(self):
+        self.session = PooledSession(pool_size=max(EVENT_COUNTS))
+
+    def get_price(self, symbol):
+        return float(self.session.get(URL, params={'symbol': symbol}).json()['price'])
+
+
+class RequestInterface(Interface, AsyncPriceSource):
+    def price_request(self, symbol):
+        return PriceRequest(URL, {'symbol': symbol}, lambda response: float(response['price']))
+
+
+class SimulatedModel:
+    """
+    Finds a price event's arguments the same way StrategyStructure does
+    """
+    def __init__(self, interface: Interface):
+        self.interface = interface
+
+    def event_arguments(self, prices: dict = None, **event):
+        symbol = event['symbol']
+        price = self.interface.get_price(symbol) if prices is None else prices[symbol]
+        return [price, symbol, event['state']]
+
+    def rest_event(self, **event):
+        event['callback'](*self.event_arguments(**event))
+
+
+def build(count: int, model: SimulatedModel, calls: dict):
+    schedulers = []
+    for i in range(count):
+        calls[i] = []
+
+        def price_event(price, symbol, state, times=calls[i]):
+            times.append(time.perf_counter())
+
+        schedulers.append(blankly.Scheduler(model.rest_event, INTERVAL, initially_stopped=True,
+                                            callback=price_event, symbol=str(i), type=EventType.price_event,
+                                            state=State()))
+    return schedulers
+
+
+def measure(count: int, use_runtime: bool, interface: Interface):
+    model = SimulatedModel(interface)
+    calls = {}
+    schedulers = build(count, model, calls)
+    base_threads = threading.active_count()
+
+    if use_runtime:
+        runtime = AsyncRuntime(model)
+        thread = threading.Thread(target=runtime.run, args=(schedulers,))
+        thread.start()
+        runtime.wait_until_started()
+    else:
+        runtime = thread = None
+        for scheduler in schedulers:
+            scheduler.start()
+
+    peak_threads = 0
+    stop = time.time() + DURATION
+    while time.time() < stop:
+        peak_threads = max(peak_threads, threading.active_count() - base_threads)
+        time.sleep(.05)
+
+    if use_runtime:
+        runtime.stop()
+        thread.join()
+    else:
+        for scheduler in schedulers:
+            scheduler.stop_scheduler()
+
+    # How far each run drifted from the interval after the run before it
+    jitter = np.concatenate([np.abs(np.diff(times) - INTERVAL) for times in calls.values() if len(times) > 1])
+    runs = sum(len(times) for times in calls.values())
+    return runs, peak_threads, np.median(jitter) * 1000, np.percentile(jitter, 99) * 1000
+
+
+def wait_for_server():
+    session = PooledSession(retries=0)
+    while True:
+        try:
+            session.get(URL)
+            return
+        except requests.exceptions.ConnectionError:
+            time.sleep(.1)
+
+
+def benchmark():
+    server = multiprocessing.Process(target=serve, daemon=True)
+    server.start()
+    wait_for_server()
+
+    print(f"{'runtime':<18}{'events':>8}{'runs':>8}{'threads':>9}{'p50 jitter (ms)':>17}{'p99 jitter (ms)':>17}")
+    try:
+        for count in EVENT_COUNTS:
+            for name, use_runtime, interface in [('threaded', False, Interface),
+                                                 ('asyncio (pool)', True, Interface),
+                                                 ('asyncio (aiohttp)', True, RequestInterface)]:
+                runs, threads, p50, p99 = measure(count, use_runtime, interface())
+                print(f"{name:<18}{count:>8}{runs:>8}{threads:>9}{p50:>17.2f}{p99:>17.2f}")
+                # Let the stopped threads exit before the next measurement
+                time.sleep(INTERVAL * 2)
+    finally:
+        server.terminate()
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,111 @@
+"""
+    Tests for aggregating candles into coarser resolutions
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from blankly.exchanges.interfaces.history_download import derive_history
+from blankly.utils.utils import aggregate_candles, aggregate_ohlcv, get_ohlcv
+
+START = 1600000000
+
+
+def make_candles(times) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    close = 100 + np.cumsum(rng.normal(0, 1, len(times)))
+    return pd.DataFrame({'time': times, 'open': close + rng.normal(0, .1, len(times)),
+                         'high': close + rng.uniform(0, 1, len(times)), 'low': close - rng.uniform(0, 1, len(times)),
+                         'close': close, 'volume': rng.uniform(0, 10, len(times))})
+
+
+def resampled(candles: pd.DataFrame, resolution: int) -> pd.DataFrame:
+    """
+    The reference aggregation: a pandas resample on bins aligned to the epoch
+    """
+    frame = candles.set_index(pd.to_datetime(candles['time'], unit='s'))
+    bars = frame.resample(f'{resolution}s').agg({'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last',
+                                                 'volume': 'sum', 'time': 'count'})
+    # Bins without any candles are left out
+    bars = bars[bars['time'] > 0]
+    bars['time'] = (bars.index - pd.Timestamp(0)) // pd.Timedelta(seconds=1)
+    return bars.reset_index(drop=True)[['time', 'open', 'high', 'low', 'close', 'volume']]
+
+
+class AggregationTest(unittest.TestCase):
+    def test_matches_resample_with_missing_candles(self):
+        rng = np.random.default_rng(1)
+        # Two days of minute candles starting mid hour, with whole hours and scattered minutes missing
+        times = START + 60 * np.arange(2 * 1440)
+        keep = rng.uniform(size=len(times)) > .2
+        keep[600:720] = False
+        candles = make_candles(times[keep])
+
+        for resolution in [300, 3600, 86400]:
+            pd.testing.assert_frame_equal(aggregate_ohlcv(candles, resolution), resampled(candles, resolution),
+                                          check_dtype=False)
+
+        hourly = aggregate_ohlcv(candles, 3600)
+        self.assertTrue((hourly['time'] % 3600 == 0).all())
+        self.assertEqual(hourly['volume'].sum(), candles['volume'].sum())
+
+    def test_origin_and_unsorted(self):
+        # Daily bars that open at 04:00 UTC
+        candles = make_candles(86400 * 18500 + 14400 + 86400 * np.arange(10))
+        two_day = aggregate_ohlcv(candles.iloc[::-1], 2 * 86400, origin=14400)
+        self.assertEqual(two_day['time'].tolist(), list(86400 * 18500 + 14400 + 2 * 86400 * np.arange(5)))
+        self.assertEqual(two_day['open'].tolist(), candles['open'].iloc[::2].tolist())
+        self.assertEqual(two_day['close'].tolist(), candles['close'].iloc[1::2].tolist())
+
+        self.assertEqual(len(aggregate_ohlcv(candles.iloc[:0], 3600)), 0)
+
+    def test_rows(self):
+        candles = make_candles(START + 60 * np.arange(100))
+        by_rows = aggregate_candles(candles, 15)
+        self.assertEqual(len(by_rows), 7)
+        self.assertEqual(by_rows['time'].tolist(), candles['time'].iloc[::15].tolist())
+        self.assertEqual(by_rows['close'].iloc[0], candles['close'].iloc[14])
+        self.assertEqual(by_rows['close'].iloc[-1], candles['close'].iloc[-1])
+        self.assertEqual(by_rows['high'].iloc[1], candles['high'].iloc[15:30].max())
+
+        # Bars from a datetime index, the way alpaca returns them
+        bars = candles.drop(columns='time').set_index(pd.to_datetime(candles['time'], unit='s', utc=True))
+        pd.testing.assert_frame_equal(get_ohlcv(bars, 15, from_zero=False), by_rows)
+        with self.assertRaises(ValueError):
+            get_ohlcv(bars.iloc[:10], 15, from_zero=False)
+
+    def test_derive_history(self):
+        requests = []
+        minutes = make_candles(START + 60 * np.arange(-300, 1440))
+
+        def fetch(epoch_start, epoch_stop, resolution):
+            requests.append((epoch_start, epoch_stop, resolution))
+            window = minutes[(minutes['time'] >= epoch_start) & (minutes['time'] <= epoch_stop)]
+            return aggregate_ohlcv(window, resolution)
+
+        self.assertIsNone(derive_history(fetch, START, START + 86400, 90, [60, 3600]))
+        self.assertEqual(requests, [])
+
+        derived = derive_history(fetch, START, START + 86400, 7200, [60, 300, 3600])
+        # The coarsest resolution that divides the request is downloaded, and only for whole bins
+        first = START - START % 7200 + 7200
+        last = START + 86400 - (START + 86400) % 7200
+        self.assertEqual(requests, [(first, last + 3600, 3600)])
+        window = minutes[(minutes['time'] >= first) & (minutes['time'] < last + 7200)]
+        pd.testing.assert_frame_equal(derived, aggregate_ohlcv(window, 7200))
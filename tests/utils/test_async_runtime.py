@@ -0,0 +1,209 @@
+"""
+    Tests for running live strategy events on an asyncio event loop
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import asyncio
+import threading
+import time
+import unittest
+
+import blankly
+from blankly.exchanges.interfaces.price_request import AsyncPriceSource, PriceRequest
+from blankly.frameworks.strategy.async_runtime import AsyncRuntime
+from blankly.frameworks.strategy.strategy_base import EventType
+
+
+def wait_for(condition, timeout=10):
+    stop = time.time() + timeout
+    while time.time() < stop:
+        if condition():
+            return True
+        time.sleep(.01)
+    return False
+
+
+class FakeInterface:
+    @staticmethod
+    def get_price(symbol):
+        return {'BTC-USD': 100.0, 'ETH-USD': 10.0}[symbol]
+
+
+class FakeRequestInterface(FakeInterface, AsyncPriceSource):
+    def price_request(self, symbol):
+        return PriceRequest('https://venue/ticker', {'symbol': symbol}, lambda response: float(response['price']))
+
+
+class FakeSession:
+    def __init__(self):
+        self.requests = []
+
+    async def get_json(self, url, params=None):
+        self.requests.append((url, params, threading.current_thread()))
+        await asyncio.sleep(0)
+        return {'price': FakeInterface.get_price(params['symbol'])}
+
+    async def close(self):
+        pass
+
+
+class FakeModel:
+    interface = FakeInterface()
+
+    def event_arguments(self, prices: dict = None, **event):
+        if prices is None:
+            prices = self.interface.get_price(event['symbol'])
+        elif event['type'] == EventType.price_event:
+            prices = prices[event['symbol']]
+        event['state'].arguments_thread = threading.current_thread()
+        return [prices, event['symbol'], event['state']]
+
+
+class State:
+    pass
+
+
+class AsyncRuntimeTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.runtime = AsyncRuntime(FakeModel(), max_workers=4)
+        self.thread = None
+
+    def tearDown(self) -> None:
+        self.runtime.stop()
+        if self.thread is not None:
+            self.thread.join(10)
+            self.assertFalse(self.thread.is_alive())
+
+    def start(self, *schedulers, start_websockets=None):
+        self.thread = threading.Thread(target=self.runtime.run, args=(list(schedulers), start_websockets))
+        self.thread.start()
+        self.assertTrue(self.runtime.wait_until_started(10))
+
+    @staticmethod
+    def scheduler(callback, symbol, interval=.02):
+        type_ = EventType.arbitrage_event if isinstance(symbol, list) else EventType.price_event
+        return blankly.Scheduler(None, interval, initially_stopped=True, callback=callback, symbol=symbol,
+                                 type=type_, state=State())
+
+    def use_async_prices(self):
+        self.runtime.model.interface = FakeRequestInterface()
+        self.runtime.session = FakeSession()
+        return self.runtime.session
+
+    def test_sync_callback(self):
+        calls = []
+
+        def price_event(price, symbol, state):
+            calls.append((price, symbol, threading.current_thread(), state.arguments_thread))
+
+        self.start(self.scheduler(price_event, 'BTC-USD'))
+        self.assertTrue(wait_for(lambda: len(calls) >= 3))
+
+        price, symbol, thread, arguments_thread = calls[0]
+        self.assertEqual(price, 100.0)
+        self.assertEqual(symbol, 'BTC-USD')
+        # Synchronous callbacks run on the runtime's pool, right after their arguments are found on the same thread
+        self.assertTrue(thread.name.startswith('blankly_runtime'))
+        self.assertIs(thread, arguments_thread)
+
+    def test_async_callback(self):
+        calls = []
+
+        async def price_event(price, symbol, state):
+            await asyncio.sleep(0)
+            calls.append(threading.current_thread())
+
+        self.start(self.scheduler(price_event, 'BTC-USD'))
+        self.assertTrue(wait_for(lambda: len(calls) >= 3))
+        # Coroutines are awaited on the loop itself
+        self.assertIs(calls[0], self.thread)
+
+    def test_arbitrage_prices(self):
+        calls = []
+
+        def arbitrage_event(prices, symbols, state):
+            calls.append(prices)
+
+        self.start(self.scheduler(arbitrage_event, ['BTC-USD', 'ETH-USD']))
+        self.assertTrue(wait_for(lambda: len(calls) >= 1))
+        self.assertEqual(calls[0], {'BTC-USD': 100.0, 'ETH-USD': 10.0})
+
+    def test_async_prices(self):
+        session = self.use_async_prices()
+        calls = []
+
+        async def price_event(price, symbol, state):
+            calls.append((price, state.arguments_thread))
+
+        def arbitrage_event(prices, symbols, state):
+            calls.append(prices)
+
+        self.start(self.scheduler(price_event, 'BTC-USD'), self.scheduler(arbitrage_event, ['BTC-USD', 'ETH-USD']))
+        self.assertTrue(wait_for(lambda: len(calls) >= 4))
+
+        # Prices are awaited on the loop instead of holding a pool thread
+        self.assertIn((100.0, self.thread), calls)
+        self.assertIn({'BTC-USD': 100.0, 'ETH-USD': 10.0}, calls)
+        self.assertTrue(all(thread is self.thread for _, _, thread in session.requests))
+        self.assertIn(('https://venue/ticker', {'symbol': 'ETH-USD'}), [i[:2] for i in session.requests])
+
+    def test_exceptions_do_not_stop_events(self):
+        calls = []
+
+        def price_event(price, symbol, state):
+            calls.append(price)
+            raise ValueError('user error')
+
+        self.start(self.scheduler(price_event, 'BTC-USD'))
+        self.assertTrue(wait_for(lambda: len(calls) >= 3))
+
+    def test_dispatch_keeps_order_per_state(self):
+        calls = []
+        running = []
+        overlapped = []
+
+        def tick_event(tick, symbol, state):
+            running.append(tick)
+            if len(running) > 1:
+                overlapped.append(tick)
+            time.sleep(.001)
+            calls.append(tick)
+            running.remove(tick)
+
+        state = State()
+
+        def start_websockets():
+            for i in range(50):
+                self.runtime.dispatch(tick_event, i, 'BTC-USD', state)
+
+        self.start(start_websockets=start_websockets)
+        self.assertTrue(wait_for(lambda: len(calls) == 50))
+        self.assertEqual(calls, list(range(50)))
+        self.assertEqual(overlapped, [])
+
+    def test_stop(self):
+        calls = []
+        self.start(self.scheduler(lambda *args: calls.append(1), 'BTC-USD'))
+        self.assertTrue(wait_for(lambda: len(calls) >= 1))
+        self.runtime.stop()
+        self.thread.join(10)
+        self.assertFalse(self.thread.is_alive())
+
+        count = len(calls)
+        time.sleep(.1)
+        self.assertEqual(len(calls), count)
+        # Ticks that arrive after the runtime stopped are dropped
+        self.runtime.dispatch(lambda *args: calls.append(1), None, 'BTC-USD', State())
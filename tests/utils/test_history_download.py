@@ -0,0 +1,124 @@
+"""
+    Tests for the concurrent history download engine against a local stub server
+    Copyright (C) 2021  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import json
+import threading
+import time
+import unittest
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from blankly.exchanges.interfaces.coinbase_pro.coinbase_pro_api import API
+from blankly.exchanges.interfaces.history_download import RateLimiter, download_history, history_windows, \
+    rate_limits
+from blankly.utils.utils import epoch_from_iso8601, iso8601_from_epoch
+
+
+class CandleHandler(BaseHTTPRequestHandler):
+    requests = []
+    lock = threading.Lock()
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        start = int(epoch_from_iso8601(query['start'][0]))
+        end = int(epoch_from_iso8601(query['end'][0]))
+        granularity = int(query['granularity'][0])
+        with self.lock:
+            self.requests.append(time.monotonic())
+
+        # Simulate some network latency so that pages overlap
+        time.sleep(.05)
+        # Coinbase returns candles newest first
+        candles = [[t, 1, 2, 1, 2, 10] for t in range(start, end, granularity)][::-1]
+
+        body = json.dumps(candles).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class HistoryDownload(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), CandleHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.api = API('key', 'c2VjcmV0', 'pass', api_url=f'http://127.0.0.1:{cls.server.server_port}/')
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self) -> None:
+        CandleHandler.requests = []
+
+    def fetch(self, window_open, window_close):
+        return self.api.get_product_historic_rates('BTC-USD', iso8601_from_epoch(window_open),
+                                                   iso8601_from_epoch(window_close), 60)
+
+    def test_windows(self):
+        self.assertEqual(history_windows(0, 600, 60, 300), [(0, 600)])
+        self.assertEqual(history_windows(0, 1000, 60, 5), [(0, 300), (300, 600), (600, 900), (900, 1000)])
+
+    def test_download(self):
+        start, stop = 1600000000, 1600000000 + 60 * 3000
+        windows = history_windows(start, stop, 60, 300)
+
+        history = download_history(self.fetch, windows, 'stub')
+
+        # Every window is concatenated in order without losing or duplicating a candle
+        self.assertEqual(len(CandleHandler.requests), len(windows))
+        self.assertEqual(sorted(i[0] for i in history), list(range(start, stop, 60)))
+        # Pages keep the order they come back in from the exchange
+        self.assertEqual(history[0][0], start + 299 * 60)
+
+    # The limiter made for this test is dropped along with its limit afterwards
+    @mock.patch.dict('blankly.exchanges.interfaces.history_download._rate_limiters')
+    @mock.patch.dict(rate_limits, {'stub_limited': (20, 1)})
+    def test_rate_limit(self):
+        windows = history_windows(0, 60 * 20, 60, 2)
+
+        download_history(self.fetch, windows, 'stub_limited', workers=8)
+
+        # With no burst allowance requests can't be closer than 1 / rate on average
+        times = sorted(CandleHandler.requests)
+        self.assertGreaterEqual(times[-1] - times[0], (len(times) - 1) / 20 * .9)
+
+    def test_errors(self):
+        def fetch(window_open, window_close):
+            if window_open >= 600:
+                raise ConnectionError('Stub failure')
+            return [window_open]
+
+        with self.assertRaises(ConnectionError):
+            download_history(fetch, history_windows(0, 1200, 60, 5), 'stub')
+
+    def test_token_bucket(self):
+        limiter = RateLimiter(100, 5)
+        start = time.monotonic()
+        for _ in range(15):
+            limiter.acquire()
+        # The first 5 are a burst, the remaining 10 wait for refills
+        self.assertGreaterEqual(time.monotonic() - start, 10 / 100 * .9)
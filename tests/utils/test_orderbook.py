@@ -0,0 +1,84 @@
+"""
+    Tests for the sorted orderbook kept by the orderbook manager
+    Copyright (C) 2021  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import json
+import random
+import unittest
+
+from blankly.exchanges.managers.orderbook import Orderbook
+
+
+class OrderbookTest(unittest.TestCase):
+    def test_updates(self):
+        book = Orderbook([('100', '1'), ('99', '2')], [('101', '1', '0', '4'), ('102', '3', '0', '1')])
+        self.assertEqual(book['bids'], [(99., 2.), (100., 1.)])
+        self.assertEqual(book['asks'], [(101., 1.), (102., 3.)])
+
+        # Updating a price replaces its level rather than adding another
+        book['bids'].update(100., 5.)
+        book['bids'].update(99.5, 1.)
+        book['asks'].update(101., 0.)
+        # Removing a price that isn't in the book does nothing
+        book['asks'].update(150., 0.)
+
+        self.assertEqual(book['bids'], [(99., 2.), (99.5, 1.), (100., 5.)])
+        self.assertEqual(book['asks'], [(102., 3.)])
+        self.assertEqual(book.best_bid(), (100., 5.))
+        self.assertEqual(book.best_ask(), (102., 3.))
+        self.assertEqual(book['bids'].size_at(99.5), 1.)
+        self.assertEqual(book['bids'].size_at(98.), 0.)
+
+    def test_top(self):
+        book = Orderbook([(price, 1) for price in range(10)], [(price, 1) for price in range(10, 20)])
+        self.assertEqual(book.top(2), {
+            'bids': [(9., 1.), (8., 1.)],
+            'asks': [(10., 1.), (11., 1.)]
+        })
+        self.assertEqual(book.top(0), {'bids': [], 'asks': []})
+        self.assertEqual(len(book.top(50)['bids']), 10)
+
+    def test_empty(self):
+        book = Orderbook()
+        self.assertIsNone(book.best_bid())
+        self.assertIsNone(book.best_ask())
+        self.assertEqual(book, {'bids': [], 'asks': []})
+
+    def test_plain_lists(self):
+        # Callbacks get the book itself, so it has to work anywhere the old dictionary of lists did
+        book = Orderbook([(99, 2), (100, 1)], [(101, 3)])
+        self.assertIsInstance(book['bids'], list)
+        self.assertEqual(json.loads(json.dumps(book)), {'bids': [[99., 2.], [100., 1.]], 'asks': [[101., 3.]]})
+
+    def test_matches_sorted_levels(self):
+        rng = random.Random(0)
+        book = Orderbook()
+        expected = {}
+        for _ in range(5000):
+            price = float(rng.randrange(200))
+            size = float(rng.choice([0, 0, 1, 2, 3]))
+            book['asks'].update(price, size)
+            if size == 0:
+                expected.pop(price, None)
+            else:
+                expected[price] = size
+
+        self.assertEqual(list(book['asks']), sorted(expected.items()))
+
+
+if __name__ == '__main__':
+    unittest.main()
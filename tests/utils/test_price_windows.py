@@ -0,0 +1,63 @@
+"""
+    Tests for extracting windows of cached prices
+    Copyright (C) 2021  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from blankly.exchanges.interfaces.paper_trade.backtesting_wrapper import BacktestingWrapper
+from blankly.utils.utils import extract_price_by_resolution
+
+
+class PriceWindows(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        size = 500
+        cls.resolution = 60
+        cls.prices = pd.DataFrame({
+            'time': 1600000000 + np.arange(size) * cls.resolution,
+            'open': np.linspace(1, 2, size),
+            'high': np.linspace(2, 3, size),
+            'low': np.linspace(0, 1, size),
+            'close': np.linspace(1, 2, size),
+            'volume': np.ones(size)
+        })
+
+    def test_indexed_window_matches_filtered_window(self):
+        wrapper = BacktestingWrapper()
+        # Shuffle the rows to make sure the cache is sorted before being indexed
+        wrapper.receive_price_cache({'BTC-USD': {self.resolution: self.prices.sample(frac=1, random_state=1)}})
+
+        windows = [
+            (1600000000, 1600000000 + 60 * 10),
+            (1600000000 + 30, 1600000000 + 60 * 100 + 30),
+            (1500000000, 1700000000),
+            (1700000000, 1800000000),
+        ]
+        for start, stop in windows:
+            expected = extract_price_by_resolution(wrapper.full_prices, 'BTC-USD', start, stop, self.resolution)
+            result = extract_price_by_resolution(wrapper.full_prices, 'BTC-USD', start, stop, self.resolution,
+                                                 time_index=wrapper.full_price_times)
+            pd.testing.assert_frame_equal(expected, result)
+
+    def test_missing_resolution(self):
+        wrapper = BacktestingWrapper()
+        wrapper.receive_price_cache({'BTC-USD': {self.resolution: self.prices}})
+        with self.assertRaises(LookupError):
+            extract_price_by_resolution(wrapper.full_prices, 'BTC-USD', 0, 1, 3600, time_index=wrapper.full_price_times)
@@ -0,0 +1,218 @@
+"""
+    Tests for the pooled HTTP sessions against a local server
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import asyncio
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from blankly.utils.sessions import AsyncSession, LatencyMetrics, PooledSession, endpoint_name
+from blankly.utils.utils import load_user_preferences
+
+
+class Handler(BaseHTTPRequestHandler):
+    # Keep connections open between requests
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def respond(self):
+        self.server.requests.append((self.command, self.path))
+        length = int(self.headers.get('Content-Length', 0))
+        if length:
+            self.rfile.read(length)
+
+        if self.path.startswith('/flaky') and self.server.failures > 0:
+            self.server.failures -= 1
+            status, body = 503, b'{"message": "unavailable"}'
+        elif self.path.startswith('/slow'):
+            time.sleep(1)
+            status, body = 200, b'{}'
+        else:
+            status, body = 200, b'{"ok": true}'
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = respond
+    do_POST = respond
+    do_DELETE = respond
+
+    def log_message(self, *args):
+        pass
+
+
+class ServerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        load_user_preferences('./tests/config/settings.json')
+
+    def setUp(self) -> None:
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.connections = 0
+        self.server.requests = []
+        self.server.failures = 0
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self.metrics = LatencyMetrics()
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class PooledSessionTest(ServerTest):
+    def setUp(self) -> None:
+        super().setUp()
+        self.session = PooledSession(backoff_factor=0, metrics=self.metrics)
+
+    def tearDown(self) -> None:
+        self.session.close()
+        super().tearDown()
+
+    def test_settings_defaults(self):
+        session = PooledSession()
+        self.assertEqual(session.pool_size, 10)
+        self.assertEqual(session.timeout, 30)
+        self.assertEqual(session.retries, 3)
+        self.assertEqual(session.backoff_factor, .3)
+
+    def test_connections_are_reused(self):
+        for _ in range(5):
+            self.assertEqual(self.session.get(self.url + '/products').json(), {'ok': True})
+        self.session.post(self.url + '/orders', json={'size': 1})
+        self.assertEqual(self.server.connections, 1)
+
+    def test_idempotent_requests_are_retried(self):
+        self.server.failures = 2
+        response = self.session.get(self.url + '/flaky')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_retries_run_out(self):
+        self.server.failures = 10
+        response = self.session.get(self.url + '/flaky')
+        # The exchange's own response comes back instead of an exception
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(len(self.server.requests), 4)
+
+    def test_posts_are_not_retried(self):
+        self.server.failures = 1
+        response = self.session.post(self.url + '/flaky', json={'size': 1})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_default_timeout(self):
+        session = PooledSession(timeout=.1, retries=0, metrics=self.metrics)
+        with self.assertRaises(requests.exceptions.RequestException):
+            session.get(self.url + '/slow')
+        # A timeout set on the request wins
+        self.assertEqual(session.get(self.url + '/slow', timeout=5).status_code, 200)
+        session.close()
+
+    def test_latency_metrics(self):
+        order_id = '68e6a28f-ae28-4788-8d4f-5ab4e5e5ae08'
+        self.session.get(self.url + '/products', params={'limit': 5})
+        self.session.get(self.url + '/products')
+        self.session.delete(self.url + '/orders/' + order_id)
+        self.server.failures = 10
+        self.session.post(self.url + '/flaky')
+
+        metrics = self.metrics.get()
+        host = self.url[len('http://'):]
+        self.assertEqual(set(metrics), {f'GET {host}/products', f'DELETE {host}/orders/{{id}}',
+                                        f'POST {host}/flaky'})
+
+        products = metrics[f'GET {host}/products']
+        self.assertEqual(products['count'], 2)
+        self.assertEqual(products['errors'], 0)
+        self.assertAlmostEqual(products['mean'], products['total'] / 2)
+        self.assertGreaterEqual(products['max'], products['last'])
+        self.assertEqual(metrics[f'POST {host}/flaky']['errors'], 1)
+
+        self.metrics.reset()
+        self.assertEqual(self.metrics.get(), {})
+
+
+class AsyncSessionTest(ServerTest):
+    def get_json(self, *urls, **kwargs):
+        async def get():
+            session = AsyncSession(**dict({'backoff_factor': 0, 'metrics': self.metrics}, **kwargs))
+            try:
+                return [await session.get_json(self.url + url) for url in urls]
+            finally:
+                await session.close()
+        return asyncio.run(get())
+
+    def test_settings_defaults(self):
+        session = AsyncSession()
+        self.assertEqual(session.pool_size, 10)
+        self.assertEqual(session.timeout, 30)
+        self.assertEqual(session.retries, 3)
+        self.assertEqual(session.backoff_factor, .3)
+
+    def test_connections_are_reused(self):
+        self.assertEqual(self.get_json(*['/products'] * 5), [{'ok': True}] * 5)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_requests_are_retried(self):
+        self.server.failures = 2
+        self.assertEqual(self.get_json('/flaky'), [{'ok': True}])
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_retries_run_out(self):
+        self.server.failures = 10
+        # The exchange's own error comes back instead of an exception
+        self.assertEqual(self.get_json('/flaky'), [{'message': 'unavailable'}])
+        self.assertEqual(len(self.server.requests), 4)
+
+    def test_timeout(self):
+        with self.assertRaises(asyncio.TimeoutError):
+            self.get_json('/slow', timeout=.1, retries=0)
+
+    def test_latency_metrics(self):
+        self.server.failures = 1
+        self.get_json('/products', '/flaky')
+        host = self.url[len('http://'):]
+        metrics = self.metrics.get()
+        self.assertEqual(metrics[f'GET {host}/products']['count'], 1)
+        self.assertEqual(metrics[f'GET {host}/flaky']['count'], 2)
+        self.assertEqual(metrics[f'GET {host}/flaky']['errors'], 1)
+
+
+class EndpointNameTest(unittest.TestCase):
+    def test_ids_are_removed(self):
+        self.assertEqual(endpoint_name('get', 'https://api.binance.com/api/v3/depth?symbol=BTCUSDT'),
+                         'GET api.binance.com/api/v3/depth')
+        self.assertEqual(endpoint_name('delete', 'https://api.pro.coinbase.com/orders/'
+                                                 '68e6a28f-ae28-4788-8d4f-5ab4e5e5ae08'),
+                         'DELETE api.pro.coinbase.com/orders/{id}')
+        self.assertEqual(endpoint_name('GET', 'https://api-fxpractice.oanda.com/v3/accounts/101-001-1234567-001/'
+                                              'orders/42'),
+                         'GET api-fxpractice.oanda.com/v3/accounts/{id}/orders/{id}')
+        self.assertEqual(endpoint_name('GET', 'https://api.pro.coinbase.com/products/BTC-USD/ticker'),
+                         'GET api.pro.coinbase.com/products/BTC-USD/ticker')
@@ -0,0 +1,244 @@
+"""
+    Tests for sharing websocket connections between streams against a local server
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import asyncio
+import json
+import threading
+import time
+import unittest
+from unittest import mock
+
+from blankly.exchanges.interfaces.binance.binance_websocket import CombinedStreams, Tickers
+from blankly.exchanges.interfaces.coinbase_pro.coinbase_pro_websocket import ProductChannels
+from blankly.exchanges.interfaces.okx.okx_websocket import ChannelArgs
+from blankly.exchanges.interfaces.websocket_multiplexer import WebsocketMultiplexer
+from blankly.exchanges.managers.ticker_manager import TickerManager
+from blankly.utils.utils import load_user_preferences
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+SYMBOLS = ['btcusdt', 'ethusdt', 'solusdt', 'adausdt', 'xrpusdt']
+
+
+def wait_for(condition, timeout=10):
+    stop = time.time() + timeout
+    while not condition():
+        if time.time() > stop:
+            return False
+        time.sleep(.01)
+    return True
+
+
+@unittest.skipIf(websockets is None, "The websockets package is needed to run a local server")
+class WebsocketMultiplexerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        load_user_preferences('./tests/config/settings.json')
+
+        # A combined stream server that sends one trade for every stream subscribed to
+        cls.connections = 0
+        cls.open_connections = 0
+        cls.server_connections = set()
+        cls.requests = []
+
+        async def handler(connection, *args):
+            cls.connections += 1
+            cls.open_connections += 1
+            cls.server_connections.add(connection)
+            try:
+                async for message in connection:
+                    request = json.loads(message)
+                    cls.requests.append(request)
+                    await connection.send(json.dumps({'result': None, 'id': request['id']}))
+                    if request['method'] != 'SUBSCRIBE':
+                        continue
+                    for trade_id, stream in enumerate(request['params']):
+                        symbol = stream.split('@')[0]
+                        await connection.send(json.dumps({'stream': stream, 'data': {
+                            'e': 'aggTrade', 'E': 1600000000000, 's': symbol.upper(), 'a': trade_id,
+                            'p': '100.5', 'q': '2', 'T': 1600000000000, 'm': True
+                        }}))
+            finally:
+                cls.open_connections -= 1
+                cls.server_connections.discard(connection)
+
+        cls.loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        async def serve():
+            cls.server = await websockets.serve(handler, '127.0.0.1', 0)
+            cls.port = cls.server.sockets[0].getsockname()[1]
+            started.set()
+
+        cls.thread = threading.Thread(target=cls.loop.run_forever, daemon=True)
+        cls.thread.start()
+        asyncio.run_coroutine_threadsafe(serve(), cls.loop)
+        started.wait(10)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        async def close():
+            cls.server.close()
+            await cls.server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(close(), cls.loop).result(10)
+        cls.loop.call_soon_threadsafe(cls.loop.stop)
+
+    def create_tickers(self, symbols: list, received: dict) -> list:
+        tickers = []
+        for symbol in symbols:
+            ticker = Tickers(symbol, 'aggTrade', initially_stopped=True,
+                             websocket_url=f'ws://127.0.0.1:{self.port}/ws')
+            ticker.append_callback(lambda tick, symbol_=symbol: received.setdefault(symbol_, []).append(tick))
+            tickers.append(ticker)
+        return tickers
+
+    def test_routes_streams_over_shared_connections(self):
+        received = {}
+        tickers = self.create_tickers(SYMBOLS, received)
+        connections = self.connections
+
+        protocol = tickers[0].multiplex_protocol()
+        self.assertIsInstance(protocol, CombinedStreams)
+        self.assertEqual(protocol.url, f'ws://127.0.0.1:{self.port}/stream')
+
+        # Two streams fit on each connection
+        multiplexer = WebsocketMultiplexer(CombinedStreams(protocol.url, max_streams=2))
+        for ticker in tickers:
+            multiplexer.subscribe(ticker)
+
+        self.assertTrue(wait_for(lambda: len(received) == len(SYMBOLS)))
+        self.assertEqual(multiplexer.connection_count(), 3)
+        self.assertEqual(self.connections - connections, 3)
+        for ticker in tickers:
+            self.assertTrue(ticker.is_websocket_open())
+            self.assertEqual(ticker.get_most_recent_tick()['symbol'], received[ticker.symbol][0]['symbol'])
+            self.assertEqual(ticker.get_most_recent_tick()['price'], 100.5)
+            self.assertEqual(len(ticker.get_feed()), 1)
+
+        # Streams are unsubscribed one at a time and each connection closes once it's empty
+        tickers[0].close_websocket()
+        self.assertFalse(tickers[0].is_websocket_open())
+        self.assertTrue(wait_for(lambda: any(request['method'] == 'UNSUBSCRIBE' and
+                                             request['params'] == ['btcusdt@aggTrade'] for request in self.requests)))
+        self.assertEqual(multiplexer.connection_count(), 3)
+
+        for ticker in tickers[1:]:
+            ticker.close_websocket()
+        self.assertEqual(multiplexer.connection_count(), 0)
+        self.assertTrue(wait_for(lambda: self.open_connections == 0))
+
+        # Restarting subscribes again
+        tickers[0].restart_ticker()
+        self.assertTrue(wait_for(lambda: len(received[SYMBOLS[0]]) == 2))
+        self.assertEqual(multiplexer.connection_count(), 1)
+        multiplexer.close()
+        self.assertTrue(wait_for(lambda: self.open_connections == 0))
+
+    def test_resubscribes_dropped_connections(self):
+        received = {}
+        tickers = self.create_tickers(SYMBOLS[:2], received)
+        multiplexer = WebsocketMultiplexer(tickers[0].multiplex_protocol())
+        for ticker in tickers:
+            multiplexer.subscribe(ticker)
+        self.assertTrue(wait_for(lambda: len(received) == 2))
+        connections = self.connections
+
+        async def drop():
+            for connection in list(self.server_connections):
+                connection.transport.abort()
+
+        # The server's socket is cut and both streams move onto a new connection
+        asyncio.run_coroutine_threadsafe(drop(), self.loop).result(10)
+        self.assertTrue(wait_for(lambda: all(len(i) == 2 for i in received.values())))
+        self.assertEqual(self.connections - connections, 1)
+        self.assertEqual(multiplexer.connection_count(), 1)
+
+        # Restarting a stream that was already moved keeps it where it is
+        tickers[0].restart_ticker()
+        for ticker in tickers:
+            self.assertTrue(ticker.is_websocket_open())
+        self.assertEqual(multiplexer.connection_count(), 1)
+
+        multiplexer.close()
+        self.assertTrue(wait_for(lambda: self.open_connections == 0))
+
+    def test_ticker_manager_initially_stopped(self):
+        url = f'ws://127.0.0.1:{self.port}/ws'
+        for multiplex in [False, True]:
+            manager = TickerManager('binance', 'BTC-USDT')
+            manager.multiplex = multiplex
+            received = []
+            connections = self.connections
+
+            # Tick events are created stopped and started later by the strategy
+            ticker = manager.create_ticker(received.append, override_symbol='SOL-USDT', initially_stopped=True,
+                                           websocket_url=url)
+            self.assertFalse(ticker.is_websocket_open())
+            self.assertEqual(self.connections, connections)
+            self.assertEqual(ticker.multiplexer is not None, multiplex)
+
+            if multiplex:
+                ticker.restart_ticker()
+                self.assertTrue(wait_for(lambda: len(received) == 1))
+                self.assertTrue(ticker.is_websocket_open())
+                ticker.close_websocket()
+            self.assertTrue(wait_for(lambda: self.open_connections == 0))
+
+
+class MultiplexProtocolTest(unittest.TestCase):
+    def test_unsupported_venue(self):
+        load_user_preferences('./tests/config/settings.json')
+        manager = TickerManager('binance', 'BTC-USDT')
+        # Websockets without a protocol keep their own connection and start only when asked to
+        websocket_ = mock.Mock(spec=['restart_ticker'])
+        manager.multiplex_websocket(websocket_, initially_stopped=True)
+        websocket_.restart_ticker.assert_not_called()
+        manager.multiplex_websocket(websocket_)
+        websocket_.restart_ticker.assert_called_once()
+
+    def test_coinbase_pro(self):
+        protocol = ProductChannels('wss://example')
+        messages = [json.loads(i) for i in protocol.subscribe_messages([('BTC-USD', 'ticker'), ('ETH-USD', 'ticker'),
+                                                                        ('BTC-USD', 'level2')])]
+        self.assertEqual(messages, [
+            {'type': 'subscribe', 'product_ids': ['BTC-USD', 'ETH-USD'], 'channels': ['ticker']},
+            {'type': 'subscribe', 'product_ids': ['BTC-USD'], 'channels': ['level2']}
+        ])
+
+        update = {'type': 'l2update', 'product_id': 'BTC-USD', 'changes': []}
+        self.assertEqual(protocol.route(update), (('BTC-USD', 'level2'), update))
+        self.assertIsNone(protocol.route({'type': 'subscriptions', 'channels': []}))
+
+    def test_okx(self):
+        protocol = ChannelArgs('wss://example')
+        self.assertEqual(json.loads(protocol.unsubscribe_messages([('BTC-USDT', 'books')])[0]), {
+            'op': 'unsubscribe',
+            'args': [{'channel': 'books', 'instId': 'BTC-USDT'}]
+        })
+
+        update = {'arg': {'channel': 'tickers', 'instId': 'BTC-USDT'}, 'data': [{}]}
+        self.assertEqual(protocol.route(update), (('BTC-USDT', 'tickers'), update))
+        self.assertIsNone(protocol.route({'event': 'error', 'msg': ''}))
+
+
+if __name__ == '__main__':
+    unittest.main()